@@ -11,10 +11,20 @@ This file is part of the Alorium Technology CiricuitPython Library Bundle
 and provides the CSR address mapping for the Evo M51 board.   
 
 """
-import busio
-import board
-
 import struct
+import sys
+
+from aloriumtech import arbiter
+
+# On a Linux host the Evo is reached through /dev/i2c, see
+# aloriumtech.linux_i2c
+_LINUX_HOST = sys.platform == "linux"
+
+if _LINUX_HOST:
+  from aloriumtech import linux_i2c
+else:
+  import busio
+  import board
 
 # SVN version 257
 
@@ -458,23 +468,273 @@ PORT_Z_PINCFG29_ADDR = PORT_Z_BASE_ADDR + 0x03D
 PORT_Z_PINCFG30_ADDR = PORT_Z_BASE_ADDR + 0x03E
 PORT_Z_PINCFG31_ADDR = PORT_Z_BASE_ADDR + 0x03F
 
-# Initialize I2C
-i2c1 = busio.I2C(board.SCL_1, board.SDA_1, frequency=100000)
-while not i2c1.try_lock():
-  pass
+# Register offsets within a port block
+PORT_DIR_OFS = 0x000
+PORT_DIRCLR_OFS = 0x001
+PORT_DIRSET_OFS = 0x002
+PORT_DIRTGL_OFS = 0x003
+PORT_OUT_OFS = 0x004
+PORT_OUTCLR_OFS = 0x005
+PORT_OUTSET_OFS = 0x006
+PORT_OUTTGL_OFS = 0x007
+PORT_IN_OFS = 0x008
+PORT_PMUXEN_OFS = 0x00C
+PORT_PMUXENCLR_OFS = 0x00D
+PORT_PMUXENSET_OFS = 0x00E
+PORT_PINMUX_OFS = 0x010
+PORT_PINCFG_OFS = 0x020
+
+# FPGA port base addresses, keyed by the port number of the board pin tuples
+PORT_BASE_ADDRS = {
+  1: PORT_E_BASE_ADDR,
+  2: PORT_G_BASE_ADDR,
+  3: PORT_Z_BASE_ADDR,
+}
+
+# Initialize I2C. The arbiter keeps the bus locked for the CSR traffic
+# and shares it with user devices, see aloriumtech.busio.I2C. Every CSR
+# transaction below goes through it
+if _LINUX_HOST:
+  i2c1 = linux_i2c.LinuxI2C()
+else:
+  i2c1 = busio.I2C(board.SCL_1, board.SDA_1, frequency=100000)
+if _LINUX_HOST:
+  bus = arbiter.I2CArbiter(i2c1, batched=True, lock=i2c1.lock)
+else:
+  bus = arbiter.I2CArbiter(i2c1)
 
 _buffer = bytearray(4)
 
 def send_evo_write_trans(addr, data):
   # Write to the Evo address
   struct.pack_into("<I", _buffer, 0, addr)
-  i2c1.writeto(0x08, bytes([0x20 | _buffer[1], _buffer[0], data[0], data[1], data[2], data[3]]), stop=False)
+  bus.csr_write(bytes([0x20 | _buffer[1], _buffer[0], data[0], data[1], data[2], data[3]]))
 
 def send_evo_read_trans(addr):
   result = bytearray(4)
   struct.pack_into("<I", _buffer, 0, addr)
-  # Write a read request for the Evo address
-  i2c1.writeto(0x08, bytes([0x20 | _buffer[1], _buffer[0]]), stop=False)
-  # Read the requested data back
-  i2c1.readfrom_into(0x08, result)
-  return result
\ No newline at end of file
+  # Write a read request for the Evo address and read the data back
+  bus.csr_read(bytes([0x20 | _buffer[1], _buffer[0]]), result)
+  return result
+
+_info_buffer = bytearray(4)
+
+def read_evo_info(info_addr):
+  # The info register is indirect: select the field, then read it back
+  struct.pack_into("<I", _info_buffer, 0, info_addr)
+  send_evo_write_trans(EVO_INFO_ADDR, _info_buffer)
+  return send_evo_read_trans(EVO_INFO_ADDR)
+
+_word_buffer = bytearray(4)
+
+def send_evo_write_word(addr, value):
+  # Write a 32 bit integer to the Evo address
+  struct.pack_into("<I", _word_buffer, 0, value)
+  send_evo_write_trans(addr, _word_buffer)
+
+def send_evo_read_word(addr):
+  # Read the Evo address back as a 32 bit integer
+  return struct.unpack("<I", send_evo_read_trans(addr))[0]
+
+def claim_d2f_pin(bit, output):
+  # Hand the D pin at bit over to the SAMD, with the FPGA side direction
+  # set for a SAMD output or input
+  send_evo_write_word(D2F_ENSET_ADDR, 1 << bit)
+  send_evo_write_word(D2F_DIRSET_ADDR if output else D2F_DIRCLR_ADDR, 1 << bit)
+
+def release_d2f_pin(bit):
+  # Give the D pin at bit back to the FPGA
+  send_evo_write_word(D2F_ENCLR_ADDR, 1 << bit)
+
+_frame = bytearray(6)
+
+def send_evo_write_block(addr, data):
+  # Write the 32 bit words of data to consecutive Evo addresses starting at
+  # addr. One frame is reused for every word so a block costs no allocations
+  frame = _frame
+  for i in range(0, len(data), 4):
+    word_addr = addr + (i >> 2)
+    frame[0] = 0x20 | ((word_addr >> 8) & 0xFF)
+    frame[1] = word_addr & 0xFF
+    frame[2] = data[i]
+    frame[3] = data[i + 1]
+    frame[4] = data[i + 2]
+    frame[5] = data[i + 3]
+    bus.csr_write(frame)
+
+_request = bytearray(2)
+
+def send_evo_read_block(addr, data):
+  # Read consecutive Evo addresses starting at addr into the 32 bit words
+  # of data, without allocating
+  request = _request
+  for i in range(0, len(data), 4):
+    word_addr = addr + (i >> 2)
+    request[0] = 0x20 | ((word_addr >> 8) & 0xFF)
+    request[1] = word_addr & 0xFF
+    bus.csr_read(request, data, start=i, end=i + 4)
+
+# Snapshot of the D2F and port configuration, see snapshot()
+SNAPSHOT_MAGIC = b"EVOS"
+_SNAPSHOT_VERSION = 2
+_SNAPSHOT_HEADER = "<4sBBH"
+_SNAPSHOT_HEADER_SIZE = 8
+# Per port: DIR, OUT and PMUXEN, then PINMUX00..15 and PINCFG00..31, which
+# are contiguous and move as one block
+_SNAPSHOT_PORT_REGS = (PORT_DIR_OFS, PORT_OUT_OFS, PORT_PMUXEN_OFS)
+_SNAPSHOT_PIN_SIZE = 4 * (PORT_E_PINCFG31_ADDR - PORT_E_PINMUX00_ADDR + 1)
+# Every port block of the FPGA, the D and F ports included
+_SNAPSHOT_PORTS = (PORT_D_BASE_ADDR, PORT_E_BASE_ADDR, PORT_F_BASE_ADDR,
+                   PORT_G_BASE_ADDR, PORT_Z_BASE_ADDR)
+
+def snapshot():
+  # Capture D2F_EN/DIR and the DIR/OUT/PMUXEN/PINMUX/PINCFG registers of
+  # every port block, D to Z, into a compact blob for restore(). The blob
+  # is plain bytes and can be kept in RAM or written to a file
+  ports = _SNAPSHOT_PORTS
+  port_size = 4 * len(_SNAPSHOT_PORT_REGS) + _SNAPSHOT_PIN_SIZE
+  blob = bytearray(_SNAPSHOT_HEADER_SIZE + 8 + len(ports) * port_size)
+  struct.pack_into(_SNAPSHOT_HEADER, blob, 0, SNAPSHOT_MAGIC, _SNAPSHOT_VERSION, len(ports), 0)
+  view = memoryview(blob)
+  offset = _SNAPSHOT_HEADER_SIZE
+  send_evo_read_block(D2F_EN_ADDR, view[offset:offset + 4])
+  send_evo_read_block(D2F_DIR_ADDR, view[offset + 4:offset + 8])
+  offset += 8
+  for base in ports:
+    for reg in _SNAPSHOT_PORT_REGS:
+      send_evo_read_block(base + reg, view[offset:offset + 4])
+      offset += 4
+    send_evo_read_block(base + PORT_PINMUX_OFS, view[offset:offset + _SNAPSHOT_PIN_SIZE])
+    offset += _SNAPSHOT_PIN_SIZE
+  return blob
+
+def _restore_word(addr, view, offset, from_reset):
+  if from_reset and not (view[offset] | view[offset + 1] | view[offset + 2] | view[offset + 3]):
+    return 0
+  send_evo_write_block(addr, view[offset:offset + 4])
+  return 1
+
+def _restore_run(addr, view, start, end, from_reset):
+  # Write the words of view[start:end] to consecutive addresses. After a
+  # reset only the runs of non-zero words need to go out
+  if not from_reset:
+    send_evo_write_block(addr, view[start:end])
+    return (end - start) >> 2
+  writes = 0
+  run = None
+  for i in range(start, end + 4, 4):
+    zero = i == end or not (view[i] | view[i + 1] | view[i + 2] | view[i + 3])
+    if zero and run is not None:
+      send_evo_write_block(addr + ((run - start) >> 2), view[run:i])
+      writes += (i - run) >> 2
+      run = None
+    elif not zero and run is None:
+      run = i
+  return writes
+
+def restore(blob, *, from_reset=False):
+  # Write a snapshot() blob back and return the number of registers written.
+  # from_reset skips registers whose saved value is zero, for use right
+  # after the FPGA has been configured. That relies on a freshly loaded
+  # image holding every captured register at zero, as the SAMD PORT block
+  # these registers mirror does; a register with another reset value must
+  # be written again by its driver
+  magic, version, count, _ = struct.unpack_from(_SNAPSHOT_HEADER, blob, 0)
+  ports = _SNAPSHOT_PORTS
+  if magic != SNAPSHOT_MAGIC or version != _SNAPSHOT_VERSION or count != len(ports):
+    raise ValueError("Not an Evo configuration snapshot")
+  view = memoryview(blob)
+  d2f = _SNAPSHOT_HEADER_SIZE
+  offset = d2f + 8
+  writes = 0
+  for base in ports:
+    pins = offset + 4 * len(_SNAPSHOT_PORT_REGS)
+    writes += _restore_run(base + PORT_PINMUX_OFS, view, pins, pins + _SNAPSHOT_PIN_SIZE, from_reset)
+    # Outputs before directions so pins do not glitch
+    writes += _restore_word(base + PORT_PMUXEN_OFS, view, offset + 8, from_reset)
+    writes += _restore_word(base + PORT_OUT_OFS, view, offset + 4, from_reset)
+    writes += _restore_word(base + PORT_DIR_OFS, view, offset, from_reset)
+    offset = pins + _SNAPSHOT_PIN_SIZE
+  writes += _restore_word(D2F_EN_ADDR, view, d2f, from_reset)
+  writes += _restore_word(D2F_DIR_ADDR, view, d2f + 4, from_reset)
+  return writes
+
+_fifo_queue = bytearray(0)
+
+def send_evo_write_fifo(addr, data):
+  # Write the 32 bit words of data to the single Evo address addr, for FIFO
+  # style registers. A short last word is padded with zeros. The CSR
+  # interface takes one word per 6 byte write transaction, so the frames
+  # are prepared in one buffer, kept for the next call, and handed to the
+  # bus together: back to back transactions on the SAMD, multi-message
+  # ioctls on a Linux host
+  global _fifo_queue
+  length = len(data)
+  size = ((length + 3) >> 2) * EVO_FRAME_SIZE
+  if len(_fifo_queue) < size:
+    _fifo_queue = bytearray(size)
+  queue = _fifo_queue
+  high = 0x20 | ((addr >> 8) & 0xFF)
+  low = addr & 0xFF
+  offset = 0
+  for i in range(0, length, 4):
+    queue[offset] = high
+    queue[offset + 1] = low
+    for j in range(4):
+      queue[offset + 2 + j] = data[i + j] if i + j < length else 0
+    offset += EVO_FRAME_SIZE
+  bus.csr_write_many(queue, EVO_FRAME_SIZE, end=size)
+
+# Write frames can be prepared ahead in a queue and sent in one go
+EVO_FRAME_SIZE = 6
+
+def pack_evo_write_frame(queue, offset, addr, value):
+  # Prepare a write of the 32 bit value to the Evo address at queue[offset]
+  queue[offset] = 0x20 | ((addr >> 8) & 0xFF)
+  queue[offset + 1] = addr & 0xFF
+  struct.pack_into("<I", queue, offset + 2, value)
+
+def send_evo_write_queue(queue, count):
+  # Send the first count frames prepared in queue
+  bus.csr_write_many(queue, EVO_FRAME_SIZE, end=count * EVO_FRAME_SIZE)
+
+if _LINUX_HOST:
+  # The kernel runs several transactions in one ioctl, so the block write
+  # is redefined to hand it whole batches
+  def send_evo_write_block(addr, data):
+    count = len(data) >> 2
+    queue = bytearray(count * EVO_FRAME_SIZE)
+    for i in range(count):
+      word_addr = addr + i
+      offset = i * EVO_FRAME_SIZE
+      queue[offset] = 0x20 | ((word_addr >> 8) & 0xFF)
+      queue[offset + 1] = word_addr & 0xFF
+      queue[offset + 2:offset + 6] = data[4 * i:4 * i + 4]
+    bus.csr_write_many(queue, EVO_FRAME_SIZE)
+
+  # Likewise the block read, as write and read pairs
+  def send_evo_read_block(addr, data):
+    count = len(data) >> 2
+    requests = bytearray(2 * count)
+    for i in range(count):
+      word_addr = addr + i
+      requests[2 * i] = 0x20 | ((word_addr >> 8) & 0xFF)
+      requests[2 * i + 1] = word_addr & 0xFF
+    bus.csr_read_many(requests, 2, data, 4)
+
+  # Host programs may be multithreaded. The module buffers are shared and
+  # some operations take several transactions, so each runs under the
+  # transport lock
+  send_evo_write_trans = i2c1.serialized(send_evo_write_trans)
+  send_evo_read_trans = i2c1.serialized(send_evo_read_trans)
+  read_evo_info = i2c1.serialized(read_evo_info)
+  send_evo_write_word = i2c1.serialized(send_evo_write_word)
+  send_evo_read_word = i2c1.serialized(send_evo_read_word)
+  claim_d2f_pin = i2c1.serialized(claim_d2f_pin)
+  release_d2f_pin = i2c1.serialized(release_d2f_pin)
+  send_evo_write_block = i2c1.serialized(send_evo_write_block)
+  send_evo_read_block = i2c1.serialized(send_evo_read_block)
+  snapshot = i2c1.serialized(snapshot)
+  restore = i2c1.serialized(restore)
+  send_evo_write_fifo = i2c1.serialized(send_evo_write_fifo)
+  send_evo_write_queue = i2c1.serialized(send_evo_write_queue)
@@ -0,0 +1,39 @@
+"""
+`_pacing`
+========================================================
+Copyright 2020 Alorium Technology. All rights reserved.
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This file is part of the Alorium Technology CiricuitPython Library Bundle
+and provides the fixed rate slots behind the ``tick()`` methods of the
+frame engine, the matrix scanners and the software PWM scheduler.
+
+"""
+import time
+
+class Paced:
+
+  """Mixin for objects driven by ``tick()`` from the main loop at a fixed
+  rate. Slots that have already passed are counted in ``dropped``, not
+  made up."""
+
+  def _pace(self, period):
+    # period is the slot length in nanoseconds
+    self._period = period
+    self._next = None
+    self.dropped = 0
+
+  def _due(self):
+    # True when the next slot has come, which then moves on a slot
+    now = time.monotonic_ns()
+    if self._next is None:
+      self._next = now
+    if now < self._next:
+      return False
+    late = (now - self._next) // self._period
+    self.dropped += late
+    self._next += (late + 1) * self._period
+    return True
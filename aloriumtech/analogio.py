@@ -0,0 +1,206 @@
+"""
+`analogio`
+========================================================
+Copyright 2020 Alorium Technology. All rights reserved.
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This file is part of the Alorium Technology CiricuitPython Library Bundle
+and provides a custom CircuitPython analogio library for Evo M51.
+
+The analog pins are routed through the FPGA like the D pins, so the
+D2F_EN bit of a pin has to be set before the SAMD can use it. The classes
+here do that and then hand the pin to the native ``analogio``::
+
+  from aloriumtech import analogio, board
+
+  sensor = analogio.AnalogIn(board.A0)
+  print(sensor.value)
+
+:py:class:`Sampler` reads several channels round-robin into a
+preallocated ``array('H')``, with optional oversampling, for logging::
+
+  sampler = analogio.Sampler((board.A0, board.A1, board.A2), oversample=4)
+  for block in sampler.stream(32, interval=0.01):
+    log(block)
+
+"""
+import time
+from array import array
+
+import analogio
+
+from aloriumtech import _evo
+
+class AnalogIn:
+
+  """Read analog voltage levels
+
+  :param pin: the Evo pin to read from, e.g. ``board.A0``"""
+
+  def __init__(self, pin):
+    if isinstance(pin[1], int):
+      raise ValueError("E, G and Z pins have no analog input")
+    self._evo_pin = pin
+    _evo.claim_d2f_pin(pin[0], False)
+    self._analog = analogio.AnalogIn(pin[1])
+
+  def deinit(self):
+    """Turn off the AnalogIn and release the pin for other use."""
+    self._analog.deinit()
+    _evo.release_d2f_pin(self._evo_pin[0])
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exception_type, exception_value, traceback):
+    self.deinit()
+
+  @property
+  def value(self):
+    """The value on the analog pin between 0 and 65535 inclusive (16-bit)."""
+    return self._analog.value
+
+  @property
+  def reference_voltage(self):
+    """The maximum voltage measurable, usually 3.3 volts."""
+    return self._analog.reference_voltage
+
+class AnalogOut:
+
+  """Output analog values on a DAC pin
+
+  :param pin: the Evo pin to output to, e.g. ``board.A0``"""
+
+  def __init__(self, pin):
+    if isinstance(pin[1], int):
+      raise ValueError("E, G and Z pins have no analog output")
+    self._evo_pin = pin
+    _evo.claim_d2f_pin(pin[0], True)
+    self._analog = analogio.AnalogOut(pin[1])
+
+  def deinit(self):
+    """Turn off the AnalogOut and release the pin for other use."""
+    self._analog.deinit()
+    _evo.release_d2f_pin(self._evo_pin[0])
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exception_type, exception_value, traceback):
+    self.deinit()
+
+  @property
+  def value(self):
+    """The value on the analog pin between 0 and 65535 inclusive (16-bit).
+    Write only."""
+    raise AttributeError("value is write only")
+
+  @value.setter
+  def value(self, value):
+    self._analog.value = value
+
+class Sampler:
+
+  """Round-robin acquisition of several analog channels
+
+  A round reads every channel once, in the order given, and stores one
+  value per channel. With ``oversample`` above 1 each value is the mean of
+  that many readings, taken back to back, which lowers the noise at the
+  cost of sample rate.
+
+  :param pins: the Evo pins to read
+  :param int oversample: readings averaged into each stored value"""
+
+  def __init__(self, pins, *, oversample=1):
+    if oversample < 1:
+      raise ValueError("oversample must be at least 1")
+    self._inputs = [AnalogIn(pin) for pin in pins]
+    self._readers = [analog._analog for analog in self._inputs]
+    self.oversample = oversample
+    # Averages over a power of two are a shift
+    self._shift = None
+    if oversample & (oversample - 1) == 0:
+      self._shift = len(bin(oversample)) - 3
+    self._block = None
+
+  @property
+  def channels(self):
+    """Number of channels in a round"""
+    return len(self._inputs)
+
+  def deinit(self):
+    """Release every pin."""
+    for analog in self._inputs:
+      analog.deinit()
+    self._inputs = []
+    self._readers = []
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exception_type, exception_value, traceback):
+    self.deinit()
+
+  def buffer(self, rounds):
+    """Return an ``array('H')`` with room for ``rounds`` rounds."""
+    return array("H", [0] * (rounds * len(self._readers)))
+
+  def read_into(self, buffer, *, interval=0):
+    """Fill ``buffer`` with rounds of readings. Value ``i`` of the buffer
+    comes from channel ``i % channels``.
+
+    :param array buffer: an ``array('H')`` whose length is a multiple of
+      `channels`
+    :param float interval: seconds from the start of one round to the next,
+      0 to read as fast as possible
+    :return: seconds taken
+    :rtype: float"""
+    readers = self._readers
+    channels = len(readers)
+    oversample = self.oversample
+    shift = self._shift
+    period = int(interval * 1000000000)
+    monotonic_ns = time.monotonic_ns
+    start = monotonic_ns()
+    deadline = start
+    for offset in range(0, len(buffer) - channels + 1, channels):
+      if period:
+        while monotonic_ns() < deadline:
+          pass
+        deadline += period
+      for i in range(channels):
+        reader = readers[i]
+        if oversample == 1:
+          buffer[offset + i] = reader.value
+          continue
+        total = 0
+        for _ in range(oversample):
+          total += reader.value
+        if shift is not None:
+          buffer[offset + i] = total >> shift
+        else:
+          buffer[offset + i] = total // oversample
+    return (monotonic_ns() - start) / 1000000000
+
+  def stream(self, rounds, *, interval=0, blocks=None):
+    """Yield blocks of ``rounds`` rounds for as long as the caller keeps
+    iterating, or ``blocks`` times.
+
+    The same ``array('H')`` is refilled for every block, so nothing is
+    allocated while streaming; copy or write out a block before asking for
+    the next one.
+
+    :param int rounds: rounds per block
+    :param float interval: seconds from the start of one round to the next
+    :param int blocks: number of blocks, None for no end"""
+    if self._block is None or len(self._block) != rounds * len(self._readers):
+      self._block = self.buffer(rounds)
+    block = self._block
+    count = 0
+    while blocks is None or count < blocks:
+      self.read_into(block, interval=interval)
+      yield block
+      count += 1
@@ -0,0 +1,278 @@
+"""
+`arbiter`
+========================================================
+Copyright 2020 Alorium Technology. All rights reserved.
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This file is part of the Alorium Technology CiricuitPython Library Bundle
+and provides arbitration of the SCL_1/SDA_1 I2C bus between the Evo CSR
+traffic and user devices sharing the bus.
+
+The arbiter owns the physical bus and keeps its lock for good. Clients get
+a logical lock instead, handed out by priority, and the transfer methods
+of a client raise unless it holds that lock.
+
+Work queued with ``submit`` runs in priority order as soon as the bus is
+free: on the submit call itself when nobody holds the lock, otherwise
+when the holder unlocks, and before a lock request of a less urgent
+client is granted. Each job runs holding the lock of the client that
+submitted it, so it can use devices on that client.
+
+CSR transactions go through :py:meth:`I2CArbiter.csr_write` and
+:py:meth:`I2CArbiter.csr_read`. They run at `PRIORITY_CSR`: they do not
+take the logical lock and always go ahead, between the transactions of
+whichever client holds it. Each is a single, complete I2C transaction.
+For that reason clients refuse ``writeto(..., stop=False)``, which would
+leave a transaction open for the CSR traffic to cut into; use
+``writeto_then_readfrom`` instead.
+
+On a Linux host the Evo may be used from several threads. The arbiter is
+then given the transport lock, and its queues and owner only change
+while that lock is held.
+
+"""
+import time
+
+# Priorities, lower runs first
+PRIORITY_CSR = 0
+PRIORITY_HIGH = 1
+PRIORITY_NORMAL = 2
+PRIORITY_BACKGROUND = 3
+
+_LEVELS = 4
+
+# I2C address of the Evo CSR interface
+CSR_ADDRESS = 0x08
+
+class _NoLock:
+  # Stands in for the lock of a transport used from one thread only
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exception_type, exception_value, traceback):
+    return False
+
+class I2CArbiter:
+
+  """Owner of a physical I2C bus shared by several clients"""
+
+  def __init__(self, i2c, *, batched=False, lock=None):
+    """Take over ``i2c`` and lock it for the lifetime of the arbiter.
+
+    :param ~busio.I2C i2c: the physical bus
+    :param bool batched: ``i2c`` runs a write and a read as one transfer
+      with ``writeto_then_readfrom`` and several writes as one with
+      ``writeto_many``, like ``aloriumtech.linux_i2c.LinuxI2C``
+    :param lock: reentrant lock held while the queues and the owner
+      change, and while jobs run, when the bus is used from several
+      threads. Without one the arbiter is for a single thread."""
+    while not i2c.try_lock():
+      pass
+    self.i2c = i2c
+    self._batched = batched
+    self._lock = _NoLock() if lock is None else lock
+    self._owner = None
+    self._running = False
+    self._queues = [[] for _ in range(_LEVELS)]
+
+  def client(self, *, priority=PRIORITY_NORMAL):
+    """Create a client of the bus for a user device. The client has the
+    ``busio.I2C`` API, so it can be passed to
+    :class:`~adafruit_bus_device.i2c_device.I2CDevice`.
+
+    :param int priority: priority of the client's lock requests and work
+    :rtype: ArbitratedI2C"""
+    return ArbitratedI2C(self, priority)
+
+  def owns(self, owner):
+    """True when ``owner`` holds the logical lock"""
+    return self._owner is owner
+
+  def acquire(self, owner, priority=PRIORITY_NORMAL):
+    """Grab the logical lock for ``owner``. Queued work more urgent than
+    ``priority`` runs first. Fails while another owner holds the lock.
+
+    :return: True when the lock has been grabbed
+    :rtype: bool"""
+    with self._lock:
+      if self._owner is not None:
+        return self._owner is owner
+      self._run(priority)
+      self._owner = owner
+      return True
+
+  def release(self, owner):
+    """Release the logical lock held by ``owner`` and run the queued
+    work. Inside a job the lock stays with the job until it returns."""
+    with self._lock:
+      if self._owner is owner and not self._running:
+        self._owner = None
+        self._run(_LEVELS)
+
+  def submit(self, function, *args, priority=PRIORITY_NORMAL, owner=None):
+    """Queue ``function(*args)`` to run holding the lock of ``owner``, the
+    arbiter itself by default. It runs at once when the bus is free.
+    Exceptions of the job are raised by the call that ran it.
+
+    :param int priority: PRIORITY_CSR, PRIORITY_HIGH, PRIORITY_NORMAL or
+      PRIORITY_BACKGROUND"""
+    with self._lock:
+      self._queues[priority].append((function, args, owner))
+      if self._owner is None:
+        self._run(_LEVELS)
+
+  @property
+  def pending(self):
+    """The number of queued jobs"""
+    return sum(len(queue) for queue in self._queues)
+
+  def _run(self, levels, deadline=None):
+    # Run the queued jobs of priority below levels, each holding the lock
+    # of its owner. CSR work is not cut short by the deadline. Called with
+    # the lock held
+    if self._running:
+      return 0
+    count = 0
+    self._running = True
+    try:
+      for level in range(levels):
+        queue = self._queues[level]
+        while queue:
+          if deadline is not None and level != PRIORITY_CSR and time.monotonic() >= deadline:
+            return count
+          function, args, owner = queue.pop(0)
+          self._owner = self if owner is None else owner
+          try:
+            function(*args)
+          finally:
+            self._owner = None
+          count += 1
+    finally:
+      self._running = False
+    return count
+
+  def service(self, *, budget=0.005):
+    """Run queued work, most urgent first, when the bus is free. Work left
+    queued while the bus was held normally runs on the next unlock; this
+    runs it in time slices instead.
+
+    CSR work always runs to completion; other work stops once ``budget``
+    seconds have been used and the rest stays queued for the next call.
+
+    :param float budget: time slice in seconds
+    :return: the number of jobs run
+    :rtype: int"""
+    with self._lock:
+      if self._owner is not None:
+        return 0
+      return self._run(_LEVELS, time.monotonic() + budget)
+
+  def csr_write(self, buffer, *, start=0, end=None):
+    """Write ``buffer[start:end]`` to the Evo CSR interface, whoever holds
+    the lock"""
+    if end is None:
+      end = len(buffer)
+    self.i2c.writeto(CSR_ADDRESS, buffer, start=start, end=end, stop=False)
+
+  def csr_write_many(self, buffer, size, *, start=0, end=None):
+    """Write ``buffer[start:end]`` to the Evo CSR interface as consecutive
+    ``size`` byte transactions"""
+    if end is None:
+      end = len(buffer)
+    if self._batched:
+      self.i2c.writeto_many(CSR_ADDRESS, buffer, size, start=start, end=end)
+      return
+    i2c = self.i2c
+    for offset in range(start, end, size):
+      i2c.writeto(CSR_ADDRESS, buffer, start=offset, end=offset + size, stop=False)
+
+  def csr_read(self, request, buffer, *, start=0, end=None):
+    """Send the read ``request`` to the Evo CSR interface and read the
+    reply into ``buffer[start:end]``, whoever holds the lock"""
+    if end is None:
+      end = len(buffer)
+    if self._batched:
+      self.i2c.writeto_then_readfrom(CSR_ADDRESS, request, buffer, in_start=start, in_end=end)
+      return
+    self.i2c.writeto(CSR_ADDRESS, request, stop=False)
+    self.i2c.readfrom_into(CSR_ADDRESS, buffer, start=start, end=end)
+
+  def csr_read_many(self, requests, size, buffer, width, *, start=0, end=None):
+    """Send each ``size`` byte read request of ``requests`` to the Evo CSR
+    interface and read its ``width`` byte reply into ``buffer[start:end]``,
+    whoever holds the lock"""
+    if end is None:
+      end = len(buffer)
+    if self._batched:
+      self.i2c.writeto_then_readfrom_many(CSR_ADDRESS, requests, size, buffer, width, in_start=start, in_end=end)
+      return
+    i2c = self.i2c
+    offset = 0
+    for i in range(start, end, width):
+      i2c.writeto(CSR_ADDRESS, requests, start=offset, end=offset + size, stop=False)
+      i2c.readfrom_into(CSR_ADDRESS, buffer, start=i, end=i + width)
+      offset += size
+
+
+class ArbitratedI2C:
+
+  """Client of an :py:class:`I2CArbiter` with the ``busio.I2C`` API"""
+
+  def __init__(self, arbiter, priority):
+    self._arbiter = arbiter
+    self._i2c = arbiter.i2c
+    self.priority = priority
+
+  def deinit(self):
+    """Release the lock. The physical bus stays with the arbiter."""
+    self._arbiter.release(self)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exception_type, exception_value, traceback):
+    self.deinit()
+
+  def try_lock(self):
+    """Attempts to grab the shared bus. Returns True on success.
+
+    :return: True when lock has been grabbed
+    :rtype: bool"""
+    return self._arbiter.acquire(self, self.priority)
+
+  def unlock(self):
+    """Releases the shared bus."""
+    self._arbiter.release(self)
+
+  def submit(self, function, *args):
+    """Queue ``function(*args)`` at this client's priority, to run holding
+    this client's lock."""
+    self._arbiter.submit(function, *args, priority=self.priority, owner=self)
+
+  def _check_lock(self):
+    if not self._arbiter.owns(self):
+      raise RuntimeError("Function requires lock")
+
+  def scan(self):
+    self._check_lock()
+    return self._i2c.scan()
+
+  def readfrom_into(self, address, buffer, **kwargs):
+    self._check_lock()
+    self._i2c.readfrom_into(address, buffer, **kwargs)
+
+  def writeto(self, address, buffer, *, stop=True, **kwargs):
+    # CSR traffic may go out between two calls, so a transaction can not
+    # be left open for a following read
+    if not stop:
+      raise ValueError("stop=False is not supported on the shared bus, use writeto_then_readfrom")
+    self._check_lock()
+    self._i2c.writeto(address, buffer, **kwargs)
+
+  def writeto_then_readfrom(self, address, out_buffer, in_buffer, **kwargs):
+    self._check_lock()
+    self._i2c.writeto_then_readfrom(address, out_buffer, in_buffer, **kwargs)
@@ -8,21 +8,191 @@ This file is part of the Alorium Technology CiricuitPython Library Bundle
 and provides a custom CircuitPython busio library for Evo M51.
 """
 
+import board
 import busio
 import struct
 
+try:
+  import asyncio as _asyncio
+except ImportError:
+  _asyncio = None
+
 from aloriumtech import _evo
+from aloriumtech import arbiter
 from aloriumtech import digitalio
 
+# TWCR bits of the AVR style TWI block
+_TWINT = 0x80
+_TWEA = 0x40
+_TWSTA = 0x20
+_TWSTO = 0x10
+_TWEN = 0x04
+
+# TWSR status codes, prescaler bits masked off
+_TW_START = 0x08
+_TW_REP_START = 0x10
+_TW_MT_SLA_ACK = 0x18
+_TW_MT_DATA_ACK = 0x28
+_TW_MR_SLA_ACK = 0x40
+_TW_MR_DATA_ACK = 0x50
+_TW_MR_DATA_NACK = 0x58
+_TW_NO_INFO = 0xF8
+
+# Clock feeding the TWI bit rate generator
+_TWI_CLOCK = 32000000
+
+# Status polls before a TWI operation is declared stuck
+_TWI_POLLS = 100
+
+# errno values raised like the native busio.I2C
+_EIO = 5
+_ENODEV = 19
+_ETIMEDOUT = 110
+
+class _TWI:
+
+  """I2C controller on the FPGA TWI block.
+
+  Every step of a transfer costs one TWCR write and one TWSR read; TWDR is
+  only touched for data bytes. TWSR reads ``0xF8`` while the block is busy,
+  so polling it alone replaces the usual TWCR/TWINT poll plus status read."""
+
+  def __init__(self, scl, sda, *, frequency=400000, twi=_evo.EVO_TWCR_ADDR):
+    self._twcr = twi
+    self._twdr = twi + (_evo.EVO_TWDR_ADDR - _evo.EVO_TWCR_ADDR)
+    self._twsr = twi + (_evo.EVO_TWSR_ADDR - _evo.EVO_TWCR_ADDR)
+    self._twbr = twi + (_evo.EVO_TWBR_ADDR - _evo.EVO_TWCR_ADDR)
+    self._scl = scl
+    self._sda = sda
+    self._locked = False
+
+    # Hand the port pins over to the TWI block
+    for pin in (scl, sda):
+      base = _evo.PORT_BASE_ADDRS[pin[1]]
+      _evo.send_evo_write_word(base + _evo.PORT_PMUXENSET_OFS, 1 << pin[0])
+
+    # SCL = clock / (16 + 2 * TWBR) with the prescaler at 1
+    twbr = (_TWI_CLOCK // frequency - 16) // 2
+    if twbr < 0:
+      twbr = 0
+    elif twbr > 255:
+      twbr = 255
+    _evo.send_evo_write_word(self._twsr, 0)
+    _evo.send_evo_write_word(self._twbr, twbr)
+    _evo.send_evo_write_word(self._twcr, _TWEN)
+
+  def deinit(self):
+    _evo.send_evo_write_word(self._twcr, 0)
+    for pin in (self._scl, self._sda):
+      base = _evo.PORT_BASE_ADDRS[pin[1]]
+      _evo.send_evo_write_word(base + _evo.PORT_PMUXENCLR_OFS, 1 << pin[0])
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exception_type, exception_value, traceback):
+    self.deinit()
+
+  def try_lock(self):
+    if self._locked:
+      return False
+    self._locked = True
+    return True
+
+  def unlock(self):
+    self._locked = False
+
+  def _command(self, twcr):
+    # Start an operation and return its status once the block is done
+    _evo.send_evo_write_word(self._twcr, twcr)
+    for _ in range(_TWI_POLLS):
+      status = _evo.send_evo_read_word(self._twsr) & 0xF8
+      if status != _TW_NO_INFO:
+        return status
+    self._stop()
+    raise OSError(_ETIMEDOUT)
+
+  def _stop(self):
+    _evo.send_evo_write_word(self._twcr, _TWINT | _TWSTO | _TWEN)
+
+  def _start(self, address, read):
+    status = self._command(_TWINT | _TWSTA | _TWEN)
+    if status != _TW_START and status != _TW_REP_START:
+      self._stop()
+      raise OSError(_EIO)
+    _evo.send_evo_write_word(self._twdr, (address << 1) | read)
+    status = self._command(_TWINT | _TWEN)
+    if status != (_TW_MR_SLA_ACK if read else _TW_MT_SLA_ACK):
+      self._stop()
+      raise OSError(_ENODEV)
+
+  def _write(self, buffer, start, end):
+    for i in range(start, end):
+      _evo.send_evo_write_word(self._twdr, buffer[i])
+      if self._command(_TWINT | _TWEN) != _TW_MT_DATA_ACK:
+        self._stop()
+        raise OSError(_EIO)
+
+  def _read(self, buffer, start, end):
+    last = end - 1
+    for i in range(start, end):
+      if i == last:
+        expected = _TW_MR_DATA_NACK
+        twcr = _TWINT | _TWEN
+      else:
+        expected = _TW_MR_DATA_ACK
+        twcr = _TWINT | _TWEA | _TWEN
+      if self._command(twcr) != expected:
+        self._stop()
+        raise OSError(_EIO)
+      buffer[i] = _evo.send_evo_read_word(self._twdr) & 0xFF
+
+  def scan(self):
+    found = []
+    for address in range(0x08, 0x78):
+      try:
+        self._start(address, 0)
+      except OSError:
+        continue
+      self._stop()
+      found.append(address)
+    return found
+
+  def writeto(self, address, buffer, *, start=0, end=None, stop=True):
+    if end is None:
+      end = len(buffer)
+    self._start(address, 0)
+    self._write(buffer, start, end)
+    if stop:
+      self._stop()
+
+  def readfrom_into(self, address, buffer, *, start=0, end=None):
+    if end is None:
+      end = len(buffer)
+    self._start(address, 1)
+    self._read(buffer, start, end)
+    self._stop()
+
+  def writeto_then_readfrom(self, address, out_buffer, in_buffer, *, out_start=0, out_end=None, in_start=0, in_end=None):
+    if out_end is None:
+      out_end = len(out_buffer)
+    if in_end is None:
+      in_end = len(in_buffer)
+    self._start(address, 0)
+    self._write(out_buffer, out_start, out_end)
+    # Repeated start, no stop in between
+    self._start(address, 1)
+    self._read(in_buffer, in_start, in_end)
+    self._stop()
+
+
 class I2C:
 
   """Two wire serial protocol"""
-  _I2C = None
+  __slots__ = ("_I2C", "_scl", "_sda")
   _buffer = bytearray(4)
-  _scl = None
-  _sda = None
 
-  def __init__(self, scl, sda, *, frequency=400000, timeout=255):
+  def __init__(self, scl, sda, *, frequency=400000, timeout=255, twi=_evo.EVO_TWCR_ADDR, priority=arbiter.PRIORITY_NORMAL):
 
     """I2C is a two-wire protocol for communicating between devices.  At the
     physical level it consists of 2 wires: SCL and SDA, the clock and data
@@ -40,55 +210,83 @@ class I2C:
     :param ~microcontroller.Pin sda: The data pin
     :param int frequency: The clock frequency in Hertz
     :param int timeout: The maximum clock stretching timeut - (used only for bitbangio.I2C; ignored for busio.I2C)
+    :param int twi: CSR address of the TWCR register of the FPGA TWI block used
+      when ``scl`` and ``sda`` are FPGA port pins (E, G or Z)
+    :param int priority: priority on the shared SCL_1/SDA_1 bus, one of the
+      ``aloriumtech.arbiter`` PRIORITY constants
 
     .. note:: On the nRF52840, only one I2C object may be created,
        except on the Circuit Playground Bluefruit, which allows two,
-       one for the onboard accelerometer, and one for offboard use."""
+       one for the onboard accelerometer, and one for offboard use.
 
-    # Make FPGA calls to allow the SAMD to control the scl pin
-    data = 1 << scl[0]
-    struct.pack_into("<I", self._buffer, 0, data)
-    addr = _evo.D2F_ENSET_ADDR
-    _evo.send_evo_write_trans(addr, self._buffer)
+    .. note:: FPGA port pins have no SAMD SERCOM behind them. The bus is then
+       run by the FPGA TWI block, without using up a SERCOM::
 
-    self._scl = scl
+         i2c = busio.I2C(board.E0, board.E1)
 
-    # Make FPGA calls to allow the SAMD to control the sda pin
-    data = 1 << sda[0]
-    struct.pack_into("<I", self._buffer, 0, data)
-    addr = _evo.D2F_ENSET_ADDR
-    _evo.send_evo_write_trans(addr, self._buffer)
+    .. note:: SCL_1/SDA_1 also carry the Evo CSR traffic. That bus is owned by
+       the ``_evo`` arbiter and this object becomes a client of it, so a
+       sensor can share the bus with the FPGA. ``frequency`` is then fixed
+       by the arbiter. The CSR traffic goes ahead between the transactions
+       of whoever holds the lock, so ``writeto(..., stop=False)`` raises
+       ValueError there; use `writeto_then_readfrom` for a write followed
+       by a read."""
 
+    self._scl = scl
     self._sda = sda
 
-    self._I2C = busio.I2C(self._scl[1], self._sda[1], frequency=frequency, timeout=timeout)
+    if scl[1] is board.SCL_1 and sda[1] is board.SDA_1:
+      self._I2C = _evo.bus.client(priority=priority)
+    elif isinstance(scl[1], int):
+      self._I2C = _TWI(scl, sda, frequency=frequency, twi=twi)
+    else:
+      # Make FPGA calls to allow the SAMD to control the scl pin
+      data = 1 << scl[0]
+      struct.pack_into("<I", self._buffer, 0, data)
+      addr = _evo.D2F_ENSET_ADDR
+      _evo.send_evo_write_trans(addr, self._buffer)
+
+      # Make FPGA calls to allow the SAMD to control the sda pin
+      data = 1 << sda[0]
+      struct.pack_into("<I", self._buffer, 0, data)
+      addr = _evo.D2F_ENSET_ADDR
+      _evo.send_evo_write_trans(addr, self._buffer)
+
+      self._I2C = busio.I2C(self._scl[1], self._sda[1], frequency=frequency, timeout=timeout)
 
+  def deinit(self):
     """Releases control of the underlying hardware so other classes can use it."""
-    self.deinit = self._I2C.deinit
+    self._I2C.deinit()
 
+  def __enter__(self):
     """No-op used in Context Managers."""
-    self.__enter__ = self._I2C.__enter__
+    return self
 
+  def __exit__(self, exception_type, exception_value, traceback):
     """Automatically deinitializes the hardware on context exit. See
     :ref:`lifetime-and-contextmanagers` for more info."""
-    self.__exit__ = self._I2C.__exit__
+    self.deinit()
 
+  def scan(self):
     """Scan all I2C addresses between 0x08 and 0x77 inclusive and return a
     list of those that respond.
 
     :return: List of device ids on the I2C bus
     :rtype: list"""
-    self.scan = self._I2C.scan
+    return self._I2C.scan()
 
+  def try_lock(self):
     """Attempts to grab the I2C lock. Returns True on success.
 
     :return: True when lock has been grabbed
     :rtype: bool"""
-    self.try_lock = self._I2C.try_lock
+    return self._I2C.try_lock()
 
+  def unlock(self):
     """Releases the I2C lock."""
-     self.unlock = self._I2C.unlock
+    self._I2C.unlock()
 
+  def readfrom_into(self, address, buffer, *, start=0, end=None):
     """Read into ``buffer`` from the slave specified by ``address``.
     The number of bytes read will be the length of ``buffer``.
     At least one byte must be read.
@@ -101,8 +299,11 @@ class I2C:
     :param bytearray buffer: buffer to write into
     :param int start: Index to start writing at
     :param int end: Index to write up to but not include. Defaults to ``len(buffer)``"""
-    self.readfrom_into = self._I2C.readfrom_into
+    if end is None:
+      end = len(buffer)
+    self._I2C.readfrom_into(address, buffer, start=start, end=end)
 
+  def writeto(self, address, buffer, *, start=0, end=None, stop=True):
     """Write the bytes from ``buffer`` to the slave specified by ``address``.
     Transmits a stop bit when stop is True. Setting stop=False is deprecated and stop will be
     removed in CircuitPython 6.x. Use `writeto_then_readfrom` when needing a write, no stop and
@@ -121,8 +322,14 @@ class I2C:
     :param int end: Index to read up to but not include. Defaults to ``len(buffer)``
     :param bool stop: If true, output an I2C stop condition after the buffer is written.
                       Deprecated. Will be removed in 6.x and act as stop=True."""
-    self.writeto = self._I2C.writeto
+    if end is None:
+      end = len(buffer)
+    if stop:
+      self._I2C.writeto(address, buffer, start=start, end=end)
+    else:
+      self._I2C.writeto(address, buffer, start=start, end=end, stop=False)
 
+  def writeto_then_readfrom(self, address, out_buffer, in_buffer, *, out_start=0, out_end=None, in_start=0, in_end=None):
     """Write the bytes from ``out_buffer`` to the slave specified by ``address``, generate no stop
     bit, generate a repeated start and read into ``in_buffer``. ``out_buffer`` and
     ``in_buffer`` can be the same buffer because they are used sequentially.
@@ -138,15 +345,18 @@ class I2C:
     :param int out_end: Index to read up to but not include. Defaults to ``len(buffer)``
     :param int in_start: Index to start writing at
     :param int in_end: Index to write up to but not include. Defaults to ``len(buffer)``"""
-    self.writeto_then_readfrom = self._I2C.writeto_then_readfrom
+    if out_end is None:
+      out_end = len(out_buffer)
+    if in_end is None:
+      in_end = len(in_buffer)
+    self._I2C.writeto_then_readfrom(address, out_buffer, in_buffer, out_start=out_start, out_end=out_end, in_start=in_start, in_end=in_end)
 
 
 class OneWire:
 
   """Lowest-level of the Maxim OneWire protocol"""
-  _onewire = None
+  __slots__ = ("_onewire", "_pin")
   _buffer = bytearray(4)
-  _pin = None
 
   def __init__(self, pin):
     """(formerly Dallas Semi) OneWire protocol.
@@ -181,24 +391,77 @@ class OneWire:
 
     self._onewire = busio.OneWire(pin[1])
 
+  def deinit(self):
     """Deinitialize the OneWire bus and release any hardware resources for reuse."""
-    self.deinit = self._onewire.deinit
+    self._onewire.deinit()
 
+  def __enter__(self):
     """No-op used by Context Managers."""
-    self.__enter__ = self._onewire.__enter__
+    return self
 
+  def __exit__(self, exception_type, exception_value, traceback):
     """Automatically deinitializes the hardware when exiting a context. See
     :ref:`lifetime-and-contextmanagers` for more info."""
-    self.__exit__ = self._onewire.__exit__
+    self.deinit()
 
+  def reset(self):
     """Reset the OneWire bus and read presence
 
     :returns: False when at least one device is present
     :rtype: bool"""
-    self.reset = self._onewire.reset
+    return self._onewire.reset()
 
+  def write_bit(self, value):
     """Write out a bit based on value."""
-    self.write_bit = self._onewire.write_bit
+    self._onewire.write_bit(value)
+
+  def read_bit(self):
+    """Read in a bit
+
+    :returns: bit state read
+    :rtype: bool"""
+    return self._onewire.read_bit()
+
+  def read_byte(self):
+    """Read a byte, least significant bit first."""
+    read_bit = self._onewire.read_bit
+    value = 0
+    for i in range(8):
+      if read_bit():
+        value |= 1 << i
+    return value
+
+  def write_byte(self, value):
+    """Write a byte, least significant bit first."""
+    write_bit = self._onewire.write_bit
+    for i in range(8):
+      write_bit((value >> i) & 1)
+
+  def readinto(self, buffer, *, start=0, end=None):
+    """Read into ``buffer[start:end]``.
+
+    :param bytearray buffer: buffer to read into"""
+    if end is None:
+      end = len(buffer)
+    read_bit = self._onewire.read_bit
+    for index in range(start, end):
+      value = 0
+      for i in range(8):
+        if read_bit():
+          value |= 1 << i
+      buffer[index] = value
+
+  def write(self, buffer, *, start=0, end=None):
+    """Write ``buffer[start:end]``.
+
+    :param bytearray buffer: buffer containing the bytes to write"""
+    if end is None:
+      end = len(buffer)
+    write_bit = self._onewire.write_bit
+    for index in range(start, end):
+      value = buffer[index]
+      for i in range(8):
+        write_bit((value >> i) & 1)
 
 
 class SPI:
@@ -213,11 +476,8 @@ class SPI:
   select line. (This is common because multiple slaves can share the `!clock`,
   `!MOSI` and `!MISO` lines and therefore the hardware.)"""
 
-  _SPI = None
+  __slots__ = ("_SPI", "_clock", "_MOSI", "_MISO", "_config")
   _buffer = bytearray(4)
-  _clock = None
-  _MOSI = None
-  _MISO = None
 
   def __init__(self, clock, MOSI=None, MISO=None):
 
@@ -250,7 +510,10 @@ class SPI:
     addr = _evo.D2F_DIRSET_ADDR
     _evo.send_evo_write_trans(addr, self._buffer)
 
-    _clock = clock
+    self._clock = clock
+    self._MOSI = None
+    self._MISO = None
+    self._config = None
 
     if (MOSI != None):
 
@@ -263,7 +526,7 @@ class SPI:
         addr = _evo.D2F_DIRSET_ADDR
         _evo.send_evo_write_trans(addr, self._buffer)
 
-      _MOSI = MOSI
+      self._MOSI = MOSI
 
     if (MISO != None):
 
@@ -276,67 +539,51 @@ class SPI:
         addr = _evo.D2F_DIRCLR_ADDR
         _evo.send_evo_write_trans(addr, self._buffer)
 
-      _MISO = MISO
+      self._MISO = MISO
 
     # Need to handle each possible combination separately
     if (MOSI == None and MISO == None):
-      self._SPI = busio.SPI(_clock[1])
+      self._SPI = busio.SPI(self._clock[1])
     elif (MOSI == None and MISO != None):
-      self._SPI = busio.SPI(_clock[1], MISO=_MISO[1])
+      self._SPI = busio.SPI(self._clock[1], MISO=self._MISO[1])
     elif (MOSI != None and MISO == None):
-      self._SPI = busio.SPI(_clock[1], MOSI=_MOSI[1])
+      self._SPI = busio.SPI(self._clock[1], MOSI=self._MOSI[1])
     else:
-      self._SPI = busio.SPI(_clock[1], _MOSI[1], _MISO[1])
-
-    self.frequency = self._SPI.frequency
+      self._SPI = busio.SPI(self._clock[1], self._MOSI[1], self._MISO[1])
 
+  def __enter__(self):
     """No-op used by Context Managers.
     Provided by context manager helper."""
-    self.__enter__ = self._SPI.__enter__
+    return self
 
+  def __exit__(self, exception_type, exception_value, traceback):
     """Automatically deinitializes the hardware when exiting a context. See
     :ref:`lifetime-and-contextmanagers` for more info."""
-    self.__exit__ = self._SPI.__exit__
-
-    """Configures the SPI bus. The SPI object must be locked.
-
-    :param int baudrate: the desired clock rate in Hertz. The actual clock rate may be higher or lower
-      due to the granularity of available clock settings.
-      Check the `frequency` attribute for the actual clock rate.
-    :param int polarity: the base state of the clock line (0 or 1)
-    :param int phase: the edge of the clock that data is captured. First (0)
-      or second (1). Rising or falling depends on clock polarity.
-    :param int bits: the number of bits per word
-
-    .. note:: On the SAMD21, it is possible to set the baudrate to 24 MHz, but that
-       speed is not guaranteed to work. 12 MHz is the next available lower speed, and is
-       within spec for the SAMD21.
-
-    .. note:: On the nRF52840, these baudrates are available: 125kHz, 250kHz, 1MHz, 2MHz, 4MHz,
-      and 8MHz.
-      If you pick a a baudrate other than one of these, the nearest lower
-      baudrate will be chosen, with a minimum of 125kHz.
-      Two SPI objects may be created, except on the Circuit Playground Bluefruit,
-      which allows only one (to allow for an additional I2C object)."""
-    self.configure = self._SPI.configure
+    self.deinit()
 
+  def try_lock(self):
     """Attempts to grab the SPI lock. Returns True on success.
 
     :return: True when lock has been grabbed
     :rtype: bool"""
-    self.try_lock = self._SPI.try_lock
+    return self._SPI.try_lock()
 
+  def unlock(self):
     """Releases the SPI lock."""
-    self.unlock = self._SPI.unlock
+    self._SPI.unlock()
 
+  def write(self, buffer, *, start=0, end=None):
     """Write the data contained in ``buffer``. The SPI object must be locked.
     If the buffer is empty, nothing happens.
 
     :param bytearray buffer: Write out the data in this buffer
     :param int start: Start of the slice of ``buffer`` to write out: ``buffer[start:end]``
     :param int end: End of the slice; this index is not included. Defaults to ``len(buffer)``"""
-    self.write = self._SPI.write
+    if end is None:
+      end = len(buffer)
+    self._SPI.write(buffer, start=start, end=end)
 
+  def readinto(self, buffer, *, start=0, end=None, write_value=0):
     """Read into ``buffer`` while writing ``write_value`` for each byte read.
     The SPI object must be locked.
     If the number of bytes to read is 0, nothing happens.
@@ -345,8 +592,11 @@ class SPI:
     :param int start: Start of the slice of ``buffer`` to read into: ``buffer[start:end]``
     :param int end: End of the slice; this index is not included. Defaults to ``len(buffer)``
     :param int write_value: Value to write while reading. (Usually ignored.)"""
-    self.readinto = self._SPI.readinto
+    if end is None:
+      end = len(buffer)
+    self._SPI.readinto(buffer, start=start, end=end, write_value=write_value)
 
+  def write_readinto(self, buffer_out, buffer_in, *, out_start=0, out_end=None, in_start=0, in_end=None):
     """Write out the data in ``buffer_out`` while simultaneously reading data into ``buffer_in``.
     The SPI object must be locked.
     The lengths of the slices defined by ``buffer_out[out_start:out_end]`` and ``buffer_in[in_start:in_end]``
@@ -359,7 +609,50 @@ class SPI:
     :param int out_end: End of the slice; this index is not included. Defaults to ``len(buffer_out)``
     :param int in_start: Start of the slice of ``buffer_in`` to read into: ``buffer_in[in_start:in_end]``
     :param int in_end: End of the slice; this index is not included. Defaults to ``len(buffer_in)``"""
-    self.write_readinto = self._SPI.write_readinto
+    if out_end is None:
+      out_end = len(buffer_out)
+    if in_end is None:
+      in_end = len(buffer_in)
+    self._SPI.write_readinto(buffer_out, buffer_in, out_start=out_start, out_end=out_end, in_start=in_start, in_end=in_end)
+
+  def configure(self, *, baudrate=100000, polarity=0, phase=0, bits=8):
+
+    """Configures the SPI bus. The SPI object must be locked.
+
+    :param int baudrate: the desired clock rate in Hertz. The actual clock rate may be higher or lower
+      due to the granularity of available clock settings.
+      Check the `frequency` attribute for the actual clock rate.
+    :param int polarity: the base state of the clock line (0 or 1)
+    :param int phase: the edge of the clock that data is captured. First (0)
+      or second (1). Rising or falling depends on clock polarity.
+    :param int bits: the number of bits per word
+
+    .. note:: On the SAMD21, it is possible to set the baudrate to 24 MHz, but that
+       speed is not guaranteed to work. 12 MHz is the next available lower speed, and is
+       within spec for the SAMD21.
+
+    .. note:: On the nRF52840, these baudrates are available: 125kHz, 250kHz, 1MHz, 2MHz, 4MHz,
+      and 8MHz.
+      If you pick a a baudrate other than one of these, the nearest lower
+      baudrate will be chosen, with a minimum of 125kHz.
+      Two SPI objects may be created, except on the Circuit Playground Bluefruit,
+      which allows only one (to allow for an additional I2C object).
+
+    The settings are remembered and the hardware is only reconfigured when
+    they change, so drivers that configure before every transaction cost
+    nothing extra when they are the only device on the bus."""
+    config = self._config
+    if (config is not None and config[0] == baudrate and config[1] == polarity
+        and config[2] == phase and config[3] == bits):
+      return
+    self._SPI.configure(baudrate=baudrate, polarity=polarity, phase=phase, bits=bits)
+    self._config = (baudrate, polarity, phase, bits)
+
+  @property
+  def frequency(self):
+    """The actual SPI bus frequency. This may not match the frequency requested
+    due to internal limitations."""
+    return self._SPI.frequency
 
   def deinit(self,):
 
@@ -367,35 +660,34 @@ class SPI:
 
     # Make FPGA calls to clear clock, mosi, and miso pins
 
-    data = 1 << _clock[0]
+    data = 1 << self._clock[0]
     struct.pack_into("<I", self._buffer, 0, data)
     addr = _evo.D2F_DIRCLR_ADDR
     _evo.send_evo_write_trans(addr, self._buffer)
 
-    if (_MOSI != None):
+    if (self._MOSI != None):
 
-      data = 1 << _MOSI[0]
+      data = 1 << self._MOSI[0]
       struct.pack_into("<I", self._buffer, 0, data)
       addr = _evo.D2F_DIRCLR_ADDR
       _evo.send_evo_write_trans(addr, self._buffer)
 
-    if (_MISO != None):
+    if (self._MISO != None):
 
-      data = 1 << _MISO[0]
+      data = 1 << self._MISO[0]
       struct.pack_into("<I", self._buffer, 0, data)
       addr = _evo.D2F_DIRCLR_ADDR
       _evo.send_evo_write_trans(addr, self._buffer)
 
+    self._config = None
     self._SPI.deinit()
 
 
 class UART:
 
   """A bidirectional serial protocol"""
-  _UART = None
+  __slots__ = ("_UART", "_tx", "_rx")
   _buffer = bytearray(4)
-  _tx = None
-  _rx = None
 
   def __init__(self, tx, rx, *, baudrate=9600, bits=8, parity=None, stop=1, timeout=1, receiver_buffer_size=64):
 
@@ -436,16 +728,20 @@ class UART:
 
     self._UART = busio.UART(tx[1], rx[1], baudrate=baudrate, bits=bits, parity=parity, stop=stop, timeout=timeout, receiver_buffer_size=receiver_buffer_size)
 
+  def deinit(self):
     """Deinitialises the UART and releases any hardware resources for reuse."""
-    self.deinit = self._UART.deinit
+    self._UART.deinit()
 
+  def __enter__(self):
     """No-op used by Context Managers."""
-    self.__enter__ = self._UART.__enter__
+    return self
 
+  def __exit__(self, exception_type, exception_value, traceback):
     """Automatically deinitializes the hardware when exiting a context. See
     :ref:`lifetime-and-contextmanagers` for more info."""
-    self.__exit__ = self._UART.__exit__
+    self.deinit()
 
+  def read(self, nbytes=None):
     """Read characters.  If ``nbytes`` is specified then read at most that many
     bytes. Otherwise, read everything that arrives until the connection
     times out. Providing the number of bytes expected is highly recommended
@@ -453,39 +749,88 @@ class UART:
 
     :return: Data read
     :rtype: bytes or None"""
-    self.read = self._UART.read
+    return self._UART.read(nbytes)
 
+  def readinto(self, buf):
     """Read bytes into the ``buf``. Read at most ``len(buf)`` bytes.
 
     :return: number of bytes read and stored into ``buf``
     :rtype: int or None (on a non-blocking error)
 
     *New in CircuitPython 4.0:* No length parameter is permitted."""
-    self.readinto = self._UART.readinto
+    return self._UART.readinto(buf)
 
+  def readline(self):
     """Read a line, ending in a newline character.
 
     :return: the line read
     :rtype: int or None"""
-    self.readline = self._UART.readline
+    return self._UART.readline()
 
+  def write(self, buf):
     """Write the buffer of bytes to the bus.
 
     *New in CircuitPython 4.0:* ``buf`` must be bytes, not a string.
 
     :return: the number of bytes written
     :rtype: int or None"""
-    self.write = self._UART.write
+    return self._UART.write(buf)
+
+  def reset_input_buffer(self):
+    """Discard any unread characters in the input buffer."""
+    self._UART.reset_input_buffer()
 
+  @property
+  def baudrate(self):
     """The current baudrate."""
-    self.baudrate = self._UART.baudrate
+    return self._UART.baudrate
+
+  @baudrate.setter
+  def baudrate(self, baudrate):
+    self._UART.baudrate = baudrate
 
+  @property
+  def in_waiting(self):
     """The number of bytes in the input buffer, available to be read"""
-    self.in_waiting  = self._UART.in_waiting
+    return self._UART.in_waiting
 
+  @property
+  def timeout(self):
     """The current timeout, in seconds (float)."""
-    self.timeout  = self._UART.timeout
-
-    """Discard any unread characters in the input buffer."""
-    self.reset_input_buffer = self._UART.reset_input_buffer
+    return self._UART.timeout
+
+  @timeout.setter
+  def timeout(self, timeout):
+    self._UART.timeout = timeout
+
+  def read_available(self, buffer, *, start=0, end=None):
+    """Read the bytes already in the input buffer into ``buffer[start:end]``
+    without waiting for more, and return how many were read. Returns 0
+    right away when nothing has arrived, whatever the `timeout`.
+
+    :param bytearray buffer: buffer to read into
+    :return: number of bytes read
+    :rtype: int"""
+    if end is None:
+      end = len(buffer)
+    count = min(self._UART.in_waiting, end - start)
+    if count <= 0:
+      return 0
+    result = self._UART.readinto(memoryview(buffer)[start:start + count])
+    return result or 0
+
+  async def read_async(self, buffer, *, start=0, end=None):
+    """Wait for data without blocking other tasks, then read what has
+    arrived like `read_available`.
+
+    :param bytearray buffer: buffer to read into
+    :return: number of bytes read, at least 1
+    :rtype: int"""
+    if _asyncio is None:
+      raise RuntimeError("asyncio is not available")
+    while True:
+      count = self.read_available(buffer, start=start, end=end)
+      if count:
+        return count
+      await _asyncio.sleep(0)
 
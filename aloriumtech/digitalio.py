@@ -52,7 +52,6 @@ class DigitalInOut:
 
     def deinit(self) -> None:
         """Turn off the DigitalInOut and release the pin for other use."""
-        self._mask = pin[0]
         data = 1 << self._mask
         #data = struct.pack("<I", data)
         struct.pack_into("<I", self._buffer, 0, data)
@@ -61,6 +60,7 @@ class DigitalInOut:
         else:
           addr = _evo.D2F_ENCLR_ADDR
           _evo.send_evo_write_trans(addr, self._buffer)
+          self._pin.deinit()
 
     def soft_deinit(self) -> None:
         """Release the SAMD pin control, but do not reset the FPGA. Useful for configuring a pin for use with an existing library."""
@@ -225,3 +225,146 @@ class DigitalInOut:
     def pull(self, pull: Pull = Pull.UP):
       raise TypeError("FPGA pins do not allow for Pull functionality.")
 
+
+
+class ParallelBus:
+    """8080 style parallel bus on an FPGA port
+
+    The data bus sits on ``width`` contiguous bits of an E, G or Z port,
+    starting at ``data0``. A byte (or word) goes out as one write of the
+    whole port OUT register, which puts the data on the bus and pulls WR low
+    at once, followed by one OUTSET that raises WR and latches it. Compared
+    to one :py:class:`DigitalInOut` per data pin that is two CSR writes per
+    byte instead of ten. Buffers are streamed through queued CSR writes.
+
+    Example usage::
+
+      from aloriumtech import board, digitalio
+
+      lcd = digitalio.ParallelBus(board.E0, write=board.E8, dc=board.E9, cs=board.E10)
+      lcd.send(0x2C, pixels)
+
+    The other output bits of the data port are read once per transfer and
+    written back unchanged with every byte, so they must not be changed
+    from elsewhere while a transfer runs."""
+
+    _QUEUE_FRAMES = 32
+
+    def __init__(self, data0, *, width=8, write, dc=None, cs=None):
+        """Create a parallel bus.
+
+        :param data0: The pin of data bit 0, an E, G or Z pin
+        :param int width: The number of data bits, 8 or 16
+        :param write: The WR strobe pin, on an FPGA port
+        :param dc: The data/command pin, low for commands, or None
+        :param cs: The chip select pin, active low, or None"""
+        if not isinstance(data0[1], int) or not isinstance(write[1], int):
+          raise ValueError("Data and WR pins must be E, G or Z pins")
+        if width != 8 and width != 16:
+          raise ValueError("width must be 8 or 16")
+        if data0[0] + width > 32:
+          raise ValueError("Data bus does not fit in the port")
+        self._width = width
+        self._shift = data0[0]
+        self._mask = ((1 << width) - 1) << data0[0]
+        base = _evo.PORT_BASE_ADDRS[data0[1]]
+        self._out_addr = base + _evo.PORT_OUT_OFS
+        wr_base = _evo.PORT_BASE_ADDRS[write[1]]
+        self._wr_bit = 1 << write[0]
+        self._wr_set_addr = wr_base + _evo.PORT_OUTSET_OFS
+        self._wr_clr_addr = wr_base + _evo.PORT_OUTCLR_OFS
+        # WR on the data port goes low together with the data
+        self._wr_shared = wr_base == base
+        self._queue = bytearray(_evo.EVO_FRAME_SIZE * self._QUEUE_FRAMES)
+
+        # Data and WR are outputs, WR idles high
+        _evo.send_evo_write_word(self._wr_set_addr, self._wr_bit)
+        _evo.send_evo_write_word(wr_base + _evo.PORT_DIRSET_OFS, self._wr_bit)
+        _evo.send_evo_write_word(base + _evo.PORT_DIRSET_OFS, self._mask)
+
+        self._dc = None
+        if dc is not None:
+          self._dc = DigitalInOut(dc)
+          self._dc.switch_to_output(value=True)
+        self._cs = None
+        if cs is not None:
+          self._cs = DigitalInOut(cs)
+          self._cs.switch_to_output(value=True)
+
+    def deinit(self) -> None:
+        """Release the control pins and turn the data bus back into inputs."""
+        base = self._out_addr - _evo.PORT_OUT_OFS
+        _evo.send_evo_write_word(base + _evo.PORT_DIRCLR_OFS, self._mask)
+        if self._dc is not None:
+          self._dc.deinit()
+        if self._cs is not None:
+          self._cs.deinit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.deinit()
+
+    def write(self, buffer, *, start=0, end=None) -> None:
+        """Write ``buffer[start:end]`` to the bus. On a 16 bit bus each pair
+        of bytes is one word, most significant byte first.
+
+        :param bytearray buffer: the data to write"""
+        if end is None:
+          end = len(buffer)
+        step = self._width >> 3
+        queue = self._queue
+        frame = _evo.EVO_FRAME_SIZE
+        size = len(queue)
+        shift = self._shift
+        out_addr = self._out_addr
+        wr_bit = self._wr_bit
+        wr_set_addr = self._wr_set_addr
+        wr_clr_addr = self._wr_clr_addr
+        shared = self._wr_shared
+
+        # Bits of the data port that are not ours, with WR low if it is there
+        idle = _evo.send_evo_read_word(out_addr) & ~self._mask
+        if shared:
+          idle &= ~wr_bit
+
+        offset = 0
+        for i in range(start, end, step):
+          if step == 1:
+            value = buffer[i]
+          else:
+            value = (buffer[i] << 8) | buffer[i + 1]
+          _evo.pack_evo_write_frame(queue, offset, out_addr, idle | (value << shift))
+          offset += frame
+          if not shared:
+            _evo.pack_evo_write_frame(queue, offset, wr_clr_addr, wr_bit)
+            offset += frame
+          _evo.pack_evo_write_frame(queue, offset, wr_set_addr, wr_bit)
+          offset += frame
+          if offset + 3 * frame > size:
+            _evo.send_evo_write_queue(queue, offset // frame)
+            offset = 0
+        if offset:
+          _evo.send_evo_write_queue(queue, offset // frame)
+
+    def send(self, command, data=None) -> None:
+        """Send ``command`` with DC low, then ``data`` with DC high, all with
+        the chip selected.
+
+        :param int command: the command byte or word
+        :param bytearray data: the parameters or pixel data, or None"""
+        if self._cs is not None:
+          self._cs.value = False
+        if self._dc is not None:
+          self._dc.value = False
+        if self._width == 8:
+          self.write(bytes((command & 0xFF,)))
+        else:
+          self.write(bytes(((command >> 8) & 0xFF, command & 0xFF)))
+        if self._dc is not None:
+          self._dc.value = True
+        if data:
+          self.write(data)
+        if self._cs is not None:
+          self._cs.value = True
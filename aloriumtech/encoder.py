@@ -0,0 +1,268 @@
+"""
+`encoder`
+========================================================
+Copyright 2020 Alorium Technology. All rights reserved.
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This file is part of the Alorium Technology CiricuitPython Library Bundle
+and provides quadrature encoder and pulse counting on the E, G and Z FPGA
+ports.
+
+Every encoder and pulse input on a port is sampled with one read of the
+port IN register, and all channels are decoded together with bitwise
+operations on that 32 bit word::
+
+  from aloriumtech import board, encoder
+
+  knobs = encoder.Decoder(((board.E0, board.E1), (board.E2, board.E3)),
+                          pulses=(board.E8,))
+  while True:
+    knobs.sample()
+    print(knobs.position(0), knobs.position(1), knobs.pulses[0])
+
+When the FPGA image carries a quadrature Xcelerator Block the counting is
+done by the block and :py:meth:`Decoder.sample` only reads its counters.
+
+"""
+import struct
+from array import array
+
+from aloriumtech import _evo
+from aloriumtech import xb
+
+@xb.register
+class QuadratureBlock(xb.XceleratorBlock):
+
+  """Driver of the quadrature decoder Xcelerator Block.
+
+  Each channel samples two port pins in the fabric and keeps a signed
+  32 bit count of quadrature steps, or of rising edges on its A pin when it
+  has no B pin. The counts sit at consecutive CSRs and are read as one
+  block, so the block never misses an edge between reads."""
+
+  XB_ID = 0x51454E43
+  CAPABILITIES = ("quadrature",)
+  CHANNELS = 8
+
+  # CSRs, relative to the block's csr_base. They are written directly, in
+  # order, so that a channel is set up and cleared before any write a
+  # caller's register.batch() holds back
+  _CLEAR_ADDR = 0x00
+  _ENABLE_ADDR = 0x01
+  _SELECT_ADDR = 0x02
+  _PINS_ADDR = 0x03
+  _COUNT_ADDR = 0x10
+
+  # B pin value of a pulse counting channel
+  _NO_PIN = 0xFF
+
+  def __init__(self, slot, xb_id):
+    super().__init__(slot, xb_id)
+    self._used = 0
+
+  def attach(self, pin_a, pin_b=None):
+    """Give a free channel the pins of an encoder, or a single pulse input
+    when ``pin_b`` is None, and return the channel.
+
+    :raises RuntimeError: when every channel is in use"""
+    for channel in range(self.CHANNELS):
+      if not self._used & (1 << channel):
+        break
+    else:
+      raise RuntimeError("All quadrature Xcelerator Block channels in use")
+    self._used |= 1 << channel
+
+    b = self._NO_PIN if pin_b is None else pin_b[0]
+    base = self.csr_base
+    _evo.send_evo_write_word(base + self._SELECT_ADDR, channel)
+    _evo.send_evo_write_word(base + self._PINS_ADDR, (pin_a[1] << 16) | (b << 8) | pin_a[0])
+    _evo.send_evo_write_word(base + self._ENABLE_ADDR, self._used)
+    self.clear(channel)
+    return channel
+
+  def detach(self, channel):
+    """Stop counting on ``channel`` and free it."""
+    self._used &= ~(1 << channel)
+    _evo.send_evo_write_word(self.csr_base + self._ENABLE_ADDR, self._used)
+
+  def clear(self, channel):
+    """Reset the count of ``channel`` to zero."""
+    _evo.send_evo_write_word(self.csr_base + self._CLEAR_ADDR, 1 << channel)
+
+  def read_counts(self, buffer):
+    """Read the counts of the first ``len(buffer) // 4`` channels into
+    ``buffer`` as little endian signed words."""
+    _evo.send_evo_read_block(self.csr_base + self._COUNT_ADDR, buffer)
+
+class Decoder:
+
+  """Quadrature encoders and pulse counters on one FPGA port
+
+  A step of an encoder is decoded from the previous and the current level
+  of its A and B pins. Of the 16 entries of the usual transition table,
+  those where one pin changed are a step forward when the new A differs
+  from the old B and a step back otherwise, and those where both pins
+  changed are a missed step. With every B pin lined up under its A pin
+  that table becomes a handful of operations on the whole port word, and
+  the per channel loop only runs over channels that moved.
+
+  The B pins must all be the same number of bits away from their A pins,
+  for instance each encoder on a pair of neighbouring pins.
+
+  :param encoders: ``(pin_a, pin_b)`` of each encoder
+  :param pulses: pins whose rising edges are counted
+  :param int divisor: steps per detent used by `position`
+  :param bool hardware: count in the quadrature Xcelerator Block when the
+    FPGA image has one with enough free channels"""
+
+  def __init__(self, encoders=(), pulses=(), *, divisor=4, hardware=True):
+    pins = [pin for pair in encoders for pin in pair] + list(pulses)
+    if not pins:
+      raise ValueError("No encoder or pulse pins given")
+    port = pins[0][1]
+    for pin in pins:
+      if not isinstance(pin[1], int) or pin[1] != port:
+        raise ValueError("Encoder pins must be E, G or Z pins on one port")
+
+    self._a_mask = 0
+    self._offset = 0
+    if encoders:
+      self._offset = encoders[0][1][0] - encoders[0][0][0]
+      for pin_a, pin_b in encoders:
+        if pin_b[0] - pin_a[0] != self._offset:
+          raise ValueError("B pins must sit at the same offset from their A pins")
+        self._a_mask |= 1 << pin_a[0]
+    self._a_bits = array("L", [1 << pin_a[0] for pin_a, _ in encoders])
+    self._pulse_bits = array("L", [1 << pin[0] for pin in pulses])
+    self._pulse_mask = 0
+    for bit in self._pulse_bits:
+      self._pulse_mask |= bit
+    self._mask = 0
+    for pin in pins:
+      self._mask |= 1 << pin[0]
+
+    self.counts = array("l", [0] * len(encoders))
+    self.pulses = array("L", [0] * len(pulses))
+    self.errors = 0
+    self.divisor = divisor
+
+    self._in_addr = _evo.PORT_BASE_ADDRS[port] + _evo.PORT_IN_OFS
+    _evo.send_evo_write_word(_evo.PORT_BASE_ADDRS[port] + _evo.PORT_DIRCLR_OFS, self._mask)
+
+    self._block = None
+    if hardware:
+      self._attach(xb.find("quadrature"), encoders, pulses)
+
+    self._last = _evo.send_evo_read_word(self._in_addr)
+
+  def _attach(self, block, encoders, pulses):
+    # Hand every channel to the block, or none of them
+    if block is None:
+      return
+    channels = []
+    try:
+      for pin_a, pin_b in encoders:
+        channels.append(block.attach(pin_a, pin_b))
+      for pin in pulses:
+        channels.append(block.attach(pin))
+    except RuntimeError:
+      for channel in channels:
+        block.detach(channel)
+      return
+    self._block = block
+    self._channels = channels
+    self._counts = bytearray(4 * (max(channels) + 1))
+
+  def deinit(self):
+    """Free the Xcelerator Block channels, if any."""
+    if self._block is not None:
+      for channel in self._channels:
+        self._block.detach(channel)
+      self._block = None
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exception_type, exception_value, traceback):
+    self.deinit()
+
+  @property
+  def hardware(self):
+    """True when the counting is done by an Xcelerator Block"""
+    return self._block is not None
+
+  def sample(self):
+    """Sample the port once and update `counts`, `pulses` and `errors`.
+    Call it often enough that no pin changes twice between calls.
+
+    With an Xcelerator Block this only copies the block's counts."""
+    if self._block is not None:
+      self._read_block()
+      return
+
+    value = _evo.send_evo_read_word(self._in_addr)
+    last = self._last
+    if not (value ^ last) & self._mask:
+      return
+    self._last = value
+
+    if self._a_bits:
+      mask = self._a_mask
+      offset = self._offset
+      # B pins lined up under the A pins
+      if offset >= 0:
+        b, old_b = value >> offset, last >> offset
+      else:
+        b, old_b = value << -offset, last << -offset
+      changed_a = (value ^ last) & mask
+      changed_b = (b ^ old_b) & mask
+      missed = changed_a & changed_b
+      moved = (changed_a | changed_b) & ~missed
+      forward = moved & (value ^ old_b)
+      if moved | missed:
+        counts = self.counts
+        for i, bit in enumerate(self._a_bits):
+          if forward & bit:
+            counts[i] += 1
+          elif moved & bit:
+            counts[i] -= 1
+          elif missed & bit:
+            self.errors += 1
+
+    rising = value & ~last & self._pulse_mask
+    if rising:
+      pulses = self.pulses
+      for i, bit in enumerate(self._pulse_bits):
+        if rising & bit:
+          pulses[i] += 1
+
+  def _read_block(self):
+    counts = self._counts
+    self._block.read_counts(counts)
+    channels = self._channels
+    encoders = len(self.counts)
+    for i in range(encoders):
+      self.counts[i] = struct.unpack_from("<l", counts, 4 * channels[i])[0]
+    for i in range(len(self.pulses)):
+      self.pulses[i] = struct.unpack_from("<L", counts, 4 * channels[encoders + i])[0]
+
+  def position(self, encoder):
+    """Return the position of ``encoder`` in detents, its count divided by
+    `divisor`.
+
+    :param int encoder: index of the encoder"""
+    return self.counts[encoder] // self.divisor
+
+  def reset(self):
+    """Set every count back to zero."""
+    if self._block is not None:
+      for channel in self._channels:
+        self._block.clear(channel)
+    for i in range(len(self.counts)):
+      self.counts[i] = 0
+    for i in range(len(self.pulses)):
+      self.pulses[i] = 0
+    self.errors = 0
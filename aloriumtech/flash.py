@@ -0,0 +1,314 @@
+"""
+`flash`
+========================================================
+Copyright 2020 Alorium Technology. All rights reserved.
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This file is part of the Alorium Technology CiricuitPython Library Bundle
+and provides programming of the Evo M51 FPGA configuration flash from a
+bitstream file on CIRCUITPY.
+
+The image is streamed a page at a time through the FLASH_APAGE buffer.
+While the flash controller programs one page, the next one is read from
+the filesystem, and the result is checked against the controller's CRC
+instead of reading the image back::
+
+  from aloriumtech import flash
+
+  report = flash.update("/evo_m51.bin", image=1)
+  print(report)
+
+Progress is saved to a journal file every ``checkpoint`` pages, and an
+interrupted update picks up from the last checkpoint. The journal needs
+CIRCUITPY to be writable from code (``storage.remount("/", False)`` in
+boot.py); without it the update still runs but always starts over.
+
+Routine releases usually change a small part of the image.
+:py:func:`delta_update` compares the CRC of every installed page with a
+manifest made on the host by ``tools/evo_flash_manifest.py`` and only
+rewrites the pages that differ::
+
+  report = flash.delta_update("/evo_m51.bin", "/evo_m51.man", image=1)
+
+"""
+import gc
+import os
+import struct
+import time
+
+from aloriumtech import _evo
+from aloriumtech import xb
+
+try:
+  from binascii import crc32 as _crc32
+except ImportError:
+  _crc32 = None
+
+# Bytes in the FLASH_APAGE buffer
+PAGE_SIZE = 128
+
+# FLASH_STS bits
+_STS_BUSY = 0x01
+_STS_ERROR = 0x02
+
+# FLASH_CTL commands, the page number goes in the low 24 bits
+_CTL_ERASE = 0x01000000
+_CTL_PROGRAM = 0x02000000
+_CTL_CRC = 0x03000000
+_CTL_PAGE_CRC = 0x04000000
+_CTL_REWRITE = 0x05000000
+
+# Erased flash reads as 0xFF, the last page is padded to match
+_PAD = 0xFF
+
+# FLASH_STS polls before the controller is declared stuck
+_POLLS = 10000
+
+JOURNAL = "/evo_flash.dat"
+
+# Manifest header: magic, version, page size, pages, image size, image CRC,
+# followed by one little endian CRC-32 per page
+MANIFEST_MAGIC = b"EVOM"
+MANIFEST_VERSION = 1
+_MANIFEST_HEADER = "<4sHHIII"
+_MANIFEST_HEADER_SIZE = struct.calcsize(_MANIFEST_HEADER)
+
+def _software_crc32(data, crc=0):
+  # Bitwise CRC-32, only used when binascii.crc32 is not built in
+  crc ^= 0xFFFFFFFF
+  for byte in data:
+    crc ^= byte
+    for _ in range(8):
+      if crc & 1:
+        crc = (crc >> 1) ^ 0xEDB88320
+      else:
+        crc >>= 1
+  return crc ^ 0xFFFFFFFF
+
+def _mem_free():
+  try:
+    return gc.mem_free()
+  except AttributeError:
+    return 0
+
+def wait(polls=_POLLS):
+  """Wait for the flash controller to finish the current operation.
+
+  :param int polls: number of FLASH_STS reads before giving up
+  :return: the last FLASH_STS value
+  :raises RuntimeError: on a controller error or when it stays busy"""
+  for _ in range(polls):
+    status = _evo.send_evo_read_word(_evo.FLASH_STS_ADDR)
+    if not status & _STS_BUSY:
+      if status & _STS_ERROR:
+        raise RuntimeError("FPGA flash error, status 0x{:08x}".format(status))
+      return status
+  raise RuntimeError("FPGA flash controller timed out")
+
+def crc(pages):
+  """Return the controller's CRC-32 of the first ``pages`` pages of the
+  selected image.
+
+  :param int pages: number of pages to cover"""
+  wait()
+  _evo.send_evo_write_word(_evo.FLASH_CTL_ADDR, _CTL_CRC | pages)
+  wait()
+  return _evo.send_evo_read_word(_evo.FLASH_CRC_ADDR)
+
+def page_crc(page):
+  """Return the controller's CRC-32 of one page of the selected image.
+
+  :param int page: page number"""
+  wait()
+  _evo.send_evo_write_word(_evo.FLASH_CTL_ADDR, _CTL_PAGE_CRC | page)
+  wait()
+  return _evo.send_evo_read_word(_evo.FLASH_CRC_ADDR)
+
+class FlashReport:
+
+  """Outcome of a flash update"""
+
+  def __init__(self, pages, written, seconds, ram, crc):
+    """:param int pages: pages in the image
+    :param int written: pages programmed by this run
+    :param float seconds: time taken
+    :param int ram: heap used by the update, in bytes
+    :param int crc: CRC-32 of the image"""
+    self.pages = pages
+    self.written = written
+    self.seconds = seconds
+    self.ram = ram
+    self.crc = crc
+
+  def __str__(self):
+    return "{}/{} pages in {:.2f} s, {} bytes RAM, CRC 0x{:08x}".format(
+      self.written, self.pages, self.seconds, self.ram, self.crc)
+
+def _load_journal(journal, path, size, image):
+  # Return (next page, running CRC) of an interrupted update of the same file
+  try:
+    with open(journal, "r") as f:
+      fields = f.read().split()
+  except OSError:
+    return 0, 0
+  if len(fields) != 5 or fields[0] != path:
+    return 0, 0
+  if int(fields[1]) != size or int(fields[2]) != image:
+    return 0, 0
+  return int(fields[3]), int(fields[4])
+
+def _save_journal(journal, path, size, image, page, crc):
+  try:
+    with open(journal, "w") as f:
+      f.write("{} {} {} {} {}\n".format(path, size, image, page, crc))
+  except OSError:
+    # CIRCUITPY is read-only to code, resume is not available
+    pass
+
+def _clear_journal(journal):
+  try:
+    os.remove(journal)
+  except OSError:
+    pass
+
+def _read_page(f, buffer):
+  count = f.readinto(buffer)
+  if count is None:
+    count = 0
+  for i in range(count, PAGE_SIZE):
+    buffer[i] = _PAD
+  return count
+
+def update(path, *, image=0, resume=True, checkpoint=32, journal=JOURNAL):
+  """Program the bitstream in ``path`` into FPGA image slot ``image``.
+
+  :param str path: bitstream file on CIRCUITPY
+  :param int image: image slot to program, written to FLASH_IMG
+  :param bool resume: continue an interrupted update of the same file
+  :param int checkpoint: pages between journal updates, 0 to write no
+    journal so that an interrupted update starts over
+  :param str journal: journal file used to resume
+  :return: timing and memory use of the update
+  :rtype: FlashReport
+  :raises RuntimeError: on a flash error or a CRC mismatch
+  :raises ValueError: when ``checkpoint`` is negative"""
+  if checkpoint < 0:
+    raise ValueError("checkpoint must be 0 or more pages")
+  gc.collect()
+  ram_start = _mem_free()
+  ram_low = ram_start
+  start = time.monotonic()
+
+  crc32 = xb.dispatch("crc32", "crc32", _crc32 or _software_crc32)
+
+  size = os.stat(path)[6]
+  pages = (size + PAGE_SIZE - 1) // PAGE_SIZE
+
+  page, running = 0, 0
+  if resume:
+    page, running = _load_journal(journal, path, size, image)
+    if page > pages:
+      page, running = 0, 0
+
+  wait()
+  _evo.send_evo_write_word(_evo.FLASH_IMG_ADDR, image)
+  if page == 0:
+    _evo.send_evo_write_word(_evo.FLASH_CTL_ADDR, _CTL_ERASE)
+
+  first = page
+  buffers = (bytearray(PAGE_SIZE), bytearray(PAGE_SIZE))
+  with open(path, "rb") as f:
+    f.seek(page * PAGE_SIZE)
+    current = 0
+    _read_page(f, buffers[current])
+    while page < pages:
+      buffer = buffers[current]
+      # The previous page (or the erase) must be done before the page
+      # buffer is refilled
+      wait()
+      _evo.send_evo_write_block(_evo.FLASH_APAGE_ADDR, buffer)
+      _evo.send_evo_write_word(_evo.FLASH_CTL_ADDR, _CTL_PROGRAM | page)
+      running = crc32(buffer, running)
+      page += 1
+      # Read the next page while this one is being programmed
+      current ^= 1
+      if page < pages:
+        _read_page(f, buffers[current])
+      if checkpoint and page % checkpoint == 0:
+        # Only journal pages that are known to be programmed
+        wait()
+        ram_low = min(ram_low, _mem_free())
+        _save_journal(journal, path, size, image, page, running)
+
+  ram_low = min(ram_low, _mem_free())
+  check = crc(pages)
+  if check != running:
+    _clear_journal(journal)
+    raise RuntimeError("FPGA flash CRC mismatch, 0x{:08x} != 0x{:08x}".format(check, running))
+  _clear_journal(journal)
+
+  return FlashReport(pages, pages - first, time.monotonic() - start, ram_start - ram_low, running)
+
+def delta_update(path, manifest=None, *, image=0):
+  """Rewrite only the pages of FPGA image slot ``image`` whose CRC differs
+  from the manifest of the bitstream in ``path``.
+
+  Pages that already match are skipped without being read from the file,
+  so an interrupted delta update is resumed by simply running it again.
+
+  :param str path: bitstream file on CIRCUITPY
+  :param str manifest: manifest file, defaults to ``path`` with ``.man``
+    in place of its extension
+  :param int image: image slot to update, written to FLASH_IMG
+  :return: timing and memory use of the update
+  :rtype: FlashReport
+  :raises ValueError: when the manifest does not describe ``path``
+  :raises RuntimeError: on a flash error or a CRC mismatch"""
+  gc.collect()
+  ram_start = _mem_free()
+  start = time.monotonic()
+
+  if manifest is None:
+    manifest = path.rsplit(".", 1)[0] + ".man"
+
+  crc32 = xb.dispatch("crc32", "crc32", _crc32 or _software_crc32)
+
+  size = os.stat(path)[6]
+  header = bytearray(_MANIFEST_HEADER_SIZE)
+  entry = bytearray(4)
+  buffer = bytearray(PAGE_SIZE)
+  written = 0
+
+  wait()
+  _evo.send_evo_write_word(_evo.FLASH_IMG_ADDR, image)
+
+  with open(manifest, "rb") as m, open(path, "rb") as f:
+    m.readinto(header)
+    magic, version, page_size, pages, image_size, image_crc = struct.unpack(_MANIFEST_HEADER, header)
+    if magic != MANIFEST_MAGIC or version != MANIFEST_VERSION:
+      raise ValueError("Not an Evo flash manifest")
+    if page_size != PAGE_SIZE or image_size != size:
+      raise ValueError("Manifest does not match the bitstream")
+
+    for page in range(pages):
+      m.readinto(entry)
+      expected = struct.unpack("<I", entry)[0]
+      if page_crc(page) == expected:
+        continue
+      f.seek(page * PAGE_SIZE)
+      _read_page(f, buffer)
+      if crc32(buffer) != expected:
+        raise ValueError("Manifest does not match the bitstream")
+      _evo.send_evo_write_block(_evo.FLASH_APAGE_ADDR, buffer)
+      _evo.send_evo_write_word(_evo.FLASH_CTL_ADDR, _CTL_REWRITE | page)
+      written += 1
+
+  ram_low = _mem_free()
+  check = crc(pages)
+  if check != image_crc:
+    raise RuntimeError("FPGA flash CRC mismatch, 0x{:08x} != 0x{:08x}".format(check, image_crc))
+
+  return FlashReport(pages, written, time.monotonic() - start, ram_start - ram_low, image_crc)
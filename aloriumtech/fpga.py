@@ -0,0 +1,149 @@
+"""
+`fpga`
+========================================================
+Copyright 2020 Alorium Technology. All rights reserved.
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This file is part of the Alorium Technology CiricuitPython Library Bundle
+and provides control of the images stored in the Evo M51 FPGA
+configuration flash: listing them and switching the FPGA to another one.
+
+A switch keeps the pin setup of the application. A snapshot of the D2F
+and port registers is taken before the FPGA reloads and written back once
+the new image is running, so an application can swap accelerator images
+between phases of its work::
+
+  from aloriumtech import fpga
+
+  print(fpga.images())
+  report = fpga.switch(1)
+  print(report)
+
+"""
+import time
+
+from aloriumtech import _evo
+from aloriumtech import xb
+
+# FCFG_CTL commands, the image slot goes in the low byte
+_CTL_RECONFIG = 0x100
+_CTL_INFO = 0x200
+
+# FCFG_STS bits
+_STS_BUSY = 0x01
+_STS_ERROR = 0x04
+
+# FCFG_DAT of an empty image slot
+_EMPTY = 0xFFFFFFFF
+
+# Image slots in the configuration flash
+MAX_IMAGES = 4
+
+def current():
+  """Return the ID of the image the FPGA is running, from FCFG_CID."""
+  return _evo.send_evo_read_word(_evo.FCFG_CID_ADDR)
+
+def images():
+  """Return the stored images as a list of ``(slot, image ID)`` tuples,
+  leaving out empty slots."""
+  found = []
+  for slot in range(MAX_IMAGES):
+    _evo.send_evo_write_word(_evo.FCFG_CTL_ADDR, _CTL_INFO | slot)
+    image_id = _evo.send_evo_read_word(_evo.FCFG_DAT_ADDR)
+    if image_id != _EMPTY:
+      found.append((slot, image_id))
+  return found
+
+class SwitchReport:
+
+  """Outcome of an image switch"""
+
+  def __init__(self, image, image_id, switch, restore, registers):
+    """:param int image: slot switched to
+    :param int image_id: FCFG_CID after the switch
+    :param float switch: seconds until the new image was running
+    :param float restore: seconds spent re-applying the pin state
+    :param int registers: number of registers re-applied"""
+    self.image = image
+    self.image_id = image_id
+    self.switch = switch
+    self.restore = restore
+    self.registers = registers
+
+  def __str__(self):
+    return "image {} (0x{:08x}) up in {:.1f} ms, {} registers restored in {:.1f} ms".format(
+      self.image, self.image_id, self.switch * 1000, self.registers, self.restore * 1000)
+
+def wait(timeout=2.0, *, reload=False):
+  """Wait for the FPGA to finish loading an image.
+
+  Right after a reload has been triggered the FPGA can still report the
+  old image as not busy, so with ``reload`` the wait only ends once the
+  FPGA has been seen busy, or not answering, and then ready again. The
+  CSR bus is served by the FPGA itself and does not answer while it
+  reloads, so failed polls then count as busy.
+
+  :param float timeout: seconds to wait
+  :param bool reload: a reload has just been triggered
+  :return: the last FCFG_STS value
+  :raises RuntimeError: on a configuration error or a timeout
+  :raises OSError: when the bus fails outside a reload, or still fails at
+    the timeout"""
+  deadline = time.monotonic() + timeout
+  started = not reload
+  error = None
+  while time.monotonic() < deadline:
+    try:
+      status = _evo.send_evo_read_word(_evo.FCFG_STS_ADDR)
+    except OSError as e:
+      if not reload:
+        raise
+      error = e
+      started = True
+      continue
+    error = None
+    if status & _STS_BUSY:
+      started = True
+      continue
+    if not started:
+      continue
+    if status & _STS_ERROR:
+      raise RuntimeError("FPGA configuration error, status 0x{:08x}".format(status))
+    return status
+  if error is not None:
+    # The FPGA never came back, report why the bus failed
+    raise error
+  if not started:
+    raise RuntimeError("FPGA reload did not start")
+  raise RuntimeError("FPGA configuration timed out")
+
+def switch(image, *, restore=True, timeout=2.0):
+  """Reload the FPGA from image slot ``image``.
+
+  :param int image: slot to load
+  :param bool restore: re-apply the D2F and port state afterwards
+  :param float timeout: seconds to wait for the new image
+  :return: latency of the switch and of the restore
+  :rtype: SwitchReport"""
+  state = _evo.snapshot() if restore else None
+
+  start = time.monotonic()
+  _evo.send_evo_write_word(_evo.FLASH_IMG_ADDR, image)
+  _evo.send_evo_write_word(_evo.FCFG_CTL_ADDR, _CTL_RECONFIG | image)
+  wait(timeout, reload=True)
+  loaded = time.monotonic()
+
+  registers = 0
+  if state is not None:
+    # Everything is back at its reset value, only non-zero registers need
+    # to be written
+    registers = _evo.restore(state, from_reset=True)
+  restored = time.monotonic()
+
+  # The new image may carry different Xcelerator Blocks
+  xb.scan(force=True)
+
+  return SwitchReport(image, current(), loaded - start, restored - loaded, registers)
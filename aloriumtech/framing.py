@@ -0,0 +1,328 @@
+"""
+`framing`
+========================================================
+Copyright 2020 Alorium Technology. All rights reserved.
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This file is part of the Alorium Technology CiricuitPython Library Bundle
+and provides packet framing over ``aloriumtech.busio.UART``: SLIP, COBS
+and length prefixed frames.
+
+Received bytes go into one fixed buffer with ``readinto`` and frames are
+decoded in place, so a complete frame comes back as a ``memoryview`` into
+that buffer instead of a new ``bytes`` object::
+
+  from aloriumtech import board, busio, framing
+
+  uart = busio.UART(board.TX, board.RX, baudrate=921600)
+  link = framing.Framer(uart, protocol=framing.COBS)
+  while True:
+    frame = link.read_frame()
+    if frame is not None:
+      handle(frame)
+
+A frame stays valid until the next call to :py:meth:`Framer.read_frame`.
+Only bytes that have already arrived are read, through
+``UART.read_available``. A UART object without it is read with
+``readinto``; give it a short ``timeout``.
+
+"""
+import struct
+
+# Framing protocols
+SLIP = 0
+COBS = 1
+LENGTH = 2
+
+_SLIP_END = 0xC0
+_SLIP_ESC = 0xDB
+_SLIP_ESC_END = 0xDC
+_SLIP_ESC_ESC = 0xDD
+
+class Framer:
+
+  """Frame decoder and encoder for a UART
+
+  Bytes are decoded as they arrive and each byte is looked at once. The
+  decoded part of a frame is written over its encoded bytes, which is
+  possible because decoding never makes a frame longer. When the buffer
+  fills up, the bytes of the frame in progress are moved to its start.
+
+  ``errors`` counts malformed frames and ``overflows`` frames too long for
+  the buffer; both are dropped. An oversized `LENGTH` frame is skipped
+  byte for byte as it arrives, so the frame after it is still found.
+
+  :param uart: ``aloriumtech.busio.UART`` or any object with ``readinto``
+    and ``write``
+  :param int protocol: `SLIP`, `COBS` or `LENGTH`
+  :param int buffer_size: bytes in the receive buffer, the longest encoded
+    frame that can be received
+  :param str length_format: ``struct`` format of the `LENGTH` header"""
+
+  def __init__(self, uart, *, protocol=SLIP, buffer_size=512, length_format="<H"):
+    if protocol not in (SLIP, COBS, LENGTH):
+      raise ValueError("Unknown framing protocol")
+    self._uart = uart
+    self._read_available = getattr(uart, "read_available", None)
+    self._protocol = protocol
+    self._buffer = bytearray(buffer_size)
+    self._view = memoryview(self._buffer)
+    self._tx = None
+    self._length_format = length_format
+    self._header = struct.calcsize(length_format)
+    # Frame start, decode position, decoded end and end of received data
+    self._start = 0
+    self._read = 0
+    self._write = 0
+    self._end = 0
+    # SLIP escape pending, frame being dropped up to its delimiter, COBS
+    # bytes left in the block and zero owed at its end
+    self._escape = False
+    self._drop = False
+    self._left = 0
+    self._zero = False
+    # Bytes of an oversized LENGTH frame still to be skipped
+    self._skip = 0
+    self.errors = 0
+    self.overflows = 0
+
+  def _reset_frame(self, start):
+    self._start = start
+    self._read = start
+    self._write = start
+    self._escape = False
+    self._drop = False
+    self._left = 0
+    self._zero = False
+
+  def _fill(self):
+    # Make room at the end by moving the frame in progress to the start,
+    # then read what the UART has
+    buffer = self._buffer
+    if self._drop or self._start == self._end:
+      # Nothing worth keeping, start over at the front
+      self._start = self._read = self._write = self._end = 0
+    elif self._end == len(buffer):
+      start = self._start
+      if start == 0:
+        # A frame that fills the whole buffer can not be completed, drop
+        # the rest of it as it arrives
+        self.overflows += 1
+        self._reset_frame(0)
+        self._end = 0
+        self._drop = True
+        return 0
+      keep = self._end - start
+      buffer[0:keep] = self._view[start:self._end]
+      self._read -= start
+      self._write -= start
+      self._start = 0
+      self._end = keep
+    if self._read_available is not None:
+      count = self._read_available(buffer, start=self._end)
+    else:
+      count = self._uart.readinto(self._view[self._end:])
+    if count:
+      self._end += count
+      return count
+    return 0
+
+  def read_frame(self):
+    """Return the next complete frame as a memoryview, or None when no
+    complete frame has arrived yet. The previous frame is given up."""
+    while True:
+      frame = self._decode()
+      if frame is not None:
+        return frame
+      if not self._fill():
+        return None
+
+  def frames(self):
+    """Yield frames for as long as complete ones are available."""
+    frame = self.read_frame()
+    while frame is not None:
+      yield frame
+      frame = self.read_frame()
+
+  def _decode(self):
+    if self._protocol == SLIP:
+      return self._decode_slip()
+    if self._protocol == COBS:
+      return self._decode_cobs()
+    return self._decode_length()
+
+  def _decode_slip(self):
+    buffer = self._buffer
+    r = self._read
+    w = self._write
+    end = self._end
+    escape = self._escape
+    while r < end:
+      byte = buffer[r]
+      r += 1
+      if byte == _SLIP_END:
+        start = self._start
+        skip = self._drop or w == start
+        self._reset_frame(r)
+        escape = False
+        if skip:
+          # Rest of a malformed frame, or END bytes used as a line flush
+          w = r
+          continue
+        return self._view[start:w]
+      if self._drop:
+        continue
+      if escape:
+        escape = False
+        if byte == _SLIP_ESC_END:
+          byte = _SLIP_END
+        elif byte == _SLIP_ESC_ESC:
+          byte = _SLIP_ESC
+        else:
+          # Drop the frame up to the next END
+          self.errors += 1
+          self._drop = True
+          continue
+      elif byte == _SLIP_ESC:
+        escape = True
+        continue
+      buffer[w] = byte
+      w += 1
+    self._read = r
+    self._write = w
+    self._escape = escape
+    return None
+
+  def _decode_cobs(self):
+    buffer = self._buffer
+    r = self._read
+    w = self._write
+    end = self._end
+    left = self._left
+    zero = self._zero
+    while r < end:
+      byte = buffer[r]
+      r += 1
+      if byte == 0:
+        start = self._start
+        skip = self._drop or w == start
+        self._reset_frame(r)
+        if left:
+          # The last block is short
+          self.errors += 1
+        if left or skip:
+          w = r
+          left = 0
+          zero = False
+          continue
+        return self._view[start:w]
+      if self._drop:
+        continue
+      if left == 0:
+        if zero:
+          buffer[w] = 0
+          w += 1
+        left = byte - 1
+        zero = byte != 0xFF
+      else:
+        buffer[w] = byte
+        w += 1
+        left -= 1
+    self._read = r
+    self._write = w
+    self._left = left
+    self._zero = zero
+    return None
+
+  def _decode_length(self):
+    header = self._header
+    while True:
+      start = self._start
+      available = self._end - start
+      if self._skip:
+        # Skip the frame as it arrives, the next header follows it
+        count = min(self._skip, available)
+        self._skip -= count
+        self._reset_frame(start + count)
+        if self._skip:
+          return None
+        continue
+      if available < header:
+        return None
+      length = struct.unpack_from(self._length_format, self._buffer, start)[0]
+      if header + length > len(self._buffer):
+        # Can never fit
+        self.overflows += 1
+        self._skip = header + length
+        continue
+      if available < header + length:
+        return None
+      self._reset_frame(start + header + length)
+      return self._view[start + header:start + header + length]
+
+  def _tx_buffer(self, size):
+    if self._tx is None or len(self._tx) < size:
+      self._tx = bytearray(size)
+    return self._tx
+
+  def write_frame(self, payload):
+    """Encode ``payload`` and write it to the UART. The encoding buffer is
+    kept and only grows, so repeated writes of similar frames do not
+    allocate.
+
+    :param bytearray payload: the frame contents
+    :return: number of bytes written
+    :rtype: int"""
+    length = len(payload)
+    if self._protocol == SLIP:
+      out = self._tx_buffer(2 * length + 2)
+      w = 0
+      out[w] = _SLIP_END
+      w += 1
+      for byte in payload:
+        if byte == _SLIP_END:
+          out[w] = _SLIP_ESC
+          out[w + 1] = _SLIP_ESC_END
+          w += 2
+        elif byte == _SLIP_ESC:
+          out[w] = _SLIP_ESC
+          out[w + 1] = _SLIP_ESC_ESC
+          w += 2
+        else:
+          out[w] = byte
+          w += 1
+      out[w] = _SLIP_END
+      w += 1
+    elif self._protocol == COBS:
+      out = self._tx_buffer(length + length // 254 + 2)
+      code_at = 0
+      code = 1
+      w = 1
+      for byte in payload:
+        if byte == 0:
+          out[code_at] = code
+          code_at = w
+          code = 1
+          w += 1
+          continue
+        out[w] = byte
+        w += 1
+        code += 1
+        if code == 0xFF:
+          out[code_at] = code
+          code_at = w
+          code = 1
+          w += 1
+      out[code_at] = code
+      out[w] = 0
+      w += 1
+    else:
+      header = self._header
+      out = self._tx_buffer(header + length)
+      struct.pack_into(self._length_format, out, 0, length)
+      out[header:header + length] = payload
+      w = header + length
+    return self._uart.write(memoryview(out)[:w])
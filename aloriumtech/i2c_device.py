@@ -0,0 +1,259 @@
+"""
+`i2c_device`
+========================================================
+Copyright 2020 Alorium Technology. All rights reserved.
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This file is part of the Alorium Technology CiricuitPython Library Bundle
+and provides an I2C device helper for ``aloriumtech.busio.I2C`` in the
+style of adafruit_bus_device, with a cache of the device's registers.
+
+Configuration registers only change when the driver writes them, so
+registers declared cacheable are read over the bus once and then served
+from memory, and read-modify-write updates of them cost only the write.
+Writes grouped in :py:meth:`I2CDevice.batch` go out as one multi-byte
+write per run of consecutive registers; outside a batch every register
+write is a transaction of its own::
+
+  from aloriumtech import board, busio
+  from aloriumtech.i2c_device import I2CDevice
+
+  i2c = busio.I2C(board.SCL, board.SDA)
+  sensor = I2CDevice(i2c, 0x68, cacheable=range(0x19, 0x1D))
+  with sensor.batch():
+    sensor.write_register(0x1A, 0x03)
+    sensor.write_register(0x1B, 0x18)
+  sensor.update_bits(0x1C, 0x18, 0x08)
+  sensor.read_registers(0x3B, samples)
+
+Registers not declared cacheable are volatile and always read from the
+device. The device must step its register address after each byte of a
+multi-byte access, as most sensors do.
+
+"""
+
+class I2CDevice:
+
+  """An I2C device with a register cache
+
+  :param ~aloriumtech.busio.I2C i2c: the bus
+  :param int device_address: 7 bit device address
+  :param cacheable: register addresses whose contents only change when
+    written through this object
+  :param bool probe: check that the device answers"""
+
+  def __init__(self, i2c, device_address, *, cacheable=(), probe=True):
+    self.i2c = i2c
+    self.device_address = device_address
+    self._cache = bytearray(256)
+    # One bit per register: cacheable, holding a valid copy, pending write
+    self._cacheable = bytearray(32)
+    self._valid = bytearray(32)
+    self._pending = bytearray(32)
+    self._depth = 0
+    # Nesting of with blocks, the bus is locked by the outermost one
+    self._held = 0
+    self._register = bytearray(1)
+    self._byte = bytearray(1)
+    self._out = bytearray(257)
+    for register in cacheable:
+      self._cacheable[register >> 3] |= 1 << (register & 7)
+    if probe:
+      self._probe()
+
+  def _probe(self):
+    with self:
+      try:
+        self.i2c.writeto(self.device_address, b"")
+      except OSError:
+        # Some devices do not answer a zero length write
+        try:
+          self.i2c.readfrom_into(self.device_address, self._byte)
+        except OSError:
+          raise ValueError("No I2C device at address: 0x{:x}".format(self.device_address))
+
+  def __enter__(self):
+    # The register helpers lock the bus themselves, so they can be called
+    # inside a with block of the caller
+    if not self._held:
+      while not self.i2c.try_lock():
+        pass
+    self._held += 1
+    return self
+
+  def __exit__(self, exception_type, exception_value, traceback):
+    self._held -= 1
+    if not self._held:
+      self.i2c.unlock()
+    return False
+
+  def readinto(self, buffer, *, start=0, end=None):
+    """Read into ``buffer[start:end]`` from the device. The bus must be
+    locked, see :py:meth:`__enter__`."""
+    if end is None:
+      end = len(buffer)
+    self.i2c.readfrom_into(self.device_address, buffer, start=start, end=end)
+
+  def write(self, buffer, *, start=0, end=None):
+    """Write ``buffer[start:end]`` to the device. The bus must be locked."""
+    if end is None:
+      end = len(buffer)
+    self.i2c.writeto(self.device_address, buffer, start=start, end=end)
+
+  def write_then_readinto(self, out_buffer, in_buffer, *, out_start=0, out_end=None, in_start=0, in_end=None):
+    """Write ``out_buffer`` then read into ``in_buffer`` with a repeated
+    start in between. The bus must be locked."""
+    if out_end is None:
+      out_end = len(out_buffer)
+    if in_end is None:
+      in_end = len(in_buffer)
+    self.i2c.writeto_then_readfrom(self.device_address, out_buffer, in_buffer,
+                                   out_start=out_start, out_end=out_end,
+                                   in_start=in_start, in_end=in_end)
+
+  def _is(self, bits, register):
+    return bits[register >> 3] & (1 << (register & 7))
+
+  def _mark(self, bits, register, value):
+    if value:
+      bits[register >> 3] |= 1 << (register & 7)
+    else:
+      bits[register >> 3] &= ~(1 << (register & 7))
+
+  def invalidate(self, register=None):
+    """Forget the cached copy of ``register``, or of every register, for
+    instance after a device reset."""
+    if register is None:
+      for i in range(32):
+        self._valid[i] = 0
+    else:
+      self._mark(self._valid, register, False)
+
+  def read_register(self, register):
+    """Return the value of an 8 bit register, from the cache when it is
+    cacheable and has been read or written before, or while a batched
+    write to it is pending."""
+    if self._is(self._valid, register) or self._is(self._pending, register):
+      return self._cache[register]
+    self._register[0] = register
+    with self:
+      self.write_then_readinto(self._register, self._byte)
+    value = self._byte[0]
+    if self._is(self._cacheable, register):
+      self._cache[register] = value
+      self._mark(self._valid, register, True)
+    return value
+
+  def read_registers(self, register, buffer, *, start=0, end=None):
+    """Read the registers from ``register`` on into ``buffer[start:end]``.
+    Served from the cache only when every one of them is cached. A read
+    running past register 0xFF always goes to the device."""
+    if end is None:
+      end = len(buffer)
+    count = end - start
+    cache = self._cache
+    valid = self._valid
+    if register + count <= 256:
+      for i in range(count):
+        if not self._is(valid, register + i):
+          break
+      else:
+        for i in range(count):
+          buffer[start + i] = cache[register + i]
+        return
+    self._register[0] = register
+    with self:
+      self.write_then_readinto(self._register, buffer, in_start=start, in_end=end)
+    cacheable = self._cacheable
+    for i in range(min(count, 256 - register)):
+      if self._is(cacheable, register + i):
+        cache[register + i] = buffer[start + i]
+        self._mark(valid, register + i, True)
+
+  def write_register(self, register, value):
+    """Write an 8 bit register. Inside :py:meth:`batch` the write is held
+    back and merged with writes to neighbouring registers; outside it the
+    write is sent at once. The cached copy only becomes valid once the
+    device has taken the write."""
+    # Until then the register is read from the device, or while pending
+    # from the cache
+    self._mark(self._valid, register, False)
+    self._cache[register] = value
+    if self._depth:
+      self._mark(self._pending, register, True)
+      return
+    out = self._out
+    out[0] = register
+    out[1] = value
+    with self:
+      self.write(out, end=2)
+    if self._is(self._cacheable, register):
+      self._mark(self._valid, register, True)
+
+  def update_bits(self, register, mask, value):
+    """Set the bits of ``mask`` in ``register`` to those of ``value``. The
+    write is skipped when nothing changes, and a cached register is not
+    read over the bus."""
+    old = self.read_register(register)
+    new = (old & ~mask) | (value & mask)
+    if new != old:
+      self.write_register(register, new)
+
+  def batch(self):
+    """Return a context in which register writes are collected and then
+    sent as one write per run of consecutive registers. Batches nest."""
+    return _Batch(self)
+
+  def _flush(self):
+    pending = self._pending
+    cache = self._cache
+    out = self._out
+    run = -1
+    count = 0
+    try:
+      with self:
+        for register in range(257):
+          if register < 256 and pending[register >> 3] & (1 << (register & 7)):
+            if run < 0:
+              run = register
+              out[0] = register
+              count = 0
+            count += 1
+            out[count] = cache[register]
+          elif run >= 0:
+            self.write(out, end=count + 1)
+            run = -1
+      # Every write went through, the cacheable ones are now valid
+      valid = self._valid
+      cacheable = self._cacheable
+      for i in range(32):
+        valid[i] |= pending[i] & cacheable[i]
+    finally:
+      for i in range(32):
+        pending[i] = 0
+
+class _Batch:
+  # Context returned by I2CDevice.batch
+
+  def __init__(self, device):
+    self._device = device
+
+  def __enter__(self):
+    self._device._depth += 1
+    return self._device
+
+  def __exit__(self, exception_type, exception_value, traceback):
+    device = self._device
+    device._depth -= 1
+    if device._depth == 0:
+      if exception_type is None:
+        device._flush()
+      else:
+        # The held back writes are dropped; their registers are not valid
+        # and are read from the device again
+        for i in range(32):
+          device._pending[i] = 0
+    return False
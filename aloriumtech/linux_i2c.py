@@ -0,0 +1,250 @@
+"""
+`linux_i2c`
+========================================================
+Copyright 2020 Alorium Technology. All rights reserved.
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This file is part of the Alorium Technology CiricuitPython Library Bundle
+and provides the I2C transport used by ``aloriumtech._evo`` when the Evo
+is driven from a Linux host, such as a Raspberry Pi wired to SCL_1/SDA_1,
+under CPython or Blinka.
+
+Every transaction is a single ``I2C_RDWR`` ioctl on ``/dev/i2c-N``. A
+register read is its write and read messages combined with a repeated
+start, and a batch of writes goes to the kernel as one ioctl of up to
+`MAX_MESSAGES` messages, a batch of register reads as one ioctl of up to
+half as many write and read pairs. The bus number is taken from the
+``EVO_I2C_BUS`` environment variable and defaults to 1.
+
+A lock serialises the ioctls, and :py:meth:`LinuxI2C.serialized` wraps
+functions that must run as one unit, so the bus can be used from several
+threads.
+
+The device is opened on the first transfer, and again on the first
+transfer after :py:meth:`LinuxI2C.deinit`. Setting ``ioctl`` before
+that, for instance ``_evo.i2c1.ioctl = simulated``, replaces
+``fcntl.ioctl`` and runs the transport against a simulated device with no
+hardware attached. The replacement is called as
+``ioctl(fd, I2C_RDWR, data)`` with an `I2CRdwrData` structure and must
+fill the buffers of the read messages.
+
+"""
+import ctypes
+import functools
+import os
+import threading
+
+# From linux/i2c-dev.h and linux/i2c.h
+I2C_RDWR = 0x0707
+I2C_M_RD = 0x0001
+
+# Messages in one I2C_RDWR ioctl, I2C_RDWR_IOCTL_MAX_MSGS
+MAX_MESSAGES = 42
+
+class I2CMessage(ctypes.Structure):
+  """``struct i2c_msg``"""
+  _fields_ = [
+    ("addr", ctypes.c_uint16),
+    ("flags", ctypes.c_uint16),
+    ("len", ctypes.c_uint16),
+    ("buf", ctypes.POINTER(ctypes.c_uint8)),
+  ]
+
+class I2CRdwrData(ctypes.Structure):
+  """``struct i2c_rdwr_ioctl_data``"""
+  _fields_ = [
+    ("msgs", ctypes.POINTER(I2CMessage)),
+    ("nmsgs", ctypes.c_uint32),
+  ]
+
+def default_bus():
+  """Return the I2C bus number of the Evo, from ``EVO_I2C_BUS``."""
+  return int(os.environ.get("EVO_I2C_BUS", "1"))
+
+class LinuxI2C:
+
+  """An I2C bus of the Linux kernel with the ``busio.I2C`` API
+
+  :param int bus: the N of ``/dev/i2c-N``
+  :param ioctl: replacement for ``fcntl.ioctl``, see above"""
+
+  def __init__(self, bus=None, *, ioctl=None):
+    if bus is None:
+      bus = default_bus()
+    self.bus = bus
+    self.ioctl = ioctl
+    self._fd = -1
+    # fcntl.ioctl once the device has been opened
+    self._system_ioctl = None
+    self._lock = threading.RLock()
+    self._locked = False
+    self.ioctls = 0
+
+  def _open(self):
+    import fcntl
+    self._fd = os.open("/dev/i2c-{}".format(self.bus), os.O_RDWR)
+    self._system_ioctl = self.ioctl = fcntl.ioctl
+
+  def deinit(self):
+    """Close the device."""
+    with self._lock:
+      if self._fd >= 0:
+        os.close(self._fd)
+        self._fd = -1
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exception_type, exception_value, traceback):
+    self.deinit()
+
+  def try_lock(self):
+    """Attempts to grab the I2C lock. Returns True on success.
+
+    :return: True when lock has been grabbed
+    :rtype: bool"""
+    with self._lock:
+      if self._locked:
+        return False
+      self._locked = True
+      return True
+
+  def unlock(self):
+    """Releases the I2C lock."""
+    with self._lock:
+      self._locked = False
+
+  @property
+  def lock(self):
+    """The reentrant lock serialising the ioctls, for code that must run
+    several transactions as one unit"""
+    return self._lock
+
+  def serialized(self, function):
+    """Return ``function`` wrapped so that it runs under the transport
+    lock, for sequences of transactions that other threads must not come
+    between."""
+    lock = self._lock
+    @functools.wraps(function)
+    def locked(*args, **kwargs):
+      with lock:
+        return function(*args, **kwargs)
+    return locked
+
+  def transfer(self, messages):
+    """Run ``messages`` as one ``I2C_RDWR`` ioctl. Each message is a tuple
+    ``(address, buffer, read)``; read messages fill ``buffer`` in place.
+
+    :raises ValueError: when there are more than `MAX_MESSAGES` messages
+    :raises OSError: when the device does not acknowledge"""
+    count = len(messages)
+    if count > MAX_MESSAGES:
+      raise ValueError("At most {} messages per transfer".format(MAX_MESSAGES))
+    msgs = (I2CMessage * count)()
+    buffers = []
+    for i, (address, buffer, read) in enumerate(messages):
+      length = len(buffer)
+      data = (ctypes.c_uint8 * length)()
+      if not read:
+        data[:] = buffer
+      buffers.append(data)
+      msgs[i].addr = address
+      msgs[i].flags = I2C_M_RD if read else 0
+      msgs[i].len = length
+      msgs[i].buf = data
+    request = I2CRdwrData(msgs, count)
+    with self._lock:
+      if self.ioctl is None or (self._fd < 0 and self.ioctl is self._system_ioctl):
+        self._open()
+      self.ioctl(self._fd, I2C_RDWR, request)
+      self.ioctls += 1
+    for (address, buffer, read), data in zip(messages, buffers):
+      if read:
+        buffer[:] = bytes(data)
+
+  def scan(self):
+    """Scan all I2C addresses between 0x08 and 0x77 inclusive and return a
+    list of those that respond.
+
+    :return: List of device ids on the I2C bus
+    :rtype: list"""
+    found = []
+    for address in range(0x08, 0x78):
+      try:
+        self.transfer(((address, b"", False),))
+      except OSError:
+        continue
+      found.append(address)
+    return found
+
+  def readfrom_into(self, address, buffer, *, start=0, end=None):
+    """Read from a device at specified address into a buffer"""
+    if end is None:
+      end = len(buffer)
+    view = memoryview(buffer)[start:end]
+    self.transfer(((address, view, True),))
+
+  def writeto(self, address, buffer, *, start=0, end=None, stop=True):
+    """Write to a device at specified address from a buffer. Each call is
+    a complete transaction, so ``stop`` is accepted and ignored."""
+    if end is None:
+      end = len(buffer)
+    self.transfer(((address, memoryview(buffer)[start:end], False),))
+
+  def writeto_then_readfrom(self, address, buffer_out, buffer_in, *, out_start=0, out_end=None, in_start=0, in_end=None):
+    """Write to a device at specified address from a buffer then read from
+    a device at specified address into a buffer, with a repeated start and
+    in a single ioctl."""
+    if out_end is None:
+      out_end = len(buffer_out)
+    if in_end is None:
+      in_end = len(buffer_in)
+    self.transfer(((address, memoryview(buffer_out)[out_start:out_end], False),
+                   (address, memoryview(buffer_in)[in_start:in_end], True)))
+
+  def writeto_many(self, address, buffer, size, *, start=0, end=None):
+    """Write ``buffer[start:end]`` to the device as consecutive ``size``
+    byte messages, `MAX_MESSAGES` of them per ioctl joined by repeated
+    starts.
+
+    :return: number of ioctls used
+    :rtype: int"""
+    if end is None:
+      end = len(buffer)
+    view = memoryview(buffer)
+    step = size * MAX_MESSAGES
+    ioctls = 0
+    for first in range(start, end, step):
+      last = min(first + step, end)
+      self.transfer([(address, view[offset:offset + size], False)
+                     for offset in range(first, last, size)])
+      ioctls += 1
+    return ioctls
+
+  def writeto_then_readfrom_many(self, address, buffer_out, out_size, buffer_in, in_size, *, in_start=0, in_end=None):
+    """Send each ``out_size`` byte request of ``buffer_out`` and read its
+    ``in_size`` byte reply into ``buffer_in[in_start:in_end]``, in order.
+    Each pair is joined by a repeated start and half of `MAX_MESSAGES`
+    pairs go in one ioctl.
+
+    :return: number of ioctls used
+    :rtype: int"""
+    if in_end is None:
+      in_end = len(buffer_in)
+    view_out = memoryview(buffer_out)
+    view_in = memoryview(buffer_in)
+    step = in_size * (MAX_MESSAGES // 2)
+    ioctls = 0
+    out = 0
+    for first in range(in_start, in_end, step):
+      messages = []
+      for offset in range(first, min(first + step, in_end), in_size):
+        messages.append((address, view_out[out:out + out_size], False))
+        messages.append((address, view_in[offset:offset + in_size], True))
+        out += out_size
+      self.transfer(messages)
+      ioctls += 1
+    return ioctls
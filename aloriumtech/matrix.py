@@ -0,0 +1,401 @@
+"""
+`matrix`
+========================================================
+Copyright 2020 Alorium Technology. All rights reserved.
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This file is part of the Alorium Technology CiricuitPython Library Bundle
+and provides scanning of key matrices and multiplexed LED matrices wired
+to the E, G and Z FPGA ports.
+
+A row takes one write of a whole port register and, for a keypad, one
+read of the column port's IN register, so a frame costs a number of CSR
+transactions proportional to the rows rather than to rows times columns::
+
+  from aloriumtech import board, matrix
+
+  keys = matrix.KeyMatrix((board.E0, board.E1, board.E2, board.E3),
+                          (board.E4, board.E5, board.E6))
+  while True:
+    keys.tick()
+    event = keys.events.get()
+    if event:
+      print(event)
+
+"""
+import time
+from array import array
+
+from aloriumtech import _evo
+from aloriumtech import _pacing
+
+class Event:
+
+  """A key transition"""
+
+  def __init__(self, key_number=0, pressed=True, timestamp=0):
+    """:param int key_number: ``row * columns + column``
+    :param bool pressed: True for a press, False for a release
+    :param int timestamp: ``time.monotonic_ns()`` of the scan that saw it"""
+    self.key_number = key_number
+    self.pressed = pressed
+    self.timestamp = timestamp
+
+  @property
+  def released(self):
+    return not self.pressed
+
+  def __eq__(self, other):
+    return self.key_number == other.key_number and self.pressed == other.pressed
+
+  def __repr__(self):
+    return "<Event: key_number {} {}>".format(self.key_number, "pressed" if self.pressed else "released")
+
+class EventQueue:
+
+  """Fixed size queue of key events
+
+  The queue storage is preallocated; the ``time.monotonic_ns()``
+  timestamps are still heap integers. When it is full new events are
+  dropped and `overflowed` is set.
+
+  :param int max_events: number of events the queue holds"""
+
+  def __init__(self, max_events=64):
+    self._keys = array("H", [0] * max_events)
+    self._pressed = bytearray(max_events)
+    self._times = [0] * max_events
+    self._head = 0
+    self._count = 0
+    self.overflowed = False
+
+  def __len__(self):
+    return self._count
+
+  def __bool__(self):
+    return self._count > 0
+
+  def _put(self, key_number, pressed, timestamp):
+    size = len(self._pressed)
+    if self._count == size:
+      self.overflowed = True
+      return
+    tail = (self._head + self._count) % size
+    self._keys[tail] = key_number
+    self._pressed[tail] = pressed
+    self._times[tail] = timestamp
+    self._count += 1
+
+  def get_into(self, event):
+    """Move the oldest event into ``event`` instead of allocating one.
+
+    :param Event event: event to fill in
+    :return: False when the queue was empty
+    :rtype: bool"""
+    if not self._count:
+      return False
+    head = self._head
+    event.key_number = self._keys[head]
+    event.pressed = bool(self._pressed[head])
+    event.timestamp = self._times[head]
+    self._head = (head + 1) % len(self._pressed)
+    self._count -= 1
+    return True
+
+  def get(self):
+    """Remove and return the oldest event, or None when there is none."""
+    event = Event()
+    if self.get_into(event):
+      return event
+    return None
+
+  def clear(self):
+    """Drop every event and reset `overflowed`."""
+    self._head = 0
+    self._count = 0
+    self.overflowed = False
+
+def _port_of(pins):
+  # All pins must be on one FPGA port, return its base address and mask
+  port = pins[0][1]
+  mask = 0
+  for pin in pins:
+    if not isinstance(pin[1], int) or pin[1] != port:
+      raise ValueError("Matrix pins must be E, G or Z pins on one port")
+    mask |= 1 << pin[0]
+  return _evo.PORT_BASE_ADDRS[port], mask
+
+def _contiguous(pins):
+  # Bit of the first pin when the pins are consecutive ascending bits
+  for i, pin in enumerate(pins):
+    if pin[0] != pins[0][0] + i:
+      return None
+  return pins[0][0]
+
+class KeyMatrix(_pacing.Paced):
+
+  """Debounced scanner of a key matrix
+
+  Each row is selected by making it the only row output, driven to
+  ``value_when_pressed``, so idle rows float and pressing several keys in
+  one column never shorts two drivers. The DIR register of the row port is
+  read once per scan, so direction changes other drivers make on that
+  port are kept, then written once per row, and the IN register of the
+  column port is read once per row. The columns need pull resistors to
+  the opposite level.
+
+  A key only changes state once ``debounce`` consecutive scans agree. The
+  history is kept as one column bitmap per row and scan, and the whole row
+  is debounced with a few bitwise operations.
+
+  :param row_pins: row pins, all on one FPGA port
+  :param column_pins: column pins, all on one FPGA port
+  :param bool value_when_pressed: level a pressed key puts on its column
+  :param float interval: seconds between scans used by `tick`
+  :param int debounce: scans that must agree before a key changes
+  :param int max_events: size of the event queue"""
+
+  def __init__(self, row_pins, column_pins, *, value_when_pressed=False, interval=0.02, debounce=2, max_events=64):
+    self._rows = len(row_pins)
+    self._columns = len(column_pins)
+    self._row_base, self._row_mask = _port_of(row_pins)
+    self._column_base, column_mask = _port_of(column_pins)
+    if self._row_base == self._column_base and self._row_mask & column_mask:
+      raise ValueError("A pin cannot be both a row and a column")
+    self._row_bits = array("L", [1 << pin[0] for pin in row_pins])
+    self._column_bits = array("L", [1 << pin[0] for pin in column_pins])
+    self._column_shift = _contiguous(column_pins)
+    self._column_mask = (1 << self._columns) - 1
+    self._pressed_level = value_when_pressed
+
+    self._debounce = max(debounce, 1)
+    self._history = array("L", [0] * self._rows * self._debounce)
+    self._sample = 0
+    self._state = array("L", [0] * self._rows)
+    self.events = EventQueue(max_events)
+
+    self._pace(int(interval * 1000000000))
+    self.scans = 0
+
+    # Rows start as inputs with their output level set for when they are
+    # selected, columns are inputs
+    if value_when_pressed:
+      _evo.send_evo_write_word(self._row_base + _evo.PORT_OUTSET_OFS, self._row_mask)
+    else:
+      _evo.send_evo_write_word(self._row_base + _evo.PORT_OUTCLR_OFS, self._row_mask)
+    _evo.send_evo_write_word(self._row_base + _evo.PORT_DIRCLR_OFS, self._row_mask)
+    _evo.send_evo_write_word(self._column_base + _evo.PORT_DIRCLR_OFS, column_mask)
+
+  def deinit(self):
+    """Stop driving the rows."""
+    _evo.send_evo_write_word(self._row_base + _evo.PORT_DIRCLR_OFS, self._row_mask)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exception_type, exception_value, traceback):
+    self.deinit()
+
+  @property
+  def key_count(self):
+    """Number of keys in the matrix, ``rows * columns``"""
+    return self._rows * self._columns
+
+  def _columns_of(self, value):
+    # Column bitmap of a port IN value, 1 for a pressed key
+    if not self._pressed_level:
+      value = ~value
+    if self._column_shift is not None:
+      return (value >> self._column_shift) & self._column_mask
+    bits = 0
+    for i, bit in enumerate(self._column_bits):
+      if value & bit:
+        bits |= 1 << i
+    return bits
+
+  def scan(self):
+    """Scan every row once and queue the key changes."""
+    now = time.monotonic_ns()
+    row_dir = self._row_base + _evo.PORT_DIR_OFS
+    column_in = self._column_base + _evo.PORT_IN_OFS
+    # Direction of the other pins on the row port, as they are now, written
+    # back with every row
+    dir_idle = _evo.send_evo_read_word(row_dir) & ~self._row_mask
+    history = self._history
+    state = self._state
+    debounce = self._debounce
+    columns = self._columns
+    sample = self._sample
+    for row, bit in enumerate(self._row_bits):
+      _evo.send_evo_write_word(row_dir, dir_idle | bit)
+      bits = self._columns_of(_evo.send_evo_read_word(column_in))
+      history[row * debounce + sample] = bits
+      # Keys down in every kept scan, and keys up in every kept scan
+      down = bits
+      up = bits
+      for i in range(row * debounce, (row + 1) * debounce):
+        down &= history[i]
+        up |= history[i]
+      old = state[row]
+      new = (old | down) & up
+      if new != old:
+        state[row] = new
+        changed = new ^ old
+        for column in range(columns):
+          if changed & (1 << column):
+            self.events._put(row * columns + column, bool(new & (1 << column)), now)
+    _evo.send_evo_write_word(row_dir, dir_idle)
+    self._sample = (sample + 1) % debounce
+    self.scans += 1
+
+  def tick(self):
+    """Call from the main loop. Scans when the next scan slot has come;
+    slots that have already passed are dropped, not made up.
+
+    :return: True when a scan was due
+    :rtype: bool"""
+    if not self._due():
+      return False
+    self.scan()
+    return True
+
+  def pressed(self, key_number):
+    """Return True when the debounced state of the key is pressed.
+
+    :param int key_number: ``row * columns + column``"""
+    row, column = divmod(key_number, self._columns)
+    return bool(self._state[row] & (1 << column))
+
+class LEDMatrix(_pacing.Paced):
+
+  """Refresh of a multiplexed LED matrix
+
+  `bitmap` holds one column bitmap per row. `tick` shows one row at a time
+  at a fixed rate. When rows and columns share a port a row change is a
+  single write of the port OUT register; on separate ports the columns are
+  blanked, the row switched and the new columns set, sent as one queue of
+  CSR writes. The other OUT bits of the ports are read once here and must
+  not be changed from elsewhere while the matrix runs.
+
+  :param row_pins: row pins, all on one FPGA port
+  :param column_pins: column pins, all on one FPGA port
+  :param bool row_active: level of the selected row
+  :param bool column_active: level of a lit column
+  :param int refresh_rate: full frames per second"""
+
+  def __init__(self, row_pins, column_pins, *, row_active=False, column_active=True, refresh_rate=100):
+    self._rows = len(row_pins)
+    self._columns = len(column_pins)
+    self._row_base, self._row_mask = _port_of(row_pins)
+    self._column_base, self._column_mask = _port_of(column_pins)
+    self._shared = self._row_base == self._column_base
+    if self._shared and self._row_mask & self._column_mask:
+      raise ValueError("A pin cannot be both a row and a column")
+    self._row_bits = array("L", [1 << pin[0] for pin in row_pins])
+    self._column_bits = array("L", [1 << pin[0] for pin in column_pins])
+    self._column_shift = _contiguous(column_pins)
+    self._row_active = row_active
+    self._column_active = column_active
+    self.bitmap = array("L", [0] * self._rows)
+    self._row = 0
+    self._queue = bytearray(3 * _evo.EVO_FRAME_SIZE)
+
+    self._pace(1000000000 // (refresh_rate * self._rows))
+
+    row_out = self._row_base + _evo.PORT_OUT_OFS
+    column_out = self._column_base + _evo.PORT_OUT_OFS
+    self._row_idle = _evo.send_evo_read_word(row_out) & ~self._row_mask
+    self._column_idle = _evo.send_evo_read_word(column_out) & ~self._column_mask
+    if not row_active:
+      self._row_idle |= self._row_mask
+    if not column_active:
+      self._column_idle |= self._column_mask
+    # Row port bits other than the rows, column bits blanked
+    self._row_other = self._row_idle & ~self._row_mask
+    if self._shared:
+      self._row_other &= ~self._column_mask
+      self._row_idle = (self._row_idle & ~self._column_mask) | (self._column_idle & self._column_mask)
+    # All rows off, then outputs
+    _evo.send_evo_write_word(row_out, self._row_idle)
+    if not self._shared:
+      _evo.send_evo_write_word(column_out, self._column_idle)
+    _evo.send_evo_write_word(self._row_base + _evo.PORT_DIRSET_OFS, self._row_mask)
+    _evo.send_evo_write_word(self._column_base + _evo.PORT_DIRSET_OFS, self._column_mask)
+
+  def deinit(self):
+    """Turn the matrix off and release the pins as inputs."""
+    _evo.send_evo_write_word(self._row_base + _evo.PORT_OUT_OFS, self._row_idle)
+    _evo.send_evo_write_word(self._row_base + _evo.PORT_DIRCLR_OFS, self._row_mask)
+    _evo.send_evo_write_word(self._column_base + _evo.PORT_DIRCLR_OFS, self._column_mask)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exception_type, exception_value, traceback):
+    self.deinit()
+
+  def fill(self, value):
+    """Light every LED when ``value`` is true, clear them otherwise."""
+    bits = (1 << self._columns) - 1 if value else 0
+    for row in range(self._rows):
+      self.bitmap[row] = bits
+
+  def __setitem__(self, index, value):
+    row, column = index
+    if value:
+      self.bitmap[row] |= 1 << column
+    else:
+      self.bitmap[row] &= ~(1 << column)
+
+  def __getitem__(self, index):
+    row, column = index
+    return bool(self.bitmap[row] & (1 << column))
+
+  def _column_word(self, bits):
+    # Column port bits lit for a row bitmap
+    if self._column_shift is not None:
+      word = (bits << self._column_shift) & self._column_mask
+    else:
+      word = 0
+      for i, bit in enumerate(self._column_bits):
+        if bits & (1 << i):
+          word |= bit
+    if not self._column_active:
+      word ^= self._column_mask
+    return word
+
+  def show_row(self, row):
+    """Switch the matrix to ``row``.
+
+    :param int row: row to show"""
+    bit = self._row_bits[row]
+    columns = self._column_word(self.bitmap[row])
+    if self._row_active:
+      rows = self._row_other | bit
+    else:
+      rows = self._row_other | (self._row_mask & ~bit)
+    if self._shared:
+      _evo.send_evo_write_word(self._row_base + _evo.PORT_OUT_OFS, rows | columns)
+      return
+    queue = self._queue
+    frame = _evo.EVO_FRAME_SIZE
+    column_out = self._column_base + _evo.PORT_OUT_OFS
+    _evo.pack_evo_write_frame(queue, 0, column_out, self._column_idle)
+    _evo.pack_evo_write_frame(queue, frame, self._row_base + _evo.PORT_OUT_OFS, rows)
+    _evo.pack_evo_write_frame(queue, 2 * frame, column_out, (self._column_idle & ~self._column_mask) | columns)
+    _evo.send_evo_write_queue(queue, 3)
+
+  def tick(self):
+    """Call from the main loop. Moves on to the next row when its slot has
+    come; slots that have already passed are dropped, not made up.
+
+    :return: True when a row was shown
+    :rtype: bool"""
+    if not self._due():
+      return False
+    self.show_row(self._row)
+    self._row = (self._row + 1) % self._rows
+    return True
@@ -13,11 +13,15 @@ and provides a custom CircuitPython neopixel library for Evo M51.
 """
 
 # Evo NeoPixel implementation
-import neopixel
+
 import _pixelbuf
+from neopixel_write import neopixel_write
 
 from aloriumtech import _evo
+from aloriumtech import _pacing
 from aloriumtech import digitalio
+from aloriumtech import register
+from aloriumtech import xb
 
 # Pixel color order constants
 RGB = "RGB"
@@ -29,10 +33,112 @@ RGBW = "RGBW"
 GRBW = "GRBW"
 """Green Red Blue White"""
 
+@xb.register
+class NeoPixelBlock(xb.XceleratorBlock):
+
+  """Driver of the WS2812 Xcelerator Block.
+
+  The block generates the NeoPixel timing on up to `CHANNELS` FPGA port
+  pins at once. A frame is uploaded through the DATA FIFO and the channel
+  then transmits on its own, so the strips of several channels refresh in
+  parallel while the SAMD carries on.
+
+  The CSR interface moves one 4 byte word per I2C transaction, so an
+  upload costs one 6 byte transaction per 4 pixel bytes, sent back to back
+  by ``_evo.send_evo_write_fifo``.
+
+  The block ID and CSR layout below are those this driver expects of the
+  block; they are not part of the SVN 257 address map in ``_evo``."""
+
+  XB_ID = 0x4E505831
+  CAPABILITIES = ("neopixel",)
+  CHANNELS = 8
+
+  # CSRs, relative to the block's csr_base. SELECT, PIN and LENGTH are
+  # written directly rather than through register fields, as they must
+  # reach the block before the upload and the start bit even inside a
+  # caller's register.batch()
+  _CTL_ADDR = 0x00
+  _SELECT_ADDR = 0x02
+  _PIN_ADDR = 0x03
+  _LENGTH_ADDR = 0x04
+  _DATA_ADDR = 0x05
+  _busy = register.ROBits(0x01, 0, 8, volatile=True)
+
+  # Busy polls before a channel is declared stuck
+  _POLLS = 1000
+
+  def __init__(self, slot, xb_id):
+    super().__init__(slot, xb_id)
+    self._used = 0
+
+  def attach(self, pin):
+    """Give a free channel the port pin ``pin`` and return the channel.
+
+    :param pin: an E, G or Z pin from ``aloriumtech.board``
+    :raises RuntimeError: when every channel is in use"""
+    for channel in range(self.CHANNELS):
+      if not self._used & (1 << channel):
+        break
+    else:
+      raise RuntimeError("All NeoPixel Xcelerator Block channels in use")
+    self._used |= 1 << channel
+
+    # Hand the pin over to the block as an output
+    base = _evo.PORT_BASE_ADDRS[pin[1]]
+    _evo.send_evo_write_word(base + _evo.PORT_DIRSET_OFS, 1 << pin[0])
+    _evo.send_evo_write_word(base + _evo.PORT_PMUXENSET_OFS, 1 << pin[0])
+
+    _evo.send_evo_write_word(self.csr_base + self._SELECT_ADDR, channel)
+    _evo.send_evo_write_word(self.csr_base + self._PIN_ADDR, (pin[1] << 8) | pin[0])
+    return channel
+
+  def detach(self, channel, pin):
+    """Release ``channel`` and give ``pin`` back to the port."""
+    self.wait(channel)
+    self._used &= ~(1 << channel)
+    base = _evo.PORT_BASE_ADDRS[pin[1]]
+    _evo.send_evo_write_word(base + _evo.PORT_PMUXENCLR_OFS, 1 << pin[0])
+
+  def wait(self, channel):
+    """Wait for ``channel`` to finish transmitting."""
+    mask = 1 << channel
+    for _ in range(self._POLLS):
+      if not self._busy & mask:
+        return
+    raise RuntimeError("NeoPixel Xcelerator Block timed out")
+
+  def write(self, channel, buffer):
+    """Upload ``buffer`` to ``channel`` and start transmitting it. Returns
+    without waiting for the transmission to end."""
+    self.wait(channel)
+    _evo.send_evo_write_word(self.csr_base + self._SELECT_ADDR, channel)
+    _evo.send_evo_write_word(self.csr_base + self._LENGTH_ADDR, len(buffer))
+    _evo.send_evo_write_fifo(self.csr_base + self._DATA_ADDR, buffer)
+    _evo.send_evo_write_word(self.csr_base + self._CTL_ADDR, 1 << channel)
+
+
 class NeoPixel(_pixelbuf.PixelBuf):
 
-  _neopixel = None
-  _buffer = bytearray(4)
+  """A sequence of neopixels on an FPGA routed pin.
+
+  The pixel data lives in the one PixelBuf this class is, with brightness
+  applied once by PixelBuf, and is sent straight out of the SAMD pin behind
+  the FPGA routed pin.
+
+  E, G and Z pins have no SAMD pin behind them. There the timing comes from
+  the WS2812 Xcelerator Block, see :py:class:`NeoPixelBlock`, and each
+  frame is uploaded through its DATA FIFO, one CSR transaction per 4 pixel
+  bytes. Several strips on different pins then refresh in parallel.
+
+  :param pin: The Evo pin to output neopixel data on, e.g. ``board.NEOPIXEL``
+  :param int n: The number of neopixels in the chain
+  :param int bpp: Bytes per pixel. 3 for RGB and 4 for RGBW pixels.
+  :param float brightness: Brightness of the pixels between 0.0 and 1.0 where 1.0 is full
+    brightness
+  :param bool auto_write: True if the neopixels should immediately change when set. If False,
+    `show` must be called explicitly.
+  :param str pixel_order: Set the pixel color channel order. GRBW is set by default."""
 
   def __init__(self, pin, n, *, bpp=3, brightness=1.0, auto_write=True, pixel_order=None):
 
@@ -48,20 +154,32 @@ class NeoPixel(_pixelbuf.PixelBuf):
       n, brightness=brightness, byteorder=pixel_order, auto_write=auto_write
     )
 
-    # Make FPGA calls to set Neopixel pin as output
-    addr = _evo.D2F_ENSET_ADDR
-    _evo.send_evo_write_trans(addr, self._buffer)
-    addr = _evo.D2F_DIRSET_ADDR
-    _evo.send_evo_write_trans(addr, self._buffer)
+    if isinstance(pin[1], int):
+      # FPGA port pin, the timing comes from an Xcelerator Block
+      self._block = xb.find("neopixel")
+      if self._block is None:
+        raise ValueError("No NeoPixel Xcelerator Block in the FPGA image")
+      self._io = None
+      self._channel = self._block.attach(pin)
+      self.pin = None
+    else:
+      # Claim the pin bit in the FPGA and set it as an output
+      self._block = None
+      self._io = digitalio.DigitalInOut(pin)
+      self._io.switch_to_output()
 
-    # Make call to NeoPixel class
-    self._neopixel = neopixel.NeoPixel(pin[1], n, bpp=bpp, brightness=brightness, auto_write=auto_write, pixel_order=pixel_order)
+      # The SAMD pin behind the FPGA routed pin
+      self.pin = self._io._pin
+    self._evo_pin = pin
 
   def deinit(self):
     """Blank out the NeoPixels and release the pin."""
-    self._neopixel.fill(0)
-    self._neopixel.show()
-    self._neopixel.pin.deinit()
+    self.fill(0)
+    self.show()
+    if self._block is not None:
+      self._block.detach(self._channel, self._evo_pin)
+    else:
+      self._io.deinit()
 
   def __enter__(self):
     return self
@@ -77,10 +195,166 @@ class NeoPixel(_pixelbuf.PixelBuf):
     """
     The number of neopixels in the chain (read-only)
     """
-    return self._neopixel.n()
+    return len(self)
 
   def write(self):
-    self._neopixel.show()
+    self.show()
 
   def _transmit(self, buffer):
-    self._neopixel._transmit(buffer)
\ No newline at end of file
+    if self._block is not None:
+      self._block.write(self._channel, buffer)
+    else:
+      neopixel_write(self.pin, buffer)
+
+
+class FrameEngine(_pacing.Paced):
+
+  """Frame engine for status and animation strips.
+
+  Colors go through a 256 entry gamma and brightness table as they are set,
+  so nothing is scaled when a frame goes out, and the table is only rebuilt
+  when `brightness` changes. `show` only transmits when a pixel changed, and
+  `tick` paces frames at a fixed rate, dropping frames rather than falling
+  behind. The ``frames``, ``skipped`` and ``dropped`` counters keep track of
+  frames transmitted, `show` calls with nothing to send and frame slots
+  given up::
+
+    strip = neopixel.NeoPixel(board.D6, 30, auto_write=False)
+    frames = neopixel.FrameEngine(strip, fps=50, brightness=0.3)
+    while True:
+      animate(frames)
+      frames.tick()
+
+  :param NeoPixel strip: the strip to drive; its own brightness is set to 1.0
+  :param int fps: frame rate used by `tick`
+  :param float brightness: Brightness of the pixels between 0.0 and 1.0
+  :param float gamma: gamma correction exponent, 1.0 for none"""
+
+  def __init__(self, strip, *, fps=30, brightness=1.0, gamma=2.2):
+    strip.auto_write = False
+    strip.brightness = 1.0
+    self._strip = strip
+    self._bpp = strip.bpp
+    self._raw = bytearray(len(strip) * self._bpp)
+    self._lut = bytearray(256)
+    self._gamma = gamma
+    self._dirty = True
+    self._brightness = None
+    self.brightness = brightness
+    self._pace(1000000000 // fps)
+    self.frames = 0
+    self.skipped = 0
+
+  def __len__(self):
+    return len(self._strip)
+
+  @property
+  def brightness(self):
+    """Overall brightness of the pixels between 0.0 and 1.0"""
+    return self._brightness
+
+  @brightness.setter
+  def brightness(self, brightness):
+    brightness = min(max(brightness, 0.0), 1.0)
+    if brightness == self._brightness:
+      return
+    self._brightness = brightness
+    lut = self._lut
+    gamma = self._gamma
+    for i in range(256):
+      lut[i] = int(((i / 255) ** gamma) * brightness * 255 + 0.5)
+    # Re-apply the new table to every pixel
+    for i in range(len(self._strip)):
+      self._apply(i)
+    self._dirty = True
+
+  def _apply(self, index):
+    lut = self._lut
+    raw = self._raw
+    offset = index * self._bpp
+    if self._bpp == 3:
+      self._strip[index] = (lut[raw[offset]], lut[raw[offset + 1]], lut[raw[offset + 2]])
+    else:
+      self._strip[index] = (lut[raw[offset]], lut[raw[offset + 1]], lut[raw[offset + 2]], lut[raw[offset + 3]])
+
+  def _store(self, index, color):
+    # Returns True when the pixel's color changed
+    raw = self._raw
+    offset = index * self._bpp
+    if isinstance(color, int):
+      color = ((color >> 16) & 0xFF, (color >> 8) & 0xFF, color & 0xFF)
+    changed = False
+    for i in range(self._bpp):
+      value = color[i] if i < len(color) else 0
+      if raw[offset + i] != value:
+        raw[offset + i] = value
+        changed = True
+    return changed
+
+  def _index(self, index):
+    length = len(self._strip)
+    if index < 0:
+      index += length
+    if not 0 <= index < length:
+      raise IndexError("Pixel index out of range")
+    return index
+
+  def __setitem__(self, index, color):
+    if isinstance(index, slice):
+      # As PixelBuf: one color per pixel of the slice
+      indices = range(len(self._strip))[index]
+      if len(color) != len(indices):
+        raise ValueError("Unmatched number of items on RHS")
+      for i, value in zip(indices, color):
+        if self._store(i, value):
+          self._apply(i)
+          self._dirty = True
+    else:
+      index = self._index(index)
+      if self._store(index, color):
+        self._apply(index)
+        self._dirty = True
+
+  def __getitem__(self, index):
+    if isinstance(index, slice):
+      return [self[i] for i in range(len(self._strip))[index]]
+    offset = self._index(index) * self._bpp
+    return tuple(self._raw[offset:offset + self._bpp])
+
+  def fill(self, color):
+    """Set every pixel to ``color``."""
+    changed = self._store(0, color)
+    bpp = self._bpp
+    raw = self._raw
+    for i in range(bpp, len(raw)):
+      if raw[i] != raw[i - bpp]:
+        raw[i] = raw[i - bpp]
+        changed = True
+    if changed:
+      self._apply(0)
+      self._strip.fill(self._strip[0])
+      self._dirty = True
+
+  def show(self):
+    """Transmit the frame if any pixel changed since the last one.
+
+    :return: True when a frame was transmitted
+    :rtype: bool"""
+    if not self._dirty:
+      self.skipped += 1
+      return False
+    self._strip.show()
+    self._dirty = False
+    self.frames += 1
+    return True
+
+  def tick(self):
+    """Call from the main loop. Shows a frame when the next frame slot has
+    come; slots that have already passed are dropped, not made up.
+
+    :return: True when a frame slot was due
+    :rtype: bool"""
+    if not self._due():
+      return False
+    self.show()
+    return True
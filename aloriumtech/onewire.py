@@ -0,0 +1,231 @@
+"""
+`onewire`
+========================================================
+Copyright 2020 Alorium Technology. All rights reserved.
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This file is part of the Alorium Technology CiricuitPython Library Bundle
+and provides the OneWire ROM layer over ``aloriumtech.busio.OneWire``:
+device search, addressing and a sweep of every DS18B20 on a bus.
+
+A sweep starts the conversion of all sensors at once and then reads each
+scratchpad, so it takes one conversion time however many sensors there
+are::
+
+  from aloriumtech import board, busio, onewire
+
+  bus = onewire.OneWireBus(busio.OneWire(board.D7))
+  print(bus.scan())
+  print(bus.read_temperatures())
+
+"""
+import struct
+import time
+
+# ROM commands
+_SEARCH_ROM = 0xF0
+_MATCH_ROM = 0x55
+_SKIP_ROM = 0xCC
+_READ_POWER_SUPPLY = 0xB4
+
+# DS18B20 function commands
+_CONVERT_T = 0x44
+_READ_SCRATCHPAD = 0xBE
+
+# DS18B20 family code
+DS18B20_FAMILY = 0x28
+
+# Longest DS18B20 conversion, at 12 bits
+_CONVERSION_TIME = 0.75
+
+def _crc8_table():
+  table = bytearray(256)
+  for i in range(256):
+    crc = i
+    for _ in range(8):
+      if crc & 1:
+        crc = (crc >> 1) ^ 0x8C
+      else:
+        crc >>= 1
+    table[i] = crc
+  return table
+
+_CRC8 = _crc8_table()
+
+def crc8(data, start=0, end=None):
+  """Return the Maxim CRC-8 of ``data[start:end]``. Over a ROM or a
+  scratchpad including its CRC byte the result is 0."""
+  if end is None:
+    end = len(data)
+  table = _CRC8
+  crc = 0
+  for i in range(start, end):
+    crc = table[crc ^ data[i]]
+  return crc
+
+class OneWireBus:
+
+  """Devices on a OneWire bus
+
+  :param ~aloriumtech.busio.OneWire onewire: the bus"""
+
+  def __init__(self, onewire):
+    self._onewire = onewire
+    self._devices = None
+    self._parasite = None
+    self._rom = bytearray(8)
+    self._scratchpad = bytearray(9)
+    self._command = bytearray(9)
+
+  def reset(self):
+    """Reset the bus and return True when a device answered."""
+    return not self._onewire.reset()
+
+  def scan(self, *, force=False):
+    """Return the ROM codes of the devices on the bus, as ``bytes``. The
+    bus is searched on the first call and when ``force`` is set; the list
+    is kept otherwise.
+
+    :raises RuntimeError: when a ROM code fails its CRC"""
+    if self._devices is None or force:
+      self._devices = self._search()
+      self._parasite = None
+    return self._devices
+
+  def _search(self):
+    # Maxim application note 187: each pass walks the ROM tree, taking
+    # the 1 branch at the last discrepancy of the previous pass
+    onewire = self._onewire
+    read_bit = onewire.read_bit
+    write_bit = onewire.write_bit
+    rom = self._rom
+    devices = []
+    last_discrepancy = 0
+    done = False
+    while not done:
+      if onewire.reset():
+        break
+      onewire.write_byte(_SEARCH_ROM)
+      discrepancy = 0
+      for bit in range(1, 65):
+        index = (bit - 1) >> 3
+        mask = 1 << ((bit - 1) & 7)
+        value = read_bit()
+        complement = read_bit()
+        if value and complement:
+          # Nobody answered
+          return devices
+        if value != complement:
+          direction = value
+        elif bit == last_discrepancy:
+          direction = True
+        elif bit > last_discrepancy:
+          direction = False
+        else:
+          direction = bool(rom[index] & mask)
+        if value == complement and not direction:
+          discrepancy = bit
+        if direction:
+          rom[index] |= mask
+        else:
+          rom[index] &= ~mask
+        write_bit(direction)
+      if crc8(rom):
+        raise RuntimeError("OneWire ROM CRC error")
+      devices.append(bytes(rom))
+      last_discrepancy = discrepancy
+      done = last_discrepancy == 0
+    return devices
+
+  def select(self, rom):
+    """Reset the bus and address the device with ROM code ``rom``.
+
+    :raises RuntimeError: when no device answers the reset"""
+    if self._onewire.reset():
+      raise RuntimeError("No OneWire device present")
+    command = self._command
+    command[0] = _MATCH_ROM
+    command[1:9] = rom
+    self._onewire.write(command)
+
+  def skip(self):
+    """Reset the bus and address every device.
+
+    :raises RuntimeError: when no device answers the reset"""
+    if self._onewire.reset():
+      raise RuntimeError("No OneWire device present")
+    self._onewire.write_byte(_SKIP_ROM)
+
+  def ds18b20s(self):
+    """Return the ROM codes of the DS18B20s on the bus."""
+    return [rom for rom in self.scan() if rom[0] == DS18B20_FAMILY]
+
+  def parasite_powered(self):
+    """Return True when a device on the bus draws its power from the data
+    line. The answer to READ POWER SUPPLY is kept until the next forced
+    :py:meth:`scan`."""
+    if self._parasite is None:
+      self.skip()
+      self._onewire.write_byte(_READ_POWER_SUPPLY)
+      # Parasite powered devices pull the bus low for this slot
+      self._parasite = not self._onewire.read_bit()
+    return self._parasite
+
+  def convert_all(self, *, timeout=_CONVERSION_TIME):
+    """Start a temperature conversion on every sensor at once and wait for
+    it. Sensors with their own supply hold the bus low until they are
+    done, so the wait usually ends early.
+
+    A parasite powered sensor can not report progress and needs more
+    current during the conversion than the bus pull-up resistor gives.
+    When :py:meth:`parasite_powered` finds one, the bus is left idle for
+    the full ``timeout``. ``busio.OneWire`` has no strong pull-up of its
+    own, so such buses need an external one, for instance a MOSFET from
+    the data line to the supply, switched on for the conversion.
+
+    :param float timeout: seconds to wait"""
+    parasite = self.parasite_powered()
+    self.skip()
+    self._onewire.write_byte(_CONVERT_T)
+    if parasite:
+      time.sleep(timeout)
+      return
+    read_bit = self._onewire.read_bit
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+      if read_bit():
+        return
+
+  def read_temperature(self, rom):
+    """Read the last converted temperature of the DS18B20 ``rom`` in
+    degrees Celsius.
+
+    :raises RuntimeError: when the scratchpad fails its CRC"""
+    self.select(rom)
+    self._onewire.write_byte(_READ_SCRATCHPAD)
+    scratchpad = self._scratchpad
+    self._onewire.readinto(scratchpad)
+    if crc8(scratchpad):
+      raise RuntimeError("OneWire scratchpad CRC error")
+    return struct.unpack_from("<h", scratchpad, 0)[0] / 16
+
+  def read_temperatures(self, into=None):
+    """Convert on every DS18B20 with one command, then read them all.
+
+    :param list into: list to fill instead of allocating a new one
+    :return: temperatures in degrees Celsius, in the order of
+      :py:meth:`ds18b20s`, None for a sensor whose read failed
+    :rtype: list"""
+    sensors = self.ds18b20s()
+    if into is None:
+      into = [None] * len(sensors)
+    self.convert_all()
+    for i, rom in enumerate(sensors):
+      try:
+        into[i] = self.read_temperature(rom)
+      except RuntimeError:
+        into[i] = None
+    return into
@@ -0,0 +1,316 @@
+"""
+`pattern`
+========================================================
+Copyright 2020 Alorium Technology. All rights reserved.
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This file is part of the Alorium Technology CiricuitPython Library Bundle
+and provides precompiled output patterns for the E, G and Z FPGA ports,
+for stepper drivers, test patterns and bit-banged protocols.
+
+A :py:class:`Program` is compiled once into three arrays holding, per
+step, the CSR to write, the word to write to it and the delay to the next
+step. A :py:class:`Player` streams it through queued OUTSET, OUTCLR and
+OUTTGL writes without allocating per step::
+
+  from aloriumtech import board, pattern
+
+  STEP = 1 << 0
+  DIR = 1 << 1
+
+  move = pattern.Program(pattern.PORT_E)
+  move.ramp(STEP, 400, 200, 2000, dir_mask=DIR)
+  move.ramp(STEP, 400, 2000, 200, dir_mask=DIR)
+
+  player = pattern.Player()
+  print(player.play(move))
+
+"""
+import math
+import time
+from array import array
+
+from aloriumtech import _evo
+
+# Port IDs, as in the second item of the aloriumtech.board pin tuples
+PORT_E = 1
+PORT_G = 2
+PORT_Z = 3
+
+# Address of a loop step, its word holds the loop slot and the target
+_LOOP = 0xFFFF
+# Address of a step that only waits
+_WAIT = 0xFFFE
+# Loop targets and slots share the 32 bit word of a loop step
+_LOOP_LIMIT = 0xFFFF
+
+class Program:
+
+  """A compiled sequence of port writes
+
+  Delays are in microseconds and run from one step to the next. Steps
+  with no delay are sent back to back in one queue of CSR writes.
+
+  :param int port: `PORT_E`, `PORT_G` or `PORT_Z`"""
+
+  def __init__(self, port):
+    base = _evo.PORT_BASE_ADDRS[port]
+    self._out = base + _evo.PORT_OUT_OFS
+    self._outset = base + _evo.PORT_OUTSET_OFS
+    self._outclr = base + _evo.PORT_OUTCLR_OFS
+    self._outtgl = base + _evo.PORT_OUTTGL_OFS
+    self._dirset = base + _evo.PORT_DIRSET_OFS
+    self._addr = array("H")
+    self._word = array("L")
+    self._delay = array("L")
+    self._loops = 0
+    self._open = []
+    self.mask = 0
+
+  def __len__(self):
+    return len(self._addr)
+
+  def _step(self, addr, word, delay):
+    self._addr.append(addr)
+    self._word.append(word)
+    self._delay.append(int(delay))
+
+  def set(self, mask, delay=0):
+    """Drive the bits of ``mask`` high."""
+    self.mask |= mask
+    self._step(self._outset, mask, delay)
+
+  def clear(self, mask, delay=0):
+    """Drive the bits of ``mask`` low."""
+    self.mask |= mask
+    self._step(self._outclr, mask, delay)
+
+  def toggle(self, mask, delay=0):
+    """Invert the bits of ``mask``."""
+    self.mask |= mask
+    self._step(self._outtgl, mask, delay)
+
+  def write(self, value, mask=0xFFFFFFFF, delay=0):
+    """Drive the bits of ``mask`` to those of ``value``. A full mask is one
+    OUT write, otherwise one OUTSET and one OUTCLR write."""
+    self.mask |= mask
+    if mask == 0xFFFFFFFF:
+      self._step(self._out, value, delay)
+      return
+    high = value & mask
+    low = ~value & mask
+    if high and low:
+      self._step(self._outset, high, 0)
+      self._step(self._outclr, low, delay)
+    elif high:
+      self._step(self._outset, high, delay)
+    else:
+      self._step(self._outclr, low, delay)
+
+  def wait(self, delay):
+    """Add ``delay`` microseconds to the last step. At the start, at the
+    start of a loop or after a loop the delay becomes a step of its own,
+    so that it runs once per pass of the loop it is written in."""
+    count = len(self._addr)
+    if not count or self._addr[-1] == _LOOP or (self._open and self._open[-1] == count):
+      self._step(_WAIT, 0, delay)
+    else:
+      self._delay[-1] += int(delay)
+
+  def begin_loop(self):
+    """Mark the start of steps to repeat, closed by :py:meth:`end_loop`.
+    Loops nest."""
+    self._open.append(len(self._addr))
+
+  def end_loop(self, count=0):
+    """Repeat the steps since the matching :py:meth:`begin_loop` ``count``
+    times in all, or forever when ``count`` is 0.
+
+    :raises ValueError: when the loop starts beyond step 65535 or the
+      program has more than 65535 loops"""
+    if not self._open:
+      raise ValueError("end_loop without begin_loop")
+    target = self._open.pop()
+    if target > _LOOP_LIMIT or self._loops >= _LOOP_LIMIT:
+      raise ValueError("Program too long for its loops")
+    self._step(_LOOP, (self._loops << 16) | target, count)
+    self._loops += 1
+
+  def ramp(self, step_mask, steps, start_rate, end_rate, *, dir_mask=0, reverse=False, setup=5):
+    """Add ``steps`` step pulses whose rate changes from ``start_rate`` to
+    ``end_rate`` steps per second at constant acceleration, as for a
+    stepper driver's STEP pin.
+
+    :param int step_mask: the STEP bit
+    :param int steps: number of steps
+    :param float start_rate: steps per second of the first step
+    :param float end_rate: steps per second of the last step
+    :param int dir_mask: the DIR bit, or 0 to leave it alone
+    :param bool reverse: drive DIR high rather than low
+    :param int setup: microseconds between setting DIR and the first step"""
+    if dir_mask:
+      if reverse:
+        self.set(dir_mask, setup)
+      else:
+        self.clear(dir_mask, setup)
+    start = start_rate * start_rate
+    change = end_rate * end_rate - start
+    last = max(steps - 1, 1)
+    for i in range(steps):
+      rate = math.sqrt(start + change * i / last)
+      self.set(step_mask)
+      self.clear(step_mask, 1000000 / rate)
+
+  def configure(self):
+    """Make every bit the program drives an output."""
+    _evo.send_evo_write_word(self._dirset, self.mask)
+
+class PlayReport:
+
+  """Outcome of playing a pattern"""
+
+  def __init__(self, steps, seconds, late):
+    """:param int steps: port writes made
+    :param float seconds: time taken
+    :param int late: largest lateness of a timed step, in microseconds"""
+    self.steps = steps
+    self.seconds = seconds
+    self.late = late
+
+  @property
+  def rate(self):
+    """Achieved steps per second"""
+    if not self.seconds:
+      return 0.0
+    return self.steps / self.seconds
+
+  def __str__(self):
+    return "{} steps in {:.3f} s, {:.0f} steps/s, {} us late at most".format(
+      self.steps, self.seconds, self.rate, self.late)
+
+class Player:
+
+  """Plays compiled programs and streams
+
+  :param int queue: CSR writes queued before they are sent"""
+
+  def __init__(self, queue=32):
+    self._queue = bytearray(_evo.EVO_FRAME_SIZE * queue)
+    self._counters = array("L")
+    self._deadline = 0
+    self._steps = 0
+    self._late = 0
+
+  def _begin(self):
+    self._steps = 0
+    self._late = 0
+    self._deadline = time.monotonic_ns()
+    return self._deadline
+
+  def _report(self, start):
+    return PlayReport(self._steps, (time.monotonic_ns() - start) / 1000000000, self._late // 1000)
+
+  def _wait(self, delay):
+    # Wait until delay microseconds after the previous timed step; a late
+    # step moves the schedule rather than being made up
+    monotonic_ns = time.monotonic_ns
+    self._deadline += delay * 1000
+    now = monotonic_ns()
+    if now > self._deadline:
+      if now - self._deadline > self._late:
+        self._late = now - self._deadline
+      self._deadline = now
+      return
+    while now < self._deadline:
+      now = monotonic_ns()
+
+  def _play(self, program):
+    addr = program._addr
+    word = program._word
+    delay = program._delay
+    count = len(addr)
+    counters = self._counters
+    if len(counters) < program._loops:
+      counters.extend(array("L", [0] * (program._loops - len(counters))))
+    for slot in range(program._loops):
+      counters[slot] = 0
+    queue = self._queue
+    frame = _evo.EVO_FRAME_SIZE
+    size = len(queue)
+    pack = _evo.pack_evo_write_frame
+    offset = 0
+    steps = 0
+    i = 0
+    while i < count:
+      a = addr[i]
+      if a == _LOOP:
+        slot = word[i] >> 16
+        repeats = delay[i]
+        counters[slot] += 1
+        if repeats == 0 or counters[slot] < repeats:
+          i = word[i] & 0xFFFF
+        else:
+          counters[slot] = 0
+          i += 1
+        continue
+      if a == _WAIT:
+        if offset:
+          _evo.send_evo_write_queue(queue, offset // frame)
+          offset = 0
+        self._wait(delay[i])
+        i += 1
+        continue
+      pack(queue, offset, a, word[i])
+      offset += frame
+      steps += 1
+      d = delay[i]
+      if d or offset == size:
+        _evo.send_evo_write_queue(queue, offset // frame)
+        offset = 0
+        if d:
+          self._wait(d)
+      i += 1
+    if offset:
+      _evo.send_evo_write_queue(queue, offset // frame)
+    self._steps += steps
+
+  def play(self, program, *, repeat=1):
+    """Play ``program`` ``repeat`` times.
+
+    :return: achieved step rate and timing
+    :rtype: PlayReport"""
+    start = self._begin()
+    for _ in range(repeat):
+      self._play(program)
+    return self._report(start)
+
+  def stream(self, source, port=PORT_E):
+    """Play everything ``source`` yields, for patterns with no end or that
+    are computed as they go. An item is either a :py:class:`Program`,
+    played as is, or a ``(value, mask, delay)`` tuple for ``port``.
+
+    :param source: iterable or generator of programs and steps
+    :param int port: port of the tuple steps
+    :return: achieved step rate and timing
+    :rtype: PlayReport"""
+    base = _evo.PORT_BASE_ADDRS[port]
+    outset = base + _evo.PORT_OUTSET_OFS
+    outclr = base + _evo.PORT_OUTCLR_OFS
+    write = _evo.send_evo_write_word
+    start = self._begin()
+    for item in source:
+      if isinstance(item, Program):
+        self._play(item)
+        continue
+      value, mask, delay = item
+      if value & mask:
+        write(outset, value & mask)
+      if ~value & mask:
+        write(outclr, ~value & mask)
+      self._steps += 1
+      if delay:
+        self._wait(delay)
+    return self._report(start)
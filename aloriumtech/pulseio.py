@@ -0,0 +1,170 @@
+"""
+`pulseio`
+========================================================
+Copyright 2020 Alorium Technology. All rights reserved.
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This file is part of the Alorium Technology CiricuitPython Library Bundle
+and provides a custom CircuitPython pulseio library for Evo M51.
+
+The D pins are routed through the FPGA, so the pin's D2F_EN and D2F_DIR
+bits are set before it is handed to the native ``pulseio``.
+
+For IR receivers and tachometers :py:meth:`PulseIn.readinto` drains every
+pending pulse into a caller-owned ``array('H')``, and
+:py:meth:`PulseIn.stream` keeps doing so::
+
+  from array import array
+  from aloriumtech import board, pulseio
+
+  ir = pulseio.PulseIn(board.D5, maxlen=256, idle_state=True)
+  pulses = array("H", [0] * 256)
+  for count in ir.stream(pulses):
+    if count:
+      decode(pulses, count)
+    # other work of the main loop
+
+"""
+import pulseio
+
+from aloriumtech import _evo
+
+class PulseIn:
+
+  """Measure a series of active and idle pulses.
+
+  :param pin: the Evo pin to read pulses from, e.g. ``board.D5``
+  :param int maxlen: maximum number of pulses to store at once
+  :param bool idle_state: idle state of the pin. At start and after
+    `resume` the first recorded pulse will the opposite state from idle."""
+
+  def __init__(self, pin, maxlen=2, *, idle_state=False):
+    if isinstance(pin[1], int):
+      raise ValueError("E, G and Z pins have no pulse capture")
+    self._evo_pin = pin
+    _evo.claim_d2f_pin(pin[0], False)
+    self._pulses = pulseio.PulseIn(pin[1], maxlen=maxlen, idle_state=idle_state)
+    self.overflows = 0
+
+  def deinit(self):
+    """Deinitialises the PulseIn and releases any hardware resources for reuse."""
+    self._pulses.deinit()
+    _evo.release_d2f_pin(self._evo_pin[0])
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exception_type, exception_value, traceback):
+    self.deinit()
+
+  def pause(self):
+    """Pause pulse capture"""
+    self._pulses.pause()
+
+  def resume(self, trigger_duration=0):
+    """Resumes pulse capture after an optional trigger pulse.
+
+    :param int trigger_duration: trigger pulse duration in microseconds"""
+    self._pulses.resume(trigger_duration)
+
+  def clear(self):
+    """Clears all captured pulses"""
+    self._pulses.clear()
+
+  def popleft(self):
+    """Removes and returns the oldest read pulse."""
+    return self._pulses.popleft()
+
+  @property
+  def maxlen(self):
+    """The maximum length of the PulseIn. When len() is equal to maxlen,
+    it is unclear which pulses are active and which are idle."""
+    return self._pulses.maxlen
+
+  @property
+  def paused(self):
+    """True when pulse capture is paused as a result of :py:func:`pause`
+    or an error during capture such as a signal that is too fast."""
+    return self._pulses.paused
+
+  def __bool__(self):
+    return bool(len(self._pulses))
+
+  def __len__(self):
+    return len(self._pulses)
+
+  def __getitem__(self, index):
+    return self._pulses[index]
+
+  def readinto(self, buffer, *, start=0, end=None):
+    """Move the pending pulses, oldest first, into ``buffer[start:end]``
+    and return how many were moved. Pulses that do not fit stay queued.
+    The native ``PulseIn`` has no bulk read, so this is still one
+    ``popleft()`` per pulse, without the attribute lookups of a Python
+    loop over `popleft`.
+
+    When the queue was full, pulses may have been lost and the
+    active/idle order of the ones that follow is unknown; `overflows`
+    counts those occasions.
+
+    :param array buffer: an ``array('H')`` or other buffer of 16 bit values
+    :return: number of pulses moved
+    :rtype: int"""
+    if end is None:
+      end = len(buffer)
+    pulses = self._pulses
+    pending = len(pulses)
+    if pending >= pulses.maxlen:
+      self.overflows += 1
+    count = min(pending, end - start)
+    popleft = pulses.popleft
+    for i in range(start, start + count):
+      buffer[i] = popleft()
+    return count
+
+  def stream(self, buffer, *, minimum=1):
+    """Yield the number of pulses moved into ``buffer`` each time at least
+    ``minimum`` are pending, and 0 when fewer are, so the loop consuming
+    the generator never blocks and can do its other work between pulses.
+    The same buffer is refilled from the start every time, so handle its
+    contents before asking for more.
+
+    :param array buffer: an ``array('H')`` or other buffer of 16 bit values
+    :param int minimum: pulses to wait for before draining"""
+    pulses = self._pulses
+    while True:
+      if len(pulses) >= minimum:
+        yield self.readinto(buffer)
+      else:
+        yield 0
+
+class PulseOut:
+
+  """Pulse PWM "carrier" output on and off. This is commonly used in
+  infrared remotes.
+
+  :param ~aloriumtech.pwmio.PWMOut carrier: PWMOut that is set to output
+    on the desired pin"""
+
+  def __init__(self, carrier):
+    self._pulses = pulseio.PulseOut(carrier._pwm)
+
+  def deinit(self):
+    """Deinitialises the PulseOut and releases any hardware resources for reuse."""
+    self._pulses.deinit()
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exception_type, exception_value, traceback):
+    self.deinit()
+
+  def send(self, pulses):
+    """Pulse alternating on and off durations in microseconds starting with
+    on.
+
+    :param array.array pulses: pulse durations in microseconds"""
+    self._pulses.send(pulses)
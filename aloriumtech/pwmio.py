@@ -0,0 +1,69 @@
+"""
+`pwmio`
+========================================================
+Copyright 2020 Alorium Technology. All rights reserved.
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This file is part of the Alorium Technology CiricuitPython Library Bundle
+and provides a custom CircuitPython pwmio library for Evo M51.
+
+The D pins are routed through the FPGA, so ``PWMOut`` sets the pin's
+D2F_EN and D2F_DIR bits before handing it to the native ``pwmio``. E, G
+and Z pins have no timer behind them, see ``aloriumtech.softpwm``.
+
+"""
+import pwmio
+
+from aloriumtech import _evo
+
+class PWMOut:
+
+  """Output a Pulse Width Modulated signal on a given pin.
+
+  :param pin: the Evo pin to output to, e.g. ``board.D5``
+  :param int duty_cycle: the fraction of each pulse which is high, 16-bit
+  :param int frequency: the target frequency in Hertz (32-bit)
+  :param bool variable_frequency: True if the frequency will change over time"""
+
+  def __init__(self, pin, *, duty_cycle=0, frequency=500, variable_frequency=False):
+    if isinstance(pin[1], int):
+      raise ValueError("E, G and Z pins have no PWM, use aloriumtech.softpwm")
+    self._evo_pin = pin
+    _evo.claim_d2f_pin(pin[0], True)
+    self._pwm = pwmio.PWMOut(pin[1], duty_cycle=duty_cycle, frequency=frequency,
+                             variable_frequency=variable_frequency)
+
+  def deinit(self):
+    """Deinitialises the PWMOut and releases any hardware resources for reuse."""
+    self._pwm.deinit()
+    _evo.release_d2f_pin(self._evo_pin[0])
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exception_type, exception_value, traceback):
+    self.deinit()
+
+  @property
+  def duty_cycle(self):
+    """16 bit value that dictates how much of one cycle is high (1) versus
+    low (0). 0xffff will always be high, 0 will always be low and 0x7fff
+    will be half high and then half low."""
+    return self._pwm.duty_cycle
+
+  @duty_cycle.setter
+  def duty_cycle(self, value):
+    self._pwm.duty_cycle = value
+
+  @property
+  def frequency(self):
+    """32 bit value that dictates the PWM frequency in Hertz (cycles per
+    second). Only writeable when constructed with ``variable_frequency=True``."""
+    return self._pwm.frequency
+
+  @frequency.setter
+  def frequency(self, value):
+    self._pwm.frequency = value
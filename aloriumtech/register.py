@@ -0,0 +1,294 @@
+"""
+`register`
+========================================================
+Copyright 2020 Alorium Technology. All rights reserved.
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This file is part of the Alorium Technology CiricuitPython Library Bundle
+and provides register field descriptors for the Evo M51 CSR blocks, in the
+style of adafruit_register but over the ``_evo`` CSR transport.
+
+Fields are declared as class attributes of a driver::
+
+  from aloriumtech import _evo
+  from aloriumtech import register
+
+  class PortE:
+    dir = register.SetClrBits(_evo.PORT_E_DIR_ADDR, 0, 32)
+    out = register.SetClrBits(_evo.PORT_E_OUT_ADDR, 0, 32)
+    led = register.SetClrBit(_evo.PORT_E_OUT_ADDR, 3)
+    pins = register.ROBits(_evo.PORT_E_IN_ADDR, 0, 32, volatile=True)
+
+Addresses are added to the owner's ``csr_base`` attribute when it has one,
+so the same field declarations can serve several instances of a block.
+
+Each field access is one CSR transaction. Updates to several fields can be
+grouped with :py:func:`batch`, which turns all updates of one read-write
+register into a single read-modify-write and all updates of one SET/CLR
+register family into at most one SET, one CLR and one TGL write::
+
+  with register.batch():
+    port.dir = 0x0F
+    port.out = 0x05
+
+Reads inside a batch are served from a copy of the register taken on its
+first read, with the pending updates applied. Fields of registers that
+the hardware changes, such as ``PORT_E_IN`` or a status register, are
+declared ``volatile`` and always read from the bus.
+
+"""
+from aloriumtech import _evo
+
+# Offsets of the CLR/SET/TGL registers from the base of their family
+_CLR = 0x001
+_SET = 0x002
+_TGL = 0x003
+
+_ALL = 0xFFFFFFFF
+
+_batch = None
+
+class _Batch:
+  """Pending field updates, flushed when the outermost batch exits"""
+
+  def __init__(self):
+    self.depth = 0
+    self.order = []
+    self.rmw = {}
+    self.shadow = {}
+    self.setclr = {}
+
+  def __enter__(self):
+    self.depth += 1
+    return self
+
+  def __exit__(self, exception_type, exception_value, traceback):
+    global _batch
+    self.depth -= 1
+    if self.depth == 0:
+      _batch = None
+      if exception_type is None:
+        self.flush()
+
+  def read(self, addr, volatile=False):
+    # Serve reads of a pending read-write register from its shadow copy.
+    # Volatile registers are read every time and never shadowed
+    if volatile:
+      value = _evo.send_evo_read_word(addr)
+    else:
+      value = self.shadow.get(addr)
+      if value is None:
+        value = _evo.send_evo_read_word(addr)
+        self.shadow[addr] = value
+    pending = self.rmw.get(addr)
+    if pending is not None:
+      value = (value & ~pending[0]) | pending[1]
+    pending = self.setclr.get(addr)
+    if pending is not None:
+      value = ((value & ~pending[1]) | pending[0]) ^ pending[2]
+    return value
+
+  def update(self, addr, mask, value):
+    pending = self.rmw.get(addr)
+    if pending is None:
+      self.rmw[addr] = [mask, value]
+      self.order.append(addr)
+    else:
+      pending[0] |= mask
+      pending[1] = (pending[1] & ~mask) | value
+
+  def _setclr(self, addr):
+    # Pending SET, CLR and TGL masks of a register family
+    pending = self.setclr.get(addr)
+    if pending is None:
+      pending = [0, 0, 0]
+      self.setclr[addr] = pending
+      self.order.append(addr)
+    return pending
+
+  def set_clear(self, addr, set_mask, clr_mask):
+    # The latest write of a bit wins, whichever register it goes to
+    pending = self._setclr(addr)
+    written = set_mask | clr_mask
+    pending[0] = (pending[0] & ~clr_mask) | set_mask
+    pending[1] = (pending[1] & ~set_mask) | clr_mask
+    pending[2] &= ~written
+
+  def toggle(self, addr, mask):
+    # Toggling a bit with a pending SET or CLR turns it into the other one,
+    # and two toggles cancel out
+    pending = self._setclr(addr)
+    set_mask = pending[0] & mask
+    clr_mask = pending[1] & mask
+    pending[0] = (pending[0] & ~set_mask) | clr_mask
+    pending[1] = (pending[1] & ~clr_mask) | set_mask
+    pending[2] ^= mask & ~(set_mask | clr_mask)
+
+  def flush(self):
+    for addr in self.order:
+      pending = self.rmw.get(addr)
+      if pending is not None:
+        value = self.shadow.get(addr)
+        if value is None:
+          # No need to read a register that is written whole
+          if pending[0] == _ALL:
+            value = 0
+          else:
+            value = _evo.send_evo_read_word(addr)
+        _evo.send_evo_write_word(addr, (value & ~pending[0]) | pending[1])
+      pending = self.setclr.get(addr)
+      if pending is not None:
+        _write_set_clear(addr, pending[0], pending[1])
+        if pending[2]:
+          _evo.send_evo_write_word(addr + _TGL, pending[2])
+
+def batch():
+  """Group field updates until the returned context manager exits.
+
+  Batches nest; the updates are written when the outermost one exits. If
+  the block raises, the pending updates are dropped.
+
+  :return: context manager collecting the updates"""
+  global _batch
+  if _batch is None:
+    _batch = _Batch()
+  return _batch
+
+def _write_set_clear(addr, set_mask, clr_mask):
+  if set_mask:
+    _evo.send_evo_write_word(addr + _SET, set_mask)
+  if clr_mask:
+    _evo.send_evo_write_word(addr + _CLR, clr_mask)
+
+class ROBits:
+  """Multibit read-only field of a CSR.
+
+  :param int addr: CSR address
+  :param int shift: position of the lowest bit of the field
+  :param int width: number of bits in the field
+  :param bool volatile: the hardware changes the register, so reads inside
+    a batch must not be served from a copy"""
+
+  def __init__(self, addr, shift, width, *, volatile=False):
+    self.addr = addr
+    self.shift = shift
+    self.field = (1 << width) - 1
+    self.mask = self.field << shift
+    self.volatile = volatile
+
+  def _addr(self, obj):
+    return self.addr + getattr(obj, "csr_base", 0)
+
+  def __get__(self, obj, objtype=None):
+    if obj is None:
+      return self
+    addr = self._addr(obj)
+    if _batch is not None:
+      value = _batch.read(addr, self.volatile)
+    else:
+      value = _evo.send_evo_read_word(addr)
+    return (value >> self.shift) & self.field
+
+class ROBit(ROBits):
+  """Single bit read-only field of a CSR.
+
+  :param int addr: CSR address
+  :param int bit: position of the bit
+  :param bool volatile: see :py:class:`ROBits`"""
+
+  def __init__(self, addr, bit, *, volatile=False):
+    super().__init__(addr, bit, 1, volatile=volatile)
+
+  def __get__(self, obj, objtype=None):
+    if obj is None:
+      return self
+    return bool(super().__get__(obj, objtype))
+
+class RWBits(ROBits):
+  """Multibit read-write field of a CSR. Writes read the register, replace
+  the field and write the register back; a field covering all 32 bits is
+  written without the read.
+
+  :param int addr: CSR address
+  :param int shift: position of the lowest bit of the field
+  :param int width: number of bits in the field"""
+
+  def __set__(self, obj, value):
+    addr = self._addr(obj)
+    value = (value & self.field) << self.shift
+    if _batch is not None:
+      _batch.update(addr, self.mask, value)
+    elif self.mask == _ALL:
+      _evo.send_evo_write_word(addr, value)
+    else:
+      current = _evo.send_evo_read_word(addr)
+      _evo.send_evo_write_word(addr, (current & ~self.mask) | value)
+
+class RWBit(RWBits):
+  """Single bit read-write field of a CSR.
+
+  :param int addr: CSR address
+  :param int bit: position of the bit
+  :param bool volatile: see :py:class:`ROBits`"""
+
+  def __init__(self, addr, bit, *, volatile=False):
+    super().__init__(addr, bit, 1, volatile=volatile)
+
+  def __get__(self, obj, objtype=None):
+    if obj is None:
+      return self
+    return bool(super().__get__(obj, objtype))
+
+class SetClrBits(ROBits):
+  """Multibit field of a SET/CLR/TGL register family, such as
+  ``PORT_E_OUT`` with ``PORT_E_OUTCLR``, ``PORT_E_OUTSET`` and
+  ``PORT_E_OUTTGL``. Reads come from the base register, writes go to the
+  SET and CLR registers and never need a read.
+
+  :param int addr: address of the base register of the family
+  :param int shift: position of the lowest bit of the field
+  :param int width: number of bits in the field"""
+
+  def __set__(self, obj, value):
+    addr = self._addr(obj)
+    value = (value & self.field) << self.shift
+    set_mask = value
+    clr_mask = self.mask & ~value
+    if _batch is not None:
+      _batch.set_clear(addr, set_mask, clr_mask)
+    else:
+      _write_set_clear(addr, set_mask, clr_mask)
+
+  def toggle(self, obj, value=None):
+    """Toggle bits of the field with one TGL write. Toggles the whole field
+    when ``value`` is None. Inside a batch the toggle is queued in order
+    with the other updates of the register.
+
+    :param obj: the instance owning the field
+    :param int value: bits of the field to toggle"""
+    if value is None:
+      mask = self.mask
+    else:
+      mask = (value & self.field) << self.shift
+    if _batch is not None:
+      _batch.toggle(self._addr(obj), mask)
+    else:
+      _evo.send_evo_write_word(self._addr(obj) + _TGL, mask)
+
+class SetClrBit(SetClrBits):
+  """Single bit field of a SET/CLR/TGL register family.
+
+  :param int addr: address of the base register of the family
+  :param int bit: position of the bit
+  :param bool volatile: see :py:class:`ROBits`"""
+
+  def __init__(self, addr, bit, *, volatile=False):
+    super().__init__(addr, bit, 1, volatile=volatile)
+
+  def __get__(self, obj, objtype=None):
+    if obj is None:
+      return self
+    return bool(super().__get__(obj, objtype))
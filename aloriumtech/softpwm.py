@@ -0,0 +1,281 @@
+"""
+`softpwm`
+========================================================
+Copyright 2020 Alorium Technology. All rights reserved.
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This file is part of the Alorium Technology CiricuitPython Library Bundle
+and provides software PWM and servo pulses on the E, G and Z FPGA port
+pins, which have no PWM of their own.
+
+All channels start their pulse together with one OUTSET write per port.
+The falling edges are sorted once, and edges that fall within
+``resolution`` of each other on one port are merged into one OUTCLR
+write at their mean time. Other edges keep their exact times, so a period
+costs a few CSR writes however many channels share a position, without
+quantising the pulse widths::
+
+  from aloriumtech import board, softpwm
+
+  pwm = softpwm.Scheduler(frequency=50)
+  pan = pwm.servo(board.E0)
+  tilt = pwm.servo(board.E1)
+  led = pwm.channel(board.Z3, duty_cycle=0x4000)
+  pan.angle = 30
+  while True:
+    pwm.tick()
+
+The edge table is only rebuilt when a duty cycle changes. ``tick`` never
+waits: it writes the edges that have come due and returns, so the main
+loop can do other work during a period, at the cost of edges being as
+late as the loop is slow.
+
+"""
+import time
+from array import array
+
+from aloriumtech import _evo
+from aloriumtech import _pacing
+
+class Channel:
+
+  """One PWM output of a :py:class:`Scheduler`"""
+
+  def __init__(self, scheduler, pin, duty_cycle):
+    self._scheduler = scheduler
+    self._base = _evo.PORT_BASE_ADDRS[pin[1]]
+    self._bit = 1 << pin[0]
+    self._duty_cycle = duty_cycle
+
+  @property
+  def duty_cycle(self):
+    """16 bit duty cycle, 0 is always low and 65535 always high"""
+    return self._duty_cycle
+
+  @duty_cycle.setter
+  def duty_cycle(self, value):
+    if not 0 <= value <= 0xFFFF:
+      raise ValueError("duty_cycle must be between 0 and 65535")
+    if value != self._duty_cycle:
+      self._duty_cycle = value
+      self._scheduler._dirty = True
+
+  @property
+  def pulse_width(self):
+    """High time of the pulse in microseconds"""
+    return self._duty_cycle * self._scheduler.period_us // 0x10000
+
+  @pulse_width.setter
+  def pulse_width(self, value):
+    self.duty_cycle = min(max(int(value * 0x10000 // self._scheduler.period_us), 0), 0xFFFF)
+
+class Servo:
+
+  """Hobby servo on a :py:class:`Scheduler` channel
+
+  :param Channel channel: the channel driving the servo
+  :param int min_pulse: pulse width in microseconds at angle 0
+  :param int max_pulse: pulse width in microseconds at ``actuation_range``
+  :param int actuation_range: the range of movement in degrees"""
+
+  def __init__(self, channel, *, min_pulse=750, max_pulse=2250, actuation_range=180):
+    self.channel = channel
+    self._min_pulse = min_pulse
+    self._pulse_range = max_pulse - min_pulse
+    self.actuation_range = actuation_range
+
+  @property
+  def angle(self):
+    """The servo angle in degrees, None when the servo is off"""
+    if self.channel.duty_cycle == 0:
+      return None
+    fraction = (self.channel.pulse_width - self._min_pulse) / self._pulse_range
+    return fraction * self.actuation_range
+
+  @angle.setter
+  def angle(self, value):
+    if value is None:
+      self.channel.duty_cycle = 0
+      return
+    if not 0 <= value <= self.actuation_range:
+      raise ValueError("Angle out of range")
+    self.channel.pulse_width = self._min_pulse + value * self._pulse_range / self.actuation_range
+
+class Scheduler(_pacing.Paced):
+
+  """Software PWM over FPGA port pins
+
+  :py:meth:`tick` starts a period at the PWM frequency and writes each
+  merged edge once its time has come. :py:meth:`period` instead runs a
+  whole period in one call, waiting for each edge. ``writes`` is the
+  number of CSR writes of the last complete period and ``jitter`` the
+  largest lateness of one of its edges in nanoseconds, ``max_jitter`` the
+  largest seen so far.
+
+  :param int frequency: PWM frequency in Hertz, 50 for servos
+  :param int resolution: edges closer than this many microseconds on the
+    same port are written together"""
+
+  def __init__(self, frequency=50, *, resolution=100):
+    self.period_us = 1000000 // frequency
+    self._pace(self.period_us * 1000)
+    self._resolution = resolution * 1000
+    self._channels = []
+    self._dirty = True
+    # Start of the running period and its next edge, None when idle
+    self._start = None
+    self._edge = 0
+    self._jitter = 0
+    self.writes = 0
+    self.jitter = 0
+    self.max_jitter = 0
+
+  def channel(self, pin, duty_cycle=0):
+    """Add a PWM output on ``pin`` and return its :py:class:`Channel`.
+
+    :param pin: an E, G or Z pin from ``aloriumtech.board``
+    :param int duty_cycle: initial 16 bit duty cycle"""
+    if not isinstance(pin[1], int):
+      raise ValueError("Software PWM needs an E, G or Z pin")
+    channel = Channel(self, pin, duty_cycle)
+    for other in self._channels:
+      if other._base == channel._base and other._bit == channel._bit:
+        raise ValueError("Pin already has a PWM channel")
+    _evo.send_evo_write_word(channel._base + _evo.PORT_OUTCLR_OFS, channel._bit)
+    _evo.send_evo_write_word(channel._base + _evo.PORT_DIRSET_OFS, channel._bit)
+    self._channels.append(channel)
+    self._dirty = True
+    return channel
+
+  def servo(self, pin, *, min_pulse=750, max_pulse=2250, actuation_range=180):
+    """Add a servo on ``pin`` and return its :py:class:`Servo`, off until
+    an angle is set."""
+    return Servo(self.channel(pin), min_pulse=min_pulse, max_pulse=max_pulse,
+                 actuation_range=actuation_range)
+
+  def deinit(self):
+    """Drive every channel low and release the pins as inputs."""
+    for channel in self._channels:
+      _evo.send_evo_write_word(channel._base + _evo.PORT_OUTCLR_OFS, channel._bit)
+      _evo.send_evo_write_word(channel._base + _evo.PORT_DIRCLR_OFS, channel._bit)
+    self._channels = []
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exception_type, exception_value, traceback):
+    self.deinit()
+
+  def _build(self):
+    # Merge the rising edges per port, then sort the falling edges by time
+    # and merge runs of them on one port that fit within the resolution
+    starts = {}
+    lows = {}
+    falling = []
+    for channel in self._channels:
+      base = channel._base
+      duty = channel._duty_cycle
+      if duty == 0:
+        lows[base] = lows.get(base, 0) | channel._bit
+        continue
+      starts[base] = starts.get(base, 0) | channel._bit
+      if duty == 0xFFFF:
+        continue
+      falling.append((duty * self._period // 0x10000, base, channel._bit))
+    falling.sort()
+    resolution = self._resolution
+    # Per port: first time, sum of times, count and mask of the open group
+    groups = {}
+    edges = []
+    for offset, base, bit in falling:
+      group = groups.get(base)
+      if group is not None and offset - group[0] <= resolution:
+        group[1] += offset
+        group[2] += 1
+        group[3] |= bit
+        continue
+      if group is not None:
+        edges.append((group[1] // group[2], base, group[3]))
+      groups[base] = [offset, offset, 1, bit]
+    for base in groups:
+      group = groups[base]
+      edges.append((group[1] // group[2], base, group[3]))
+    edges.sort()
+    self._start_addr = array("L", [base + _evo.PORT_OUTSET_OFS for base in starts])
+    self._start_mask = array("L", [starts[base] for base in starts])
+    self._edge_time = array("L", [edge[0] for edge in edges])
+    self._edge_addr = array("L", [edge[1] + _evo.PORT_OUTCLR_OFS for edge in edges])
+    self._edge_mask = array("L", [edge[2] for edge in edges])
+    # Channels turned off go low now rather than every period
+    for base in lows:
+      _evo.send_evo_write_word(base + _evo.PORT_OUTCLR_OFS, lows[base])
+    self._dirty = False
+
+  def _begin(self):
+    # Raise every active channel and start timing the edges
+    if self._dirty:
+      self._build()
+    write = _evo.send_evo_write_word
+    for i in range(len(self._start_addr)):
+      write(self._start_addr[i], self._start_mask[i])
+    self._start = time.monotonic_ns()
+    self._edge = 0
+    self._jitter = 0
+
+  def _service(self, wait):
+    # Write the edges that have come due, or with wait every edge at its
+    # time. Returns True once the period's last edge is written
+    edge_time = self._edge_time
+    count = len(edge_time)
+    start = self._start
+    monotonic_ns = time.monotonic_ns
+    while self._edge < count:
+      i = self._edge
+      target = start + edge_time[i]
+      now = monotonic_ns()
+      if now < target:
+        if not wait:
+          return False
+        while now < target:
+          now = monotonic_ns()
+      _evo.send_evo_write_word(self._edge_addr[i], self._edge_mask[i])
+      if now - target > self._jitter:
+        self._jitter = now - target
+      self._edge = i + 1
+    self.writes = len(self._start_addr) + count
+    self.jitter = self._jitter
+    if self._jitter > self.max_jitter:
+      self.max_jitter = self._jitter
+    self._start = None
+    return True
+
+  def period(self):
+    """Drive one PWM period: raise every active channel, then clear them
+    at their edges, waiting for each. Returns once the last edge has been
+    written, which may be well before the end of the period."""
+    if self._start is not None:
+      self._service(True)
+    self._begin()
+    self._service(True)
+
+  def tick(self):
+    """Call from the main loop, as often as possible. Writes the edges of
+    the running period that have come due, and starts a period when the
+    next one is due; periods that have already passed are dropped, not
+    made up. Never waits.
+
+    :return: True when a period was started
+    :rtype: bool"""
+    if self._start is not None:
+      self._service(False)
+    if not self._due():
+      return False
+    if self._start is not None:
+      # The loop fell behind, end the previous period's pulses first
+      self._service(True)
+    self._begin()
+    self._service(False)
+    return True
@@ -0,0 +1,139 @@
+"""
+`spi_device`
+========================================================
+Copyright 2020 Alorium Technology. All rights reserved.
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This file is part of the Alorium Technology CiricuitPython Library Bundle
+and provides an SPI device manager for several devices sharing one
+``aloriumtech.busio.SPI`` bus, in the style of adafruit_bus_device.
+
+"""
+import struct
+
+from aloriumtech import _evo
+
+class SPIDevice:
+
+  """An SPI device with its own bus settings and chip select
+
+  The bus only reconfigures when the settings differ from those of the last
+  device that used it, see :py:meth:`aloriumtech.busio.SPI.configure`.
+
+  The chip select is resolved once here. A D pin is driven through its SAMD
+  pin directly, an FPGA port pin (E, G or Z) with one prepared OUTCLR or
+  OUTSET CSR write, so selecting a device does not repeat the port lookup
+  and word packing of ``DigitalInOut.value``.
+
+  Use it as a context manager like adafruit_bus_device::
+
+    with device as spi:
+      spi.write(command)
+
+  or let one call do the lock, select, transfer, deselect and unlock::
+
+    device.write_then_readinto(command, result)
+
+  :param ~aloriumtech.busio.SPI spi: the shared bus
+  :param ~aloriumtech.digitalio.DigitalInOut chip_select: chip select pin, or None
+  :param bool cs_active_value: level of the chip select when the device is selected
+  :param int baudrate: the desired clock rate in Hertz
+  :param int polarity: the base state of the clock line (0 or 1)
+  :param int phase: the edge of the clock that data is captured
+  :param int bits: the number of bits per word
+  :param int extra_clocks: clock cycles to send after deselecting the device"""
+
+  def __init__(self, spi, chip_select=None, *, cs_active_value=False, baudrate=100000, polarity=0, phase=0, bits=8, extra_clocks=0):
+    self.spi = spi
+    self.baudrate = baudrate
+    self.polarity = polarity
+    self.phase = phase
+    self.bits = bits
+    self._extra = b"\xff" * ((extra_clocks + 7) // 8)
+    self._cs_pin = None
+    self._cs_mask = None
+    self._cs_active_value = cs_active_value
+    if chip_select is not None:
+      chip_select.switch_to_output(value=not cs_active_value)
+      if chip_select._pin is not None:
+        self._cs_pin = chip_select._pin
+      else:
+        base = _evo.PORT_BASE_ADDRS[chip_select._id]
+        self._cs_mask = bytearray(4)
+        struct.pack_into("<I", self._cs_mask, 0, 1 << chip_select._mask)
+        if cs_active_value:
+          self._select_addr = base + _evo.PORT_OUTSET_OFS
+          self._deselect_addr = base + _evo.PORT_OUTCLR_OFS
+        else:
+          self._select_addr = base + _evo.PORT_OUTCLR_OFS
+          self._deselect_addr = base + _evo.PORT_OUTSET_OFS
+        _evo.send_evo_write_trans(self._deselect_addr, self._cs_mask)
+
+  def _select(self):
+    if self._cs_pin is not None:
+      self._cs_pin.value = self._cs_active_value
+    elif self._cs_mask is not None:
+      _evo.send_evo_write_trans(self._select_addr, self._cs_mask)
+
+  def _deselect(self):
+    if self._cs_pin is not None:
+      self._cs_pin.value = not self._cs_active_value
+    elif self._cs_mask is not None:
+      _evo.send_evo_write_trans(self._deselect_addr, self._cs_mask)
+
+  def __enter__(self):
+    spi = self.spi
+    while not spi.try_lock():
+      pass
+    spi.configure(baudrate=self.baudrate, polarity=self.polarity, phase=self.phase, bits=self.bits)
+    self._select()
+    return spi
+
+  def __exit__(self, exception_type, exception_value, traceback):
+    self._deselect()
+    if self._extra:
+      self.spi.write(self._extra)
+    self.spi.unlock()
+    return False
+
+  def write(self, buffer, *, start=0, end=None):
+    """Select the device and write ``buffer[start:end]`` to it.
+
+    :param bytearray buffer: Write out the data in this buffer"""
+    if end is None:
+      end = len(buffer)
+    with self as spi:
+      spi.write(buffer, start=start, end=end)
+
+  def readinto(self, buffer, *, start=0, end=None, write_value=0):
+    """Select the device and read into ``buffer[start:end]``.
+
+    :param bytearray buffer: Read data into this buffer
+    :param int write_value: Value to write while reading"""
+    if end is None:
+      end = len(buffer)
+    with self as spi:
+      spi.readinto(buffer, start=start, end=end, write_value=write_value)
+
+  def write_readinto(self, buffer_out, buffer_in):
+    """Select the device and write ``buffer_out`` while reading the same
+    number of bytes into ``buffer_in``.
+
+    :param bytearray buffer_out: Write out the data in this buffer
+    :param bytearray buffer_in: Read data into this buffer"""
+    with self as spi:
+      spi.write_readinto(buffer_out, buffer_in)
+
+  def write_then_readinto(self, buffer_out, buffer_in, *, write_value=0):
+    """Select the device, write ``buffer_out`` and then read into
+    ``buffer_in`` without deselecting in between.
+
+    :param bytearray buffer_out: Write out the data in this buffer
+    :param bytearray buffer_in: Read data into this buffer
+    :param int write_value: Value to write while reading"""
+    with self as spi:
+      spi.write(buffer_out)
+      spi.readinto(buffer_in, write_value=write_value)
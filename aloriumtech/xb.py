@@ -0,0 +1,142 @@
+"""
+`xb`
+========================================================
+Copyright 2020 Alorium Technology. All rights reserved.
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This file is part of the Alorium Technology CiricuitPython Library Bundle
+and provides discovery of the Xcelerator Blocks (XBs) in the loaded FPGA
+image and dispatch of work to registered XB drivers.
+
+"""
+import struct
+
+from aloriumtech import _evo
+
+# The info block has room for XB01..XB15
+XB_MAX = 15
+
+# Each XB slot gets a window of CSRs, XB01 first. The SVN 257 address map
+# in _evo stops short of the XB CSRs, so this base and window size are the
+# layout the library's XB drivers assume; check them against the FPGA image
+XB_CSR_BASE_ADDR = 0x200
+XB_CSR_SIZE = 0x040
+
+_drivers = {}
+_blocks = None
+_instances = {}
+_routes = {}
+
+class XceleratorBlock:
+  """Base class for Xcelerator Block drivers
+
+  A driver declares the block ID it handles in ``XB_ID`` and the work it can
+  take on in ``CAPABILITIES``, then registers itself with :py:func:`register`::
+
+    from aloriumtech import xb
+
+    @xb.register
+    class CRC32Block(xb.XceleratorBlock):
+      XB_ID = 0x43524333
+      CAPABILITIES = ("crc32",)
+
+      def crc32(self, buffer):
+        ...
+
+  Library code asks for a capability and falls back to software when the
+  FPGA image does not carry a matching block::
+
+    crc32 = xb.dispatch("crc32", "crc32", _software_crc32)"""
+
+  XB_ID = None
+  CAPABILITIES = ()
+
+  def __init__(self, slot, xb_id):
+    """Bind the driver to the block found in ``slot``.
+
+    :param int slot: XB slot number, 1 for XB01 through 15 for XB15
+    :param int xb_id: the block ID read from the info registers"""
+    self.slot = slot
+    self.xb_id = xb_id
+    # Base of the slot's CSR window, also picked up by aloriumtech.register
+    # field descriptors declared on the driver
+    self.csr_base = XB_CSR_BASE_ADDR + (slot - 1) * XB_CSR_SIZE
+
+def register(driver):
+  """Register an XB driver class. Returns the class so it can be used as a
+  decorator.
+
+  :param type driver: subclass of :py:class:`XceleratorBlock`"""
+  if driver.XB_ID is None:
+    raise ValueError("XB driver must define XB_ID")
+  _drivers[driver.XB_ID] = driver
+  # A new driver may claim a block that previously fell back to software
+  _routes.clear()
+  return driver
+
+def scan(*, force=False):
+  """Return the IDs of the Xcelerator Blocks in the FPGA image. The info
+  registers are only read on the first call unless ``force`` is set, for
+  instance after the FPGA has been reconfigured.
+
+  :param bool force: re-read the info registers
+  :return: block IDs in slot order, XB01 first
+  :rtype: tuple"""
+  global _blocks
+  if _blocks is None or force:
+    count = struct.unpack("<I", _evo.read_evo_info(_evo.EVO_INFO_XBNUM_ADDR))[0]
+    if count > XB_MAX:
+      count = XB_MAX
+    blocks = []
+    for i in range(count):
+      result = _evo.read_evo_info(_evo.EVO_INFO_XB01_ADDR + i)
+      blocks.append(struct.unpack("<I", result)[0])
+    _blocks = tuple(blocks)
+    _instances.clear()
+    _routes.clear()
+  return _blocks
+
+def find(capability):
+  """Return the driver instance of the first block providing
+  ``capability``, or None when the FPGA image has no such block or no
+  driver for it has been registered.
+
+  :param str capability: name of the capability"""
+  try:
+    return _routes[capability]
+  except KeyError:
+    pass
+  block = None
+  for slot, xb_id in enumerate(scan(), 1):
+    driver = _drivers.get(xb_id)
+    if driver is not None and capability in driver.CAPABILITIES:
+      block = _instances.get(slot)
+      if block is None:
+        block = driver(slot, xb_id)
+        _instances[slot] = block
+      break
+  _routes[capability] = block
+  return block
+
+def has(capability):
+  """Return True when a hardware block provides ``capability``.
+
+  :param str capability: name of the capability"""
+  return find(capability) is not None
+
+def dispatch(capability, method, fallback):
+  """Resolve ``method`` on the block providing ``capability``, or return
+  ``fallback`` when there is none. Resolve once and keep the result so the
+  lookup is not repeated on every call.
+
+  :param str capability: name of the capability
+  :param str method: name of the driver method doing the work
+  :param fallback: software implementation with the same signature
+  :return: the callable to use"""
+  block = find(capability)
+  if block is None:
+    return fallback
+  return getattr(block, method)
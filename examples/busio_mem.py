@@ -0,0 +1,46 @@
+"""
+`busio_mem`
+========================================================
+Copyright 2020 Alorium Technology
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This program measures the heap used by each aloriumtech.busio wrapper
+object. The wrappers delegate their methods at class level, so an
+instance holds only its native object and its pins.
+
+The board has not been measured; run this program on it for the figures
+that matter there. Under CPython, with stand-ins for the native objects,
+the wrapper object itself, with its attribute dict and the methods bound
+to it, took these bytes:
+
+    wrapper  bound methods  class methods  class methods and __slots__
+    I2C                800            152                           56
+    SPI                664            168                           72
+    UART               728            152                           56
+    OneWire            576            144                           48
+
+CircuitPython ignores ``__slots__``, so the middle column is the one to
+compare on the board.
+
+"""
+import gc
+
+from aloriumtech import board, busio
+
+def measure(make):
+    gc.collect()
+    before = gc.mem_free()
+    obj = make()
+    gc.collect()
+    used = before - gc.mem_free()
+    obj.deinit()
+    return used
+
+print("wrapper   bytes")
+print("I2C      ", measure(lambda: busio.I2C(board.SCL, board.SDA)))
+print("SPI      ", measure(lambda: busio.SPI(board.SCK, board.MOSI, board.MISO)))
+print("UART     ", measure(lambda: busio.UART(board.TX, board.RX)))
+print("OneWire  ", measure(lambda: busio.OneWire(board.D7)))
@@ -0,0 +1,28 @@
+"""
+`evo_flash_update`
+========================================================
+Copyright 2020 Alorium Technology
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This example programs a new FPGA image from a bitstream file copied
+to CIRCUITPY and reports how long the update took and how much RAM
+it needed.
+
+To be able to resume after a power loss, CIRCUITPY must be writable
+from code. Add this to boot.py:
+
+  import storage
+  storage.remount("/", False)
+
+"""
+from aloriumtech import flash
+
+BITSTREAM = "/evo_m51.bin"
+IMAGE = 1
+
+print("Programming {} into image {}".format(BITSTREAM, IMAGE))
+report = flash.update(BITSTREAM, image=IMAGE)
+print(report)
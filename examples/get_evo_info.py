@@ -13,49 +13,30 @@ Blocks, etc.
 
 """
 
-import board
-import busio
+from aloriumtech import _evo
+from aloriumtech._evo import (
+    EVO_INFO_MODEL_ADDR,
+    EVO_INFO_SERIAL_ADDR,
+    EVO_INFO_PART_ADDR,
+    EVO_INFO_FTYPE_ADDR,
+    EVO_INFO_FSIZE_ADDR,
+    EVO_INFO_FSPLY_ADDR,
+    EVO_INFO_FFEAT_ADDR,
+    EVO_INFO_FPACK_ADDR,
+    EVO_INFO_FPINS_ADDR,
+    EVO_INFO_FTEMP_ADDR,
+    EVO_INFO_FSPED_ADDR,
+    EVO_INFO_FOPTN_ADDR,
+    EVO_INFO_VER_ADDR,
+    EVO_INFO_SVN_ADDR,
+    EVO_INFO_XBNUM_ADDR,
+)
 
 VERBOSE = False
 
-EVO_INFO_MODEL_ADDR = 0x00
-EVO_INFO_SERIAL_ADDR = 0x01
-EVO_INFO_PART_ADDR = 0x02
-EVO_INFO_FTYPE_ADDR = 0x10
-EVO_INFO_FSIZE_ADDR = 0x11
-EVO_INFO_FSPLY_ADDR = 0x12
-EVO_INFO_FFEAT_ADDR = 0x13
-EVO_INFO_FPACK_ADDR = 0x14
-EVO_INFO_FPINS_ADDR = 0x15
-EVO_INFO_FTEMP_ADDR = 0x16
-EVO_INFO_FSPED_ADDR = 0x17
-EVO_INFO_FOPTN_ADDR = 0x18
-EVO_INFO_VER_ADDR = 0x20
-EVO_INFO_SVN_ADDR = 0x21
-EVO_INFO_XBNUM_ADDR = 0x30
-
-i2c1 = busio.I2C(board.SCL_1, board.SDA_1, frequency=100000)
-
-while not i2c1.try_lock():
-    pass
-
-def read_reg(info_addr):
-    
-    result = bytearray(4)
-    
-    # Request SVN from Info register
-    i2c1.writeto(0x08, bytes([0x20, 0x01, info_addr, 0x00, 0x00, 0x00]), stop=False)
-
-    # The FPGA will insert data of SVN (0x21) into Info register
-    # Request data from Info register
-    i2c1.writeto(0x08, bytes([0x20, 0x01]), stop=False)
-
-    # Read result returned from FPGA I2C
-    i2c1.readfrom_into(0x08, result)
-
-
-
-    return result
+# The SCL_1/SDA_1 bus is shared with the CSR traffic through _evo, so there
+# is no second I2C object on the same pins
+read_reg = _evo.read_evo_info
 
 print("==================================")
 print("Start: get_evo_info")
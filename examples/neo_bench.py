@@ -0,0 +1,54 @@
+"""
+`neo_bench`
+========================================================
+Copyright 2020 Alorium Technology
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This program measures the RAM use and frame rate of the Evo
+NeoPixel class on a strip, next to the stock CircuitPython
+neopixel library driving the same pin.
+
+The previous Evo NeoPixel class held a PixelBuf of its own plus a
+complete stock NeoPixel object, so its cost was roughly the sum of
+the two columns printed here.
+
+"""
+import gc
+import time
+
+import board as samd_board
+import neopixel as samd_neopixel
+
+from aloriumtech import board, neopixel
+
+PIXELS = 144
+FRAMES = 100
+
+def measure(make):
+    gc.collect()
+    before = gc.mem_free()
+    strip = make()
+    gc.collect()
+    ram = before - gc.mem_free()
+    start = time.monotonic()
+    for frame in range(FRAMES):
+        strip.fill((frame & 0xFF, 0, 0))
+        strip.show()
+    fps = FRAMES / (time.monotonic() - start)
+    strip.deinit()
+    del strip
+    return ram, fps
+
+evo_ram, evo_fps = measure(
+    lambda: neopixel.NeoPixel(board.D6, PIXELS, brightness=0.2, auto_write=False)
+)
+samd_ram, samd_fps = measure(
+    lambda: samd_neopixel.NeoPixel(samd_board.D6, PIXELS, brightness=0.2, auto_write=False)
+)
+
+print("{} pixels, {} frames".format(PIXELS, FRAMES))
+print("Evo NeoPixel:   {:6d} bytes  {:6.1f} fps".format(evo_ram, evo_fps))
+print("Stock NeoPixel: {:6d} bytes  {:6.1f} fps".format(samd_ram, samd_fps))
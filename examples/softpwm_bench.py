@@ -0,0 +1,42 @@
+"""
+`softpwm_bench`
+========================================================
+Copyright 2020 Alorium Technology
+
+Contact: info@aloriumtech.com
+
+Description:
+
+This program measures the CSR writes per period and the edge jitter
+of the software PWM scheduler as channels are added on Port E.
+
+Every channel is given its own duty cycle, the worst case, and then
+all channels the same servo position, where their edges merge into
+a single write. Driving each pin with its own DigitalInOut would
+cost two writes per channel and period.
+
+"""
+from aloriumtech import board, softpwm
+
+PINS = (board.E0, board.E1, board.E2, board.E3, board.E4, board.E5,
+        board.E6, board.E7, board.E8, board.E9, board.E10, board.E11)
+PERIODS = 50
+
+def measure(count, spread):
+    pwm = softpwm.Scheduler(frequency=50)
+    servos = [pwm.servo(pin) for pin in PINS[:count]]
+    for i, servo in enumerate(servos):
+        servo.angle = 15 * i if spread else 90
+    for _ in range(PERIODS):
+        while not pwm.tick():
+            pass
+    writes, jitter = pwm.writes, pwm.max_jitter
+    pwm.deinit()
+    return writes, jitter
+
+print("channels  writes (spread)  jitter us  writes (merged)  jitter us")
+for count in range(1, len(PINS) + 1):
+    spread_writes, spread_jitter = measure(count, True)
+    merged_writes, merged_jitter = measure(count, False)
+    print("{:8d}  {:15d}  {:9.0f}  {:15d}  {:9.0f}".format(
+        count, spread_writes, spread_jitter / 1000, merged_writes, merged_jitter / 1000))
@@ -0,0 +1,50 @@
+"""Fixtures shared by the tests: a simulated Evo behind the Linux I2C
+transport of aloriumtech._evo"""
+import struct
+
+import pytest
+
+from aloriumtech import _evo, linux_i2c
+
+class FakeEvo:
+
+  """CSR registers of an Evo behind ``I2C_RDWR``. ``writes`` logs every
+  ``(address, value)`` written, in order, and ``values`` holds the words
+  returned by reads of registers that are not plain storage."""
+
+  def __init__(self):
+    self.registers = {}
+    self.values = {}
+    self.writes = []
+    self.ioctls = []
+
+  def __call__(self, fd, request, data):
+    assert request == linux_i2c.I2C_RDWR
+    messages = [data.msgs[i] for i in range(data.nmsgs)]
+    self.ioctls.append(len(messages))
+    selected = None
+    for message in messages:
+      assert message.addr == 0x08
+      if message.flags & linux_i2c.I2C_M_RD:
+        value = self.values.get(selected)
+        if value is None:
+          value = self.registers.get(selected, 0)
+        elif not isinstance(value, int):
+          value = value()
+        reply = struct.pack("<I", value)
+        for i in range(message.len):
+          message.buf[i] = reply[i]
+        continue
+      frame = bytes(message.buf[i] for i in range(message.len))
+      selected = ((frame[0] & 0x1F) << 8) | frame[1]
+      if len(frame) == 6:
+        value = struct.unpack_from("<I", frame, 2)[0]
+        self.registers[selected] = value
+        self.writes.append((selected, value))
+
+@pytest.fixture
+def evo(monkeypatch):
+  """A fresh simulated Evo installed as the transport of ``_evo``"""
+  fake = FakeEvo()
+  monkeypatch.setattr(_evo.i2c1, "ioctl", fake)
+  return fake
@@ -0,0 +1,88 @@
+"""Tests of the software quadrature decoding of aloriumtech.encoder
+against a simulated Evo"""
+import pytest
+
+from aloriumtech import _evo, encoder
+
+E = 1
+
+# A and B levels of one full forward cycle
+FORWARD = ((0, 0), (1, 0), (1, 1), (0, 1), (0, 0))
+
+@pytest.fixture
+def port(evo):
+  """The IN register of port E, set by assigning ``port.value``"""
+  class Port:
+    value = 0
+  in_addr = _evo.PORT_BASE_ADDRS[E] + _evo.PORT_IN_OFS
+  evo.values[in_addr] = lambda: Port.value
+  return Port
+
+def levels(pin_a, pin_b, a, b):
+  return (a << pin_a) | (b << pin_b)
+
+def turn(decoder, port, pins, cycle, other=0):
+  # Step the encoder on pins through cycle, sampling each level
+  for a, b in cycle:
+    port.value = other | levels(*pins, a, b)
+    decoder.sample()
+
+def test_both_directions(port):
+  decoder = encoder.Decoder((((0, E), (1, E)), ((2, E), (3, E))), hardware=False)
+  assert not decoder.hardware
+  turn(decoder, port, (0, 1), FORWARD[1:] * 2)
+  assert list(decoder.counts) == [8, 0]
+  assert decoder.position(0) == 2
+  turn(decoder, port, (2, 3), FORWARD[::-1][1:])
+  assert list(decoder.counts) == [8, -4]
+  assert decoder.position(1) == -1
+  assert decoder.errors == 0
+
+def test_both_encoders_in_one_sample(port):
+  decoder = encoder.Decoder((((0, E), (1, E)), ((2, E), (3, E))), hardware=False)
+  backward = FORWARD[::-1]
+  for (a, b), (c, d) in zip(FORWARD[1:], backward[1:]):
+    port.value = levels(0, 1, a, b) | levels(2, 3, c, d)
+    decoder.sample()
+  assert list(decoder.counts) == [4, -4]
+
+def test_b_below_a(port):
+  decoder = encoder.Decoder((((5, E), (4, E)),), hardware=False)
+  turn(decoder, port, (5, 4), FORWARD[1:])
+  assert list(decoder.counts) == [4]
+
+def test_illegal_transitions(port):
+  decoder = encoder.Decoder((((0, E), (1, E)),), hardware=False)
+  # Both pins at once, either way, is a missed step and not counted
+  turn(decoder, port, (0, 1), ((1, 1), (0, 0), (1, 1)))
+  assert list(decoder.counts) == [0]
+  assert decoder.errors == 3
+  # Counting carries on from the level reached
+  turn(decoder, port, (0, 1), ((0, 1), (1, 0)))
+  assert list(decoder.counts) == [1]
+  assert decoder.errors == 4
+
+def test_unchanged_and_unrelated_pins(port):
+  decoder = encoder.Decoder((((0, E), (1, E)),), hardware=False)
+  port.value = 1 << 20
+  decoder.sample()
+  decoder.sample()
+  assert list(decoder.counts) == [0]
+  assert decoder.errors == 0
+
+def test_pulses(port):
+  decoder = encoder.Decoder((((0, E), (1, E)),), pulses=((8, E), (9, E)), hardware=False)
+  for value in (1 << 8, 0, 1 << 8 | 1 << 9, 1 << 9, 0, 1 << 8):
+    port.value = value
+    decoder.sample()
+  assert list(decoder.pulses) == [3, 1]
+  decoder.reset()
+  assert list(decoder.pulses) == [0, 0]
+
+def test_pin_checks(port):
+  with pytest.raises(ValueError):
+    encoder.Decoder(hardware=False)
+  with pytest.raises(ValueError):
+    encoder.Decoder((((0, E), (1, E)), ((2, E), (4, E))), hardware=False)
+  with pytest.raises(ValueError):
+    encoder.Decoder((((0, E), (1, 2)),), hardware=False)
@@ -0,0 +1,44 @@
+"""Tests of aloriumtech.framing against a simulated UART"""
+import struct
+
+from aloriumtech import framing
+
+class FakeUART:
+
+  """UART that hands out at most ``chunk`` received bytes per read"""
+
+  def __init__(self, data, chunk=50):
+    self.data = bytearray(data)
+    self.chunk = chunk
+    self.written = bytearray()
+
+  def readinto(self, buffer):
+    count = min(len(buffer), self.chunk, len(self.data))
+    buffer[:count] = self.data[:count]
+    del self.data[:count]
+    return count
+
+  def write(self, buffer):
+    self.written += buffer
+    return len(buffer)
+
+def length_frame(payload):
+  return struct.pack("<H", len(payload)) + payload
+
+def test_length_resyncs_after_oversized_frame():
+  data = length_frame(bytes(range(200))) + length_frame(b"hello") + length_frame(b"world")
+  for chunk in (1, 50, 128):
+    link = framing.Framer(FakeUART(data, chunk), protocol=framing.LENGTH, buffer_size=128)
+    frames = [bytes(frame) for frame in link.frames()]
+    assert frames == [b"hello", b"world"]
+    assert link.overflows == 1
+
+def test_roundtrip():
+  for protocol in (framing.SLIP, framing.COBS, framing.LENGTH):
+    uart = FakeUART(b"")
+    link = framing.Framer(uart, protocol=protocol)
+    payloads = [b"hello", bytes([0, 0xC0, 0xDB, 0])]
+    for payload in payloads:
+      link.write_frame(payload)
+    uart.data = uart.written
+    assert [bytes(frame) for frame in link.frames()] == payloads
@@ -0,0 +1,63 @@
+"""Tests of aloriumtech.linux_i2c and the Evo CSR layer on it, against a
+simulated ioctl"""
+import fcntl
+import os
+import struct
+
+from aloriumtech import _evo, linux_i2c
+
+class FakeEvo:
+
+  """CSR registers of an Evo behind ``I2C_RDWR``"""
+
+  def __init__(self):
+    self.registers = {}
+    self.ioctls = []
+
+  def __call__(self, fd, request, data):
+    assert request == linux_i2c.I2C_RDWR
+    messages = [data.msgs[i] for i in range(data.nmsgs)]
+    self.ioctls.append(len(messages))
+    selected = None
+    for message in messages:
+      assert message.addr == 0x08
+      if message.flags & linux_i2c.I2C_M_RD:
+        reply = struct.pack("<I", self.registers.get(selected, 0))
+        for i in range(message.len):
+          message.buf[i] = reply[i]
+        continue
+      frame = bytes(message.buf[i] for i in range(message.len))
+      selected = ((frame[0] & 0x1F) << 8) | frame[1]
+      if len(frame) == 6:
+        self.registers[selected] = struct.unpack_from("<I", frame, 2)[0]
+
+def test_block_transfers_are_batched():
+  evo = FakeEvo()
+  _evo.i2c1.ioctl = evo
+  data = bytearray(struct.pack("<50I", *range(50)))
+  _evo.send_evo_write_block(0x200, data)
+  assert evo.ioctls == [42, 8]
+  evo.ioctls.clear()
+  out = bytearray(len(data))
+  _evo.send_evo_read_block(0x200, out)
+  assert out == data
+  # 21 write and read pairs per ioctl
+  assert evo.ioctls == [42, 42, 16]
+
+def test_reopens_after_deinit(monkeypatch):
+  opened = []
+  monkeypatch.setattr(os, "open", lambda path, flags: opened.append(path) or 3)
+  monkeypatch.setattr(os, "close", lambda fd: None)
+  monkeypatch.setattr(fcntl, "ioctl", FakeEvo())
+  i2c = linux_i2c.LinuxI2C(2)
+  i2c.writeto(0x08, b"\x20\x10")
+  i2c.deinit()
+  i2c.writeto(0x08, b"\x20\x10")
+  assert opened == ["/dev/i2c-2", "/dev/i2c-2"]
+
+def test_lock():
+  i2c = linux_i2c.LinuxI2C(ioctl=FakeEvo())
+  assert i2c.try_lock()
+  assert not i2c.try_lock()
+  i2c.unlock()
+  assert i2c.try_lock()
@@ -0,0 +1,85 @@
+"""Tests of aloriumtech.pattern played against a simulated Evo"""
+import pytest
+
+from aloriumtech import _evo, pattern
+
+BASE = _evo.PORT_BASE_ADDRS[pattern.PORT_E]
+OUTSET = BASE + _evo.PORT_OUTSET_OFS
+OUTCLR = BASE + _evo.PORT_OUTCLR_OFS
+OUTTGL = BASE + _evo.PORT_OUTTGL_OFS
+
+def log_waits(evo, monkeypatch):
+  # Log the waits between the writes instead of timing them
+  monkeypatch.setattr(pattern.Player, "_wait", lambda self, delay: evo.writes.append(("wait", delay)))
+
+def play(evo, program, monkeypatch):
+  log_waits(evo, monkeypatch)
+  report = pattern.Player().play(program)
+  return evo.writes, report
+
+def test_wait_at_loop_start_runs_every_pass(evo, monkeypatch):
+  program = pattern.Program(pattern.PORT_E)
+  program.set(1)
+  program.begin_loop()
+  program.wait(100)
+  program.toggle(1)
+  program.end_loop(3)
+  events, report = play(evo, program, monkeypatch)
+  assert events == [(OUTSET, 1)] + [("wait", 100), (OUTTGL, 1)] * 3
+  assert report.steps == 4
+
+def test_wait_after_loop_keeps_count(evo, monkeypatch):
+  program = pattern.Program(pattern.PORT_E)
+  program.begin_loop()
+  program.set(1, 10)
+  program.clear(1, 20)
+  program.end_loop(2)
+  program.wait(500)
+  events, _ = play(evo, program, monkeypatch)
+  assert events == [(OUTSET, 1), ("wait", 10), (OUTCLR, 1), ("wait", 20)] * 2 + [("wait", 500)]
+
+def test_nested_loops(evo, monkeypatch):
+  program = pattern.Program(pattern.PORT_E)
+  program.begin_loop()
+  program.begin_loop()
+  program.toggle(1)
+  program.end_loop(3)
+  program.set(2, 5)
+  program.end_loop(2)
+  events, report = play(evo, program, monkeypatch)
+  assert events == ([(OUTTGL, 1)] * 3 + [(OUTSET, 2), ("wait", 5)]) * 2
+  assert report.steps == 8
+
+def test_undelayed_steps_share_a_queue(evo, monkeypatch):
+  program = pattern.Program(pattern.PORT_E)
+  for _ in range(5):
+    program.toggle(1)
+  program.wait(50)
+  events, _ = play(evo, program, monkeypatch)
+  assert events == [(OUTTGL, 1)] * 5 + [("wait", 50)]
+  assert evo.ioctls == [5]
+
+def test_loop_limits():
+  program = pattern.Program(pattern.PORT_E)
+  program._open.append(0x10000)
+  with pytest.raises(ValueError):
+    program.end_loop(1)
+
+def test_repeat_restarts_loops(evo, monkeypatch):
+  program = pattern.Program(pattern.PORT_E)
+  program.begin_loop()
+  program.toggle(1, 10)
+  program.end_loop(2)
+  log_waits(evo, monkeypatch)
+  report = pattern.Player().play(program, repeat=2)
+  assert evo.writes == [(OUTTGL, 1), ("wait", 10)] * 4
+  assert report.steps == 4
+
+def test_stream(evo, monkeypatch):
+  program = pattern.Program(pattern.PORT_E)
+  program.toggle(4, 7)
+  log_waits(evo, monkeypatch)
+  report = pattern.Player().stream(iter([(1, 3, 100), program, (0, 1, 0)]))
+  assert evo.writes == [(OUTSET, 1), (OUTCLR, 2), ("wait", 100),
+                        (OUTTGL, 4), ("wait", 7), (OUTCLR, 1)]
+  assert report.steps == 3
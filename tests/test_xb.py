@@ -0,0 +1,78 @@
+"""Tests of the Xcelerator Block registry in aloriumtech.xb against a
+simulated Evo"""
+import pytest
+
+from aloriumtech import _evo, xb
+
+@pytest.fixture
+def blocks(evo, monkeypatch):
+  """Give the simulated Evo info registers listing ``ids``, with an empty
+  driver registry"""
+  info = {}
+  evo.values[_evo.EVO_INFO_ADDR] = lambda: info.get(evo.registers.get(_evo.EVO_INFO_ADDR), 0)
+  monkeypatch.setattr(xb, "_drivers", {})
+  monkeypatch.setattr(xb, "_instances", {})
+  monkeypatch.setattr(xb, "_routes", {})
+  monkeypatch.setattr(xb, "_blocks", None)
+  def load(*ids):
+    info.clear()
+    info[_evo.EVO_INFO_XBNUM_ADDR] = len(ids)
+    for i, xb_id in enumerate(ids):
+      info[_evo.EVO_INFO_XB01_ADDR + i] = xb_id
+  return load
+
+class CRC32Block(xb.XceleratorBlock):
+  XB_ID = 0x43524333
+  CAPABILITIES = ("crc32",)
+
+  def crc32(self, buffer):
+    return "hardware"
+
+class DMABlock(xb.XceleratorBlock):
+  XB_ID = 0x444D4131
+  CAPABILITIES = ("memcpy", "memset")
+
+def software(buffer):
+  return "software"
+
+def test_scan_reads_ids_once(blocks, evo):
+  blocks(0x11111111, CRC32Block.XB_ID)
+  assert xb.scan() == (0x11111111, CRC32Block.XB_ID)
+  ioctls = len(evo.ioctls)
+  assert xb.scan() == (0x11111111, CRC32Block.XB_ID)
+  assert len(evo.ioctls) == ioctls
+  blocks(DMABlock.XB_ID)
+  assert xb.scan(force=True) == (DMABlock.XB_ID,)
+
+def test_find_by_capability(blocks):
+  blocks(0x11111111, DMABlock.XB_ID, CRC32Block.XB_ID)
+  xb.register(CRC32Block)
+  xb.register(DMABlock)
+  crc = xb.find("crc32")
+  assert isinstance(crc, CRC32Block)
+  assert crc.slot == 3
+  assert crc.csr_base == xb.XB_CSR_BASE_ADDR + 2 * xb.XB_CSR_SIZE
+  # One instance per slot, whichever capability finds it
+  assert xb.find("memcpy") is xb.find("memset")
+  assert xb.has("memset")
+  assert not xb.has("fft")
+
+def test_find_without_driver(blocks):
+  blocks(CRC32Block.XB_ID)
+  assert xb.find("crc32") is None
+  # Registering a driver later claims the block
+  xb.register(CRC32Block)
+  assert isinstance(xb.find("crc32"), CRC32Block)
+
+def test_dispatch(blocks):
+  blocks(CRC32Block.XB_ID)
+  assert xb.dispatch("crc32", "crc32", software)(b"") == "software"
+  xb.register(CRC32Block)
+  assert xb.dispatch("crc32", "crc32", software)(b"") == "hardware"
+  blocks()
+  xb.scan(force=True)
+  assert xb.dispatch("crc32", "crc32", software) is software
+
+def test_register_needs_id(blocks):
+  with pytest.raises(ValueError):
+    xb.register(xb.XceleratorBlock)
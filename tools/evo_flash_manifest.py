@@ -0,0 +1,70 @@
+"""
+`evo_flash_manifest`
+========================================================
+Copyright 2020 Alorium Technology. All rights reserved.
+
+Contact: info@aloriumtech.com
+
+Description:
+
+Host side tool that writes the page CRC manifest used by
+``aloriumtech.flash.delta_update`` for an Evo M51 FPGA bitstream.
+
+Run it with desktop Python and copy the manifest to CIRCUITPY next to
+the bitstream::
+
+  python evo_flash_manifest.py evo_m51.bin
+
+"""
+import argparse
+import struct
+import zlib
+
+# Must match aloriumtech/flash.py
+PAGE_SIZE = 128
+PAD = b"\xff"
+MANIFEST_MAGIC = b"EVOM"
+MANIFEST_VERSION = 1
+MANIFEST_HEADER = "<4sHHIII"
+
+def build_manifest(image):
+  """Return the manifest of the bitstream ``image`` as bytes."""
+  pages = (len(image) + PAGE_SIZE - 1) // PAGE_SIZE
+  padded = image.ljust(pages * PAGE_SIZE, PAD)
+  crcs = [zlib.crc32(padded[i:i + PAGE_SIZE]) for i in range(0, len(padded), PAGE_SIZE)]
+  header = struct.pack(MANIFEST_HEADER, MANIFEST_MAGIC, MANIFEST_VERSION, PAGE_SIZE,
+                       pages, len(image), zlib.crc32(padded))
+  return header + struct.pack("<{}I".format(pages), *crcs)
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.split("Description:")[1].split("Run it")[0].strip())
+  parser.add_argument("bitstream", help="FPGA bitstream file")
+  parser.add_argument("-o", "--output", help="manifest file, defaults to the bitstream with a .man extension")
+  parser.add_argument("--compare", metavar="OLD", help="also report how many pages differ from this older bitstream")
+  args = parser.parse_args()
+
+  with open(args.bitstream, "rb") as f:
+    image = f.read()
+  manifest = build_manifest(image)
+
+  output = args.output or args.bitstream.rsplit(".", 1)[0] + ".man"
+  with open(output, "wb") as f:
+    f.write(manifest)
+
+  pages = (len(manifest) - struct.calcsize(MANIFEST_HEADER)) // 4
+  print("{}: {} pages, {} bytes".format(output, pages, len(manifest)))
+
+  if args.compare:
+    with open(args.compare, "rb") as f:
+      old = build_manifest(f.read())
+    offset = struct.calcsize(MANIFEST_HEADER)
+    new_crcs = manifest[offset:]
+    old_crcs = old[offset:]
+    changed = 0
+    for i in range(0, len(new_crcs), 4):
+      if new_crcs[i:i + 4] != old_crcs[i:i + 4]:
+        changed += 1
+    print("{} of {} pages differ from {}".format(changed, pages, args.compare))
+
+if __name__ == "__main__":
+  main()